@@ -7,6 +7,7 @@ from accounts.permissions import IsOwnerOrAdmin
 
 class MeView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    max_queries = 1
 
     def get(self, request):
         return Response(MeSerializer(request.user).data)
@@ -43,6 +44,7 @@ class UserAdminViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by("username")
     serializer_class = UserAdminSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+    max_queries = {"list": 2, "retrieve": 2}
 
     def get_queryset(self):
         return super().get_queryset()
@@ -0,0 +1,94 @@
+# audit/archive.py
+"""
+Archivo de la bitácora por mes.
+
+archive_before() mueve las entradas anteriores a una fecha a archivos
+gzip JSONL en AUDIT_ARCHIVE_DIR, uno por mes y por corrida
+(audit-YYYY-MM.<corrida>.jsonl.gz), y las borra de la tabla. Primero se
+escribe y sincroniza el archivo y después se borra; si algo se corta en el
+medio, una fila puede quedar en dos archivos y la lectura la deduplica por id.
+"""
+import gzip
+import json
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AuditLog
+
+_MONTH_RE = re.compile(r"^\d{4}-\d{2}$")
+CHUNK_SIZE = 5000
+
+
+def archive_dir():
+    return Path(getattr(settings, "AUDIT_ARCHIVE_DIR", settings.BASE_DIR / "var" / "audit_archive"))
+
+
+def _entry(row):
+    return {
+        "id": row["id"],
+        "ts": row["ts"].isoformat(),
+        "actor": row["actor_id"],
+        "user_name": row["actor__username"],
+        "action": row["action"],
+        "model": row["model"],
+        "obj_id": row["obj_id"],
+        "changes": row["changes"],
+    }
+
+
+def archive_before(cutoff):
+    """Archiva y borra las entradas con ts < cutoff. Devuelve cuántas movió."""
+    run = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    folder = archive_dir()
+    folder.mkdir(parents=True, exist_ok=True)
+    moved = 0
+    while True:
+        rows = list(
+            AuditLog.objects.filter(ts__lt=cutoff).order_by("ts", "id")
+            .values("id", "ts", "actor_id", "actor__username", "action", "model", "obj_id", "changes")[:CHUNK_SIZE]
+        )
+        if not rows:
+            return moved
+        by_month = defaultdict(list)
+        for row in rows:
+            by_month[row["ts"].strftime("%Y-%m")].append(_entry(row))
+        for month, entries in by_month.items():
+            path = folder / f"audit-{month}.{run}.jsonl.gz"
+            with open(path, "ab") as raw, gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+                for entry in entries:
+                    gz.write((json.dumps(entry, ensure_ascii=False) + "\n").encode())
+            with open(path, "rb") as fh:
+                os.fsync(fh.fileno())
+        with transaction.atomic():
+            AuditLog.objects.filter(id__in=[row["id"] for row in rows]).delete()
+        moved += len(rows)
+
+
+def archived_months():
+    months = defaultdict(int)
+    for path in archive_dir().glob("audit-*.jsonl.gz"):
+        months[path.name[6:13]] += path.stat().st_size
+    return [{"month": m, "bytes": size} for m, size in sorted(months.items(), reverse=True)]
+
+
+def read_month(month, filters=None):
+    """Itera las entradas archivadas de un mes (YYYY-MM), filtradas por igualdad."""
+    if not _MONTH_RE.match(month or ""):
+        raise ValueError("month debe ser YYYY-MM")
+    filters = {k: str(v) for k, v in (filters or {}).items() if v not in (None, "")}
+    seen = set()
+    for path in sorted(archive_dir().glob(f"audit-{month}.*.jsonl.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                entry = json.loads(line)
+                if entry["id"] in seen:
+                    continue
+                seen.add(entry["id"])
+                if all(str(entry.get(k)) == v for k, v in filters.items()):
+                    yield entry
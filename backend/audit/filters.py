@@ -0,0 +1,10 @@
+from backend.filters import DateRangeFilterSet
+from .models import AuditLog
+
+
+class AuditLogFilter(DateRangeFilterSet):
+    date_field = "ts"
+
+    class Meta:
+        model = AuditLog
+        fields = ("actor", "action", "model", "obj_id")
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from audit.archive import archive_before
+
+
+class Command(BaseCommand):
+    help = "Mueve las entradas de bitácora más antiguas que N días a archivos mensuales comprimidos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, "AUDIT_RETENTION_DAYS", 180),
+            help="Días que se conservan en la tabla (por defecto AUDIT_RETENTION_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        moved = archive_before(cutoff)
+        self.stdout.write(self.style.SUCCESS(f"Entradas archivadas: {moved} (anteriores a {cutoff:%Y-%m-%d})."))
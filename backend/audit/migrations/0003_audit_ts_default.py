@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='ts',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
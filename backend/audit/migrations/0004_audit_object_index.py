@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_audit_ts_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['model', 'obj_id', 'ts'], name='audit_object_idx'),
+        ),
+    ]
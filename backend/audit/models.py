@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class AuditLog(models.Model):
     actor = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
@@ -7,4 +8,12 @@ class AuditLog(models.Model):
     model = models.CharField(max_length=60)
     obj_id = models.CharField(max_length=60)
     changes = models.JSONField(default=dict)
-    ts = models.DateTimeField(auto_now_add=True)
+    # default (no auto_now_add): la hora del evento, no la del INSERT (que va al final de la transacción)
+    ts = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ts", "id"], name="audit_ts_idx"),
+            models.Index(fields=["actor", "ts"], name="audit_actor_ts_idx"),
+            models.Index(fields=["model", "obj_id", "ts"], name="audit_object_idx"),
+        ]
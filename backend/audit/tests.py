@@ -1,3 +1,109 @@
-from django.test import TestCase
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from backend.querybudget import QueryBudgetClient
+from backend.sqlite import immediate_atomic
+from catalog.models import Product
+from sales.models import Sale
+
+from .archive import archive_before
+from .models import AuditLog
+from .writer import audit_log
+
+
+class AuditWriterTests(TransactionTestCase):
+    """Con commits reales: la bitácora confirma o se descarta con la transacción."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(code="A1", name="Pisco", price=Decimal("1000"), stock=20)
+
+    def checkout(self):
+        return self.client.post("/api/sales/", {
+            "payment_method": "CASH",
+            "items": [{"product": self.product.id, "qty": 1, "unit_price": "1000"}],
+        }, format="json")
+
+    def test_entries_are_written_before_commit_with_one_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.checkout()
+        self.assertEqual(r.status_code, 201, r.data)
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        inserts = [i for i, sql in enumerate(sqls) if sql.startswith('INSERT INTO "audit_auditlog"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertLess(inserts[0], max(i for i, sql in enumerate(sqls) if sql == "COMMIT"))
+        self.assertTrue(AuditLog.objects.filter(action="SALE_CHECKOUT", obj_id=str(r.data["id"])).exists())
+
+    def test_bulk_ingest_writes_all_entries_in_one_insert(self):
+        sales = [{
+            "client_key": f"k{i}", "created_at": "2026-01-05T12:00:00Z", "payment_method": "CASH",
+            "items": [{"product": self.product.id, "qty": 1, "unit_price": "1000"}],
+        } for i in range(3)]
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.post("/api/sales/bulk/", {"sales": sales}, format="json")
+        self.assertEqual(r.data["created"], 3)
+        self.assertEqual(len([q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "audit_auditlog"')]), 1)
+        self.assertEqual(AuditLog.objects.filter(action="SALE_CHECKOUT").count(), 3)
+
+    def test_rollback_writes_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with immediate_atomic():
+                audit_log(self.user, "PRICE_CHANGE", "Product", self.product.id)
+                raise RuntimeError
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_failed_audit_insert_rolls_back_the_sale(self):
+        with mock.patch.object(AuditLog.objects, "bulk_create", side_effect=RuntimeError("disco lleno")):
+            with self.assertRaises(RuntimeError):
+                self.checkout()
+        self.assertFalse(Sale.objects.exists())
+        self.assertEqual(Product.objects.get().stock, 20)
+
+    def test_entry_inside_rolled_back_savepoint_is_discarded(self):
+        with immediate_atomic():
+            audit_log(self.user, "KEEP", "Product", 1)
+            try:
+                with transaction.atomic():
+                    audit_log(self.user, "DROP", "Product", 2)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(list(AuditLog.objects.values_list("action", flat=True)), ["KEEP"])
+
+    def test_outside_a_transaction_writes_immediately(self):
+        audit_log(self.user, "PRICE_CHANGE", "Product", self.product.id, {"price": ["1", "2"]})
+        self.assertEqual(AuditLog.objects.get().changes, {"price": ["1", "2"]})
+
+
+class AuditArchiveViewTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(AUDIT_ARCHIVE_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user("duena", password="x", role=User.OWNER)
+        self.client = QueryBudgetClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        for i, action in enumerate(("PRICE_CHANGE", "SALE_VOID", "PRICE_CHANGE")):
+            AuditLog.objects.create(actor=self.user, action=action, model="Product", obj_id=str(i),
+                                    ts=datetime(2026, 1, 10 + i, tzinfo=dt_timezone.utc))
+        archive_before(datetime(2026, 2, 1, tzinfo=dt_timezone.utc))
+
+    def test_reads_archived_month_within_budget(self):
+        months = self.client.get("/api/audit/archive/").data["months"]
+        self.assertEqual([m["month"] for m in months], ["2026-01"])
+        r = self.client.get("/api/audit/archive/", {"month": "2026-01", "action": "PRICE_CHANGE"})
+        self.assertEqual([e["obj_id"] for e in r.data["results"]], ["0", "2"])
+        self.assertFalse(AuditLog.objects.exists())
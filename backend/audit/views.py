@@ -1,5 +1,12 @@
-from rest_framework import permissions, viewsets
+from itertools import islice
 
+from rest_framework import permissions, response, status, views, viewsets
+
+from accounts.permissions import IsOwnerOrAdmin
+
+from backend.pagination import AuditLogPagination
+from .archive import archived_months, read_month
+from .filters import AuditLogFilter
 from .models import AuditLog
 from .serializers import AuditLogSerializer
 
@@ -7,9 +14,13 @@ from .serializers import AuditLogSerializer
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AuditLogPagination
+    filterset_class = AuditLogFilter
+    max_queries = {"list": 2, "retrieve": 2}
+    read_replica = True  # backend/routers.py
 
     def get_queryset(self):
-        qs = AuditLog.objects.all().order_by("-ts")
+        qs = AuditLog.objects.select_related("actor").order_by("-ts", "-id")
         user = self.request.user
         if not user.is_authenticated:
             return qs.none()
@@ -19,4 +30,33 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         is_admin = user.is_superuser or getattr(user, "is_staff", False) or role in ("OWNER", "ADMIN")
         if is_admin:
             return qs
-        return qs.filter(actor=user)
\ No newline at end of file
+        return qs.filter(actor=user)
+
+
+class AuditArchiveView(views.APIView):
+    """
+    Bitácora archivada (ver audit/archive.py).
+    Sin ?month= lista los meses disponibles; con ?month=YYYY-MM devuelve sus
+    entradas, filtrables por actor/action/model/obj_id, con limit/offset.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+    max_queries = 1  # el usuario; el archivo se lee de disco
+    MAX_LIMIT = 500
+
+    def get(self, request):
+        month = request.query_params.get("month")
+        if not month:
+            return response.Response({"months": archived_months()})
+        try:
+            limit = min(int(request.query_params.get("limit", 100)), self.MAX_LIMIT)
+            offset = max(int(request.query_params.get("offset", 0)), 0)
+            filters = {k: request.query_params.get(k) for k in ("actor", "action", "model", "obj_id")}
+            entries = list(islice(read_month(month, filters), offset, offset + limit + 1))
+        except ValueError as e:
+            return response.Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return response.Response({
+            "month": month,
+            "offset": offset,
+            "has_more": len(entries) > limit,
+            "results": entries[:limit],
+        })
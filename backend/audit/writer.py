@@ -0,0 +1,45 @@
+# audit/writer.py
+"""
+Escritura de la bitácora junto con la transacción de negocio.
+
+audit_log() no inserta en el momento cuando corre dentro del bloque
+immediate_atomic más externo (checkout, anulación, carga masiva): junta las
+entradas del request y las escribe con un solo bulk_create dentro de la misma
+transacción, justo antes del COMMIT (backend/sqlite.py, commit_scope). Así:
+
+- si la transacción confirma, sus filas de bitácora confirman con ella;
+- si hace rollback, no queda ninguna;
+- un request con N entradas hace un INSERT, no N.
+
+Fuera de ese bloque (o dentro de un savepoint, que puede deshacerse por
+separado) la entrada se inserta de inmediato en la transacción en curso.
+"""
+from django.utils import timezone
+
+from backend.sqlite import commit_scope
+
+from .models import AuditLog
+
+_SCOPE_KEY = "audit"
+
+
+def audit_log(actor, action, model, obj_id, changes=None):
+    """Registra una entrada de bitácora (ver docstring del módulo)."""
+    entry = AuditLog(
+        actor_id=getattr(actor, "pk", actor),
+        action=action,
+        model=model,
+        obj_id=str(obj_id),
+        changes=changes or {},
+        ts=timezone.now(),
+    )
+    scope = commit_scope()
+    if scope is None:
+        entry.save()
+        return entry
+    batch = scope.data.get(_SCOPE_KEY)
+    if batch is None:
+        batch = scope.data[_SCOPE_KEY] = []
+        scope.before_commit(lambda: AuditLog.objects.bulk_create(batch, batch_size=500))
+    batch.append(entry)
+    return entry
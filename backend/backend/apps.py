@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class BackendConfig(AppConfig):
+    name = 'backend'
+    verbose_name = 'POS'
+
+    def ready(self):
+        from .sqlite import configure_connection
+        connection_created.connect(configure_connection, dispatch_uid="backend.sqlite.configure_connection")
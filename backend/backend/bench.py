@@ -0,0 +1,271 @@
+"""
+Benchmark reproducible de los caminos calientes del POS (comando `bench`).
+
+seed() carga un dataset sintético determinista (semilla fija) y run() mide las
+operaciones reales vía APIRequestFactory: la venta y la anulación pasan por
+SaleViewSet, con su BEGIN IMMEDIATE (backend/sqlite.py), DTE y bitácora, igual
+que en producción. Por operación se reporta p50/p95/p99 en
+milisegundos y la mediana de consultas SQL. compare() contrasta un resultado
+con un baseline guardado.
+"""
+import json
+import math
+import platform
+import random
+import sqlite3
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from cashdesk.models import CashSession
+from cashdesk.services import current_session
+from catalog.models import Category, Product
+from catalog.search import rebuild_index
+from catalog.views import ProductViewSet
+from dte.boleta import _build_boleta_pdf
+from promos.models import Promotion
+from promos.services import promotion_index
+from reports.services import rebuild_daily_sales, rebuild_hourly_sales
+from reports.views import ExportView, SalesReportView
+from sales.models import Sale, SaleItem
+from sales.views import SalePreviewView, SaleViewSet
+
+DEFAULTS = {
+    "categories": 20,
+    "products": 2000,
+    "promotions": 30,
+    "users": 5,
+    "sales": 5000,
+    "items_per_sale": 3,
+    "days": 90,
+    "seed": 42,
+}
+WORDS = ("arroz", "aceite", "azúcar", "café", "té", "leche", "pan", "queso", "jugo", "agua",
+         "galletas", "fideos", "harina", "sal", "atún", "jabón", "papel", "yogur", "mantequilla", "huevos")
+PAYMENT_METHODS = ("CASH", "CARD", "TRANSFER")
+
+
+def seed(**options):
+    """Carga el dataset sintético en la base actual. Devuelve los parámetros usados."""
+    params = {**DEFAULTS, **{k: v for k, v in options.items() if v is not None}}
+    rng = random.Random(params["seed"])
+    User = get_user_model()
+
+    User.objects.bulk_create([
+        User(username=f"bench{i}", role=User.OWNER if i == 0 else User.SELLER, password="!")
+        for i in range(params["users"])
+    ])
+    users = list(User.objects.filter(username__startswith="bench").order_by("id"))
+    Category.objects.bulk_create([Category(name=f"Categoría {i}") for i in range(params["categories"])])
+    categories = list(Category.objects.order_by("id"))
+    Product.objects.bulk_create([
+        Product(
+            code=f"78{i:011d}",
+            name=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+            category=rng.choice(categories),
+            price=Decimal(rng.randrange(300, 20000, 10)),
+            stock=rng.randrange(0, 500),
+            min_stock=10,
+            critical_stock=3,
+            top_seller=rng.random() < 0.02,
+        )
+        for i in range(params["products"])
+    ], batch_size=500)
+    products = list(Product.objects.order_by("id"))
+    rebuild_index()
+
+    for i in range(params["promotions"]):
+        promo = Promotion.objects.create(
+            name=f"Promo {i}",
+            type=Promotion.PCT if i % 2 else Promotion.FIXED,
+            value=Decimal(rng.choice((5, 10, 15, 20))) if i % 2 else Decimal(rng.randrange(50, 500, 50)),
+            category=rng.choice(categories) if i % 3 == 0 else None,
+        )
+        if i % 3:
+            promo.products.set(rng.sample(products, 10))
+
+    now = timezone.now()
+    sales = Sale.objects.bulk_create([
+        Sale(user=rng.choice(users), payment_method=rng.choice(PAYMENT_METHODS),
+             status=Sale.VOID if rng.random() < 0.03 else Sale.OK)
+        for _ in range(params["sales"])
+    ], batch_size=500)
+    items = []
+    for sale in sales:
+        # created_at es auto_now_add: se reescribe después del INSERT.
+        sale.created_at = now - timedelta(seconds=rng.randrange(params["days"] * 86400))
+        total = Decimal("0")
+        for product in rng.sample(products, params["items_per_sale"]):
+            qty = rng.randrange(1, 5)
+            items.append(SaleItem(sale=sale, product=product, qty=qty, unit_price=product.price))
+            total += product.price * qty
+        sale.total = total
+    Sale.objects.bulk_update(sales, ["created_at", "total"], batch_size=500)
+    SaleItem.objects.bulk_create(items, batch_size=1000)
+    rebuild_daily_sales()
+    rebuild_hourly_sales()
+    return params
+
+
+def _percentile(sorted_values, pct):
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _measure(fn, iterations, warmup):
+    for i in range(warmup):
+        fn(i)
+    timings, queries = [], []
+    for i in range(warmup, warmup + iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            fn(i)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(ctx.captured_queries))
+    timings.sort()
+    return {
+        "n": iterations,
+        "p50_ms": round(_percentile(timings, 50), 3),
+        "p95_ms": round(_percentile(timings, 95), 3),
+        "p99_ms": round(_percentile(timings, 99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": int(statistics.median(queries)),
+    }
+
+
+def _consume(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.render().content if hasattr(response, "render") else response.content
+
+
+OPERATIONS = ("sale_preview", "sale_create_checkout", "product_search", "sales_report",
+              "export_csv", "boleta_pdf", "void_sale")
+
+
+def run(iterations=50, warmup=5, only=None, seed_value=DEFAULTS["seed"]):
+    """Mide cada operación sobre el dataset ya cargado."""
+    rng = random.Random(seed_value + 1)
+    factory = APIRequestFactory()
+    owner = get_user_model().objects.filter(username="bench0").get()
+    products = list(Product.objects.order_by("id").values("id", "price", "name"))
+    CashSession.objects.create(opened_by=owner, opening_amount=0)
+    promotion_index.invalidate()
+    current_session.invalidate()
+
+    def cart(lines=5):
+        return [{"product": p["id"], "qty": rng.randrange(1, 4), "unit_price": str(p["price"])}
+                for p in rng.sample(products, lines)]
+
+    def call(view, method, path, data=None, view_kwargs=None, **params):
+        request = getattr(factory, method)(path, data, format="json") if data is not None else getattr(factory, method)(path, params)
+        force_authenticate(request, user=owner)
+        response = view(request, **(view_kwargs or {}))
+        _consume(response)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method.upper()} {path}: {response.status_code} {getattr(response, 'data', '')}")
+        return response
+
+    preview_view = SalePreviewView.as_view()
+    search_view = ProductViewSet.as_view({"get": "list"})
+    report_view = SalesReportView.as_view()
+    export_view = ExportView.as_view()
+    create_view = SaleViewSet.as_view({"post": "create"})
+    void_view = SaleViewSet.as_view({"post": "void"})
+    today = timezone.localdate()
+    created = []
+
+    def preview(i):
+        call(preview_view, "post", "/api/sales/preview/", {"items": cart()})
+
+    def checkout(i):
+        response = call(create_view, "post", "/api/sales/", {"payment_method": "CASH", "items": cart()})
+        created.append(response.data["id"])
+
+    def search(i):
+        term = rng.choice(WORDS)[: rng.randrange(2, 5)]
+        call(search_view, "get", "/api/products/", search=term)
+
+    def sales_report(i):
+        call(report_view, "get", "/api/reports/sales/",
+             date_from=str(today - timedelta(days=30)), date_to=str(today))
+
+    def export_csv(i):
+        call(export_view, "get", "/api/export/", format="csv", date_from=str(today - timedelta(days=7)))
+
+    def boleta_pdf(i):
+        sale = Sale.objects.get(pk=created[i % len(created)])
+        _build_boleta_pdf(sale, list(sale.items.select_related("product")))
+
+    def void(i):
+        call(void_view, "post", f"/api/sales/{created[i]}/void/", {"reason": "bench"}, view_kwargs={"pk": created[i]})
+
+    operations = [
+        ("sale_preview", preview),
+        ("sale_create_checkout", checkout),
+        ("product_search", search),
+        ("sales_report", sales_report),
+        ("export_csv", export_csv),
+        ("boleta_pdf", boleta_pdf),
+        ("void_sale", void),  # anula las ventas creadas por sale_create_checkout
+    ]
+    only = set(only or ())
+    needed = set(only)
+    if needed & {"boleta_pdf", "void_sale"}:
+        needed.add("sale_create_checkout")  # ambas usan las ventas que crea
+    results = {}
+    for name, fn in operations:
+        if not needed or name in needed:
+            results[name] = _measure(fn, iterations, warmup)
+    return {name: data for name, data in results.items() if not only or name in only}
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "timestamp": timezone.now().isoformat(),
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """
+    Compara operaciones contra un baseline. Regresión: p50 o p95 más de
+    `threshold` (fracción) sobre el baseline, o más consultas.
+    """
+    rows = []
+    for name, now in current["operations"].items():
+        before = baseline.get("operations", {}).get(name)
+        if before is None:
+            rows.append({"operation": name, "status": "new"})
+            continue
+        p50 = now["p50_ms"] / before["p50_ms"] if before["p50_ms"] else None
+        p95 = now["p95_ms"] / before["p95_ms"] if before["p95_ms"] else None
+        regressed = (
+            (p50 is not None and p50 > 1 + threshold)
+            or (p95 is not None and p95 > 1 + threshold)
+            or now["queries"] > before["queries"]
+        )
+        rows.append({
+            "operation": name,
+            "p50_ratio": round(p50, 3) if p50 is not None else None,
+            "p95_ratio": round(p95, 3) if p95 is not None else None,
+            "queries_delta": now["queries"] - before["queries"],
+            "status": "regression" if regressed else "ok",
+        })
+    return rows
+
+
+def load(path):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
@@ -0,0 +1,80 @@
+"""
+GET condicional (ETag / Last-Modified) para recursos de lectura frecuente.
+
+Los validadores salen de los contadores de cambios por tabla
+(sync.services.mark_changed), no del cuerpo de la respuesta: con una consulta
+a esos contadores se sabe si el cliente ya tiene la versión vigente y, en ese
+caso, se responde 304 desde initial(), antes de armar el queryset.
+"""
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from sync.services import table_counter, table_state
+
+
+class _NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    conditional_models: tablas de las que depende la respuesta.
+    conditional_actions: acciones del viewset a las que aplica (en APIView, a todo GET).
+    Los contadores leídos quedan en self.conditional_state (ver backend/respcache.py).
+    """
+    conditional_models = ()
+    conditional_actions = ("list", "retrieve")
+
+    def _validators_for(self, state):
+        values = [state.get(table_counter(model), (0, None)) for model in self.conditional_models]
+        etag = 'W/"' + "-".join(str(value) for value, _ in values) + '"'
+        stamps = [changed_at for _, changed_at in values if changed_at is not None]
+        # En segundos enteros, como el header: si no, If-Modified-Since nunca coincide.
+        return etag, int(max(stamps).timestamp()) if stamps else None
+
+    def _conditional_validators(self, request):
+        if request.method not in ("GET", "HEAD") or not self.conditional_models:
+            return None
+        action = getattr(self, "action", None)
+        if action is not None and action not in self.conditional_actions:
+            return None
+        self.conditional_state = table_state(self.conditional_models)
+        return self._validators_for(self.conditional_state)
+
+    def _check_not_modified(self, request):
+        etag, last_modified = self._validators
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            raise _NotModified(not_modified)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = self._conditional_validators(request)
+        if self._validators:
+            self._check_not_modified(request)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def serve_version(self, state):
+        """
+        La respuesta es la de `state` y no la vigente (p. ej. caché en
+        revalidación): lleva el ETag de esa versión y es 304 si el cliente ya la tiene.
+        """
+        self._validators = self._validators_for(state)
+        self._check_not_modified(self.request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "_validators", None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+            # El navegador guarda la respuesta pero revalida siempre.
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,299 @@
+"""
+Eventos en vivo para el dashboard y las ventas del día (Server-Sent Events).
+
+Los servicios llaman a emit() dentro de su transacción; el evento se guarda en
+la tabla LiveEvent (sync/models.py) en esa misma transacción, así que solo
+existe si confirma:
+
+- sale.checkout / sale.void: venta confirmada o anulada.
+- sale.bulk: lote de ventas offline (el cliente recarga).
+- stock.level: un producto cambió de nivel (ok, bajo, critico, agotado).
+- cash.open / cash.close: apertura y cierre de caja.
+
+Como el evento pasa por la base, lo publica cualquier proceso: los workers
+WSGI de la API, los comandos y el admin. Dentro del bloque immediate_atomic
+más externo los eventos del request se escriben con un solo INSERT justo antes
+del COMMIT (commit_scope, igual que la bitácora).
+
+El stream lo sirve sse_application en un proceso ASGI aparte
+(backend/events_asgi.py); la API sigue en WSGI. En ese proceso broadcaster
+lee la tabla cada EVENTS_POLL_SECONDS y reparte lo nuevo a las conexiones,
+cada una una corrutina que espera en su cola. En SQLite hay un solo escritor a
+la vez, así que los ids se hacen visibles en orden y "id > último leído" no
+salta eventos. Un cliente nuevo recibe "ready" con el id actual; uno que
+reconecta con Last-Event-ID recibe lo que se perdió, y si eso ya no está
+(quedó fuera de los últimos EVENTS_BUFFER_SIZE) recibe "reset" para recargar
+los listados. EventSource no envía headers: el cliente pide primero un ticket
+firmado de corta duración (POST /api/events/ticket/) y lo pasa en la URL.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Max
+from rest_framework import permissions, response, views
+
+from sync.models import LiveEvent
+
+from .sqlite import commit_scope
+
+logger = logging.getLogger(__name__)
+
+TICKET_SALT = "backend.events"
+EVENTS_PATH = "/api/events/"
+_SCOPE_KEY = "events"
+_BATCH = 500
+
+
+def _format(event_id, type_, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {type_}\ndata: {payload}\n\n".encode()
+
+
+def _rows(after, upto=None, limit=_BATCH):
+    events = LiveEvent.objects.filter(id__gt=after).order_by("id")
+    if upto is not None:
+        events = events.filter(id__lte=upto)
+    return list(events.values_list("id", "type", "data")[:limit])
+
+
+class _Subscriber:
+    """Cola de un cliente conectado; se llena desde cualquier hilo vía su loop."""
+
+    def __init__(self, loop, limit):
+        self.loop = loop
+        self.limit = limit
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.limit:
+            # Cliente lento: se descarta lo pendiente y se le pide recargar.
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return
+        self.queue.put_nowait(event)
+
+    def push(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # loop ya cerrado: el cliente se fue
+
+
+class Broadcaster:
+    """
+    Reparte a los clientes conectados los eventos nuevos de LiveEvent. Con
+    tail=True un hilo lee la tabla desde el primer cliente; si no, hay que
+    llamar a poll().
+    """
+
+    def __init__(self, tail=True):
+        self._lock = threading.Lock()
+        self._tail = tail
+        self._thread = None
+        self._position = None  # último id repartido
+        self._subscribers = set()
+
+    def _start(self):
+        """Con _lock tomado: fija la posición inicial y arranca el hilo."""
+        if self._position is None:
+            self._position = LiveEvent.objects.aggregate(m=Max("id"))["m"] or 0
+        if self._tail and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="events-tail", daemon=True)
+            self._thread.start()
+
+    def poll(self):
+        """Reparte los eventos posteriores a la posición actual. Devuelve cuántos."""
+        with self._lock:
+            self._start()
+            rows = _rows(self._position)
+            for event_id, type_, data in rows:
+                chunk = _format(event_id, type_, data)
+                for subscriber in self._subscribers:
+                    subscriber.push(chunk)
+                self._position = event_id
+        return len(rows)
+
+    def prune(self):
+        """Borra lo que ya quedó fuera de los últimos EVENTS_BUFFER_SIZE eventos."""
+        with self._lock:
+            upto = (self._position or 0) - getattr(settings, "EVENTS_BUFFER_SIZE", 1000)
+        if upto > 0:
+            LiveEvent.objects.filter(id__lte=upto).delete()
+
+    def _run(self):
+        interval = getattr(settings, "EVENTS_POLL_SECONDS", 0.5)
+        pruned_at = 0.0
+        while True:
+            try:
+                if self.poll() < _BATCH:
+                    time.sleep(interval)
+                if time.monotonic() - pruned_at > 60:
+                    self.prune()
+                    pruned_at = time.monotonic()
+            except Exception:
+                logger.exception("events: no se pudo leer LiveEvent")
+                close_old_connections()
+                time.sleep(interval)
+
+    def subscribe(self, loop, last_id=None):
+        """
+        Registra un cliente en `loop`. Devuelve (suscriptor, primeros eventos):
+        "ready" si es nuevo, lo perdido si reanuda o "reset" si no se puede.
+        """
+        subscriber = _Subscriber(loop, getattr(settings, "EVENTS_QUEUE_SIZE", 500))
+        with self._lock:
+            self._start()
+            position = self._position
+            # Desde aquí recibe lo posterior a `position`; lo anterior va en el backlog.
+            self._subscribers.add(subscriber)
+        if not last_id:
+            return subscriber, [_format(position, "ready", {})]
+        backlog = self._since(last_id, position)
+        if backlog is None:
+            return subscriber, [_format(position, "reset", {})]
+        return subscriber, backlog
+
+    def _since(self, last_id, position):
+        """Eventos entre last_id y position, o None si no se puede reanudar."""
+        try:
+            seq = int(last_id)
+        except ValueError:
+            return None
+        missed = position - seq
+        if missed < 0 or missed > getattr(settings, "EVENTS_BUFFER_SIZE", 1000):
+            return None
+        rows = _rows(seq, position, limit=None)
+        if len(rows) != missed:
+            return None  # ya se borraron (los ids no tienen huecos)
+        return [_format(event_id, type_, data) for event_id, type_, data in rows]
+
+    def reset(self):
+        with self._lock:
+            return _format(self._position or 0, "reset", {})
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+
+broadcaster = Broadcaster()
+
+
+def emit(type_, data, using=None):
+    """Guarda el evento en la transacción en curso (ver docstring del módulo)."""
+    event = LiveEvent(type=type_, data=data)
+    scope = commit_scope(using)
+    if scope is None:
+        event.save(using=using)
+        return
+    batch = scope.data.get(_SCOPE_KEY)
+    if batch is None:
+        batch = scope.data[_SCOPE_KEY] = []
+        scope.before_commit(lambda: LiveEvent.objects.using(using).bulk_create(batch))
+    batch.append(event)
+
+
+def make_ticket(user):
+    return signing.dumps(user.pk, salt=TICKET_SALT)
+
+
+def check_ticket(ticket):
+    """Id del usuario del ticket, o None si es inválido o venció."""
+    try:
+        return signing.loads(ticket, salt=TICKET_SALT, max_age=getattr(settings, "EVENTS_TICKET_MAX_AGE", 60))
+    except signing.BadSignature:
+        return None
+
+
+class EventTicketView(views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    max_queries = 1
+
+    def post(self, request):
+        return response.Response({
+            "ticket": make_ticket(request.user),
+            "expires_in": getattr(settings, "EVENTS_TICKET_MAX_AGE", 60),
+        })
+
+
+def _cors_headers(scope):
+    if getattr(settings, "CORS_ALLOW_ALL_ORIGINS", False):
+        return [(b"access-control-allow-origin", b"*")]
+    return []
+
+
+async def _plain(send, scope, status, body):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"text/plain; charset=utf-8")] + _cors_headers(scope),
+    })
+    await send({"type": "http.response.body", "body": body.encode()})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def sse_application(scope, receive, send):
+    """GET /api/events/?ticket=...[&last_event_id=...] como text/event-stream."""
+    if scope["type"] != "http":
+        return  # lifespan: nada que preparar
+    if scope["path"] != EVENTS_PATH:
+        return await _plain(send, scope, 404, "No encontrado.")
+    if scope["method"] != "GET":
+        return await _plain(send, scope, 405, "Método no permitido.")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if check_ticket((query.get("ticket") or [""])[0]) is None:
+        return await _plain(send, scope, 401, "Ticket inválido o vencido.")
+    headers = dict(scope.get("headers") or ())
+    last_id = headers.get(b"last-event-id", b"").decode("latin-1") or (query.get("last_event_id") or [""])[0]
+
+    subscriber, backlog = await sync_to_async(broadcaster.subscribe)(asyncio.get_running_loop(), last_id)
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+    keepalive = getattr(settings, "EVENTS_KEEPALIVE_SECONDS", 15)
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),  # sin buffer en nginx
+            ] + _cors_headers(scope),
+        })
+        first = f"retry: {getattr(settings, 'EVENTS_RETRY_MS', 3000)}\n\n".encode()
+        await send({"type": "http.response.body", "body": first + b"".join(backlog), "more_body": True})
+        while True:
+            getter = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait({getter, disconnect}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                getter.cancel()
+                return
+            if getter not in done:
+                getter.cancel()
+                chunk = b": keepalive\n\n"
+            elif getter.result() is None:
+                await send({"type": "http.response.body", "body": broadcaster.reset()})
+                return
+            else:
+                chunk = getter.result()
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    finally:
+        broadcaster.unsubscribe(subscriber)
+        disconnect.cancel()
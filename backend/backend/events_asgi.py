@@ -0,0 +1,21 @@
+"""
+Proceso ASGI aparte para /api/events/ (Server-Sent Events, ver backend/events.py).
+
+La API sigue en WSGI (backend/wsgi.py); el proxy manda solo /api/events/ a
+este proceso, que no carga las vistas de Django:
+
+    uvicorn backend.events_asgi:application --port 8001
+
+Un worker alcanza para muchas conexiones; con más, cada uno lee la tabla
+LiveEvent por su cuenta.
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+django.setup(set_prefix=False)
+
+from backend.events import sse_application as application  # noqa: E402,F401  (requiere Django configurado)
@@ -0,0 +1,57 @@
+"""Filtros compartidos por los FilterSet de cada app."""
+import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django_filters import rest_framework as filters
+
+
+def parse_bound(value, end=False):
+    """
+    Acepta 'YYYY-MM-DD' (día local de la tienda, STORE_TIME_ZONE, el mismo de
+    los reportes y resúmenes diarios) o un datetime ISO y devuelve (datetime
+    aware, es_dia). Con end=True un día se convierte en el inicio del día
+    siguiente, para comparar con '<'.
+    """
+    raw = str(value or "").strip()
+    # parse_date primero: parse_datetime también acepta 'YYYY-MM-DD' (como medianoche).
+    day = parse_date(raw)
+    is_day = day is not None
+    if is_day:
+        if end:
+            day += datetime.timedelta(days=1)
+        tz = ZoneInfo(getattr(settings, "STORE_TIME_ZONE", settings.TIME_ZONE))
+        dt = datetime.datetime.combine(day, datetime.time.min, tzinfo=tz)
+    else:
+        dt = parse_datetime(raw)
+        if dt is None:
+            return None, False
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt, is_day
+
+
+class DateRangeFilterSet(filters.FilterSet):
+    """
+    Agrega date_from/date_to sobre `date_field`, comparando directo contra la
+    columna indexada (sin envolverla en date(), que impide usar el índice).
+    """
+    date_field = "created_at"
+
+    date_from = filters.CharFilter(method="filter_date_from")
+    date_to = filters.CharFilter(method="filter_date_to")
+
+    def filter_date_from(self, queryset, name, value):
+        bound, _ = parse_bound(value)
+        if bound is None:
+            return queryset
+        return queryset.filter(**{f"{self.date_field}__gte": bound})
+
+    def filter_date_to(self, queryset, name, value):
+        bound, is_day = parse_bound(value, end=True)
+        if bound is None:
+            return queryset
+        lookup = "lt" if is_day else "lte"
+        return queryset.filter(**{f"{self.date_field}__{lookup}": bound})
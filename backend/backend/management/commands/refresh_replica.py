@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.sqlite import copy_database
+
+
+class Command(BaseCommand):
+    help = "Copia la base primaria sobre la réplica de solo lectura (API de backup de SQLite)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", default=None, help="Ruta de la réplica (por defecto la de REPLICA_DB_ALIAS).")
+        parser.add_argument("--loop", action="store_true", help="Seguir copiando cada --interval segundos.")
+        parser.add_argument(
+            "--interval", type=float, default=getattr(settings, "REPLICA_REFRESH_INTERVAL", 30),
+            help="Segundos entre copias con --loop (por defecto REPLICA_REFRESH_INTERVAL).",
+        )
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES["default"]
+        alias = getattr(settings, "REPLICA_DB_ALIAS", None)
+        target = options["target"] or (settings.DATABASES[alias]["NAME"] if alias else None)
+        if source["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("refresh_replica solo copia bases SQLite.")
+        if not target:
+            raise CommandError("Sin réplica: define POS_REPLICA_DB o usa --target.")
+        if str(target) == str(source["NAME"]):
+            raise CommandError("La réplica no puede ser el mismo archivo que el primario.")
+
+        while True:
+            seconds = copy_database(str(source["NAME"]), str(target))
+            self.stdout.write(f"Réplica actualizada en {seconds:.2f}s: {target}")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
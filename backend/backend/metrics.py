@@ -0,0 +1,270 @@
+"""
+Métricas por endpoint en formato de texto Prometheus (/api/metrics/).
+
+MetricsMiddleware registra, por nombre de URL resuelto y método: cantidad de
+requests por clase de estado, histograma de latencia, histograma y total de
+consultas ORM, tiempo SQL y bytes de respuesta. Todo vive en un registro en
+memoria del proceso, protegido por un lock y acotado a METRICS_MAX_SERIES
+series; lo que exceda se acumula en la serie "__other__". Aparte se registra
+la espera por el candado de escritura de SQLite (backend/sqlite.py).
+"""
+import hmac
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, HttpResponse
+from rest_framework import permissions, views
+
+from accounts.permissions import IsOwnerOrAdmin
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+LOCK_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+OVERFLOW_VIEW = "__other__"
+UNMATCHED_VIEW = "__unmatched__"
+
+
+class _Series:
+    __slots__ = ("statuses", "latency", "latency_sum", "queries", "queries_total",
+                 "sql_seconds", "response_bytes", "count")
+
+    def __init__(self):
+        self.count = 0
+        self.statuses = {}
+        self.latency = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.queries = [0] * len(QUERY_BUCKETS)
+        self.queries_total = 0
+        self.sql_seconds = 0.0
+        self.response_bytes = 0
+
+
+class _LockSeries:
+    __slots__ = ("count", "wait", "wait_sum", "retries", "failures")
+
+    def __init__(self):
+        self.count = 0
+        self.wait = [0] * len(LOCK_BUCKETS)
+        self.wait_sum = 0.0
+        self.retries = 0
+        self.failures = 0
+
+
+def _observe(buckets, counts, value):
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            counts[i] += 1
+            return
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._locks = {}
+
+    def _max_series(self):
+        return getattr(settings, "METRICS_MAX_SERIES", 500)
+
+    def _get(self, key):
+        series = self._series.get(key)
+        if series is None:
+            if len(self._series) >= self._max_series():
+                key = (OVERFLOW_VIEW, key[1])
+                series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+        return series
+
+    def record(self, view, method, status, seconds, queries, sql_seconds, size):
+        status_class = f"{status // 100}xx"
+        with self._lock:
+            s = self._get((view, method))
+            s.count += 1
+            s.statuses[status_class] = s.statuses.get(status_class, 0) + 1
+            _observe(LATENCY_BUCKETS, s.latency, seconds)
+            s.latency_sum += seconds
+            _observe(QUERY_BUCKETS, s.queries, queries)
+            s.queries_total += queries
+            s.sql_seconds += sql_seconds
+            s.response_bytes += size
+
+    def record_lock_wait(self, site, seconds, retries, failed=False):
+        with self._lock:
+            s = self._locks.get(site)
+            if s is None:
+                s = self._locks[site] = _LockSeries()
+            s.count += 1
+            _observe(LOCK_BUCKETS, s.wait, seconds)
+            s.wait_sum += seconds
+            s.retries += retries
+            s.failures += failed
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+            self._locks = {}
+
+    def render(self):
+        with self._lock:
+            rows = []
+            for (view, method), s in sorted(self._series.items()):
+                rows.append((view, method, s.count, dict(s.statuses), list(s.latency), s.latency_sum,
+                             list(s.queries), s.queries_total, s.sql_seconds, s.response_bytes))
+            locks = [(site, s.count, list(s.wait), s.wait_sum, s.retries, s.failures)
+                     for site, s in sorted(self._locks.items())]
+        out = []
+
+        def header(name, kind, help_):
+            out.append(f"# HELP {name} {help_}")
+            out.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, buckets, idx_counts, idx_sum):
+            for row in rows:
+                labels = _labels(view=row[0], method=row[1])
+                cumulative = 0
+                for bound, n in zip(buckets, row[idx_counts]):
+                    cumulative += n
+                    out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                out.append(f'{name}_bucket{{{labels},le="+Inf"}} {row[2]}')
+                out.append(f"{name}_sum{{{labels}}} {row[idx_sum]}")
+                out.append(f"{name}_count{{{labels}}} {row[2]}")
+
+        header("pos_http_requests_total", "counter", "Requests por vista, método y clase de estado.")
+        for row in rows:
+            for status_class, n in sorted(row[3].items()):
+                out.append(f"pos_http_requests_total{{{_labels(view=row[0], method=row[1], status=status_class)}}} {n}")
+        header("pos_http_request_duration_seconds", "histogram", "Latencia del request (en streams, hasta terminar el envío).")
+        histogram("pos_http_request_duration_seconds", LATENCY_BUCKETS, 4, 5)
+        header("pos_http_request_queries", "histogram", "Consultas ORM por request.")
+        histogram("pos_http_request_queries", QUERY_BUCKETS, 6, 7)
+        header("pos_db_query_duration_seconds_total", "counter", "Tiempo acumulado en SQL.")
+        for row in rows:
+            out.append(f"pos_db_query_duration_seconds_total{{{_labels(view=row[0], method=row[1])}}} {row[8]}")
+        header("pos_http_response_bytes_total", "counter", "Bytes de respuesta enviados.")
+        for row in rows:
+            out.append(f"pos_http_response_bytes_total{{{_labels(view=row[0], method=row[1])}}} {row[9]}")
+        header("pos_db_lock_wait_seconds", "histogram", "Espera por el candado de escritura (BEGIN IMMEDIATE).")
+        for site, count, wait, wait_sum, _, _ in locks:
+            labels = _labels(site=site)
+            cumulative = 0
+            for bound, n in zip(LOCK_BUCKETS, wait):
+                cumulative += n
+                out.append(f'pos_db_lock_wait_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            out.append(f'pos_db_lock_wait_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            out.append(f"pos_db_lock_wait_seconds_sum{{{labels}}} {wait_sum}")
+            out.append(f"pos_db_lock_wait_seconds_count{{{labels}}} {count}")
+        header("pos_db_lock_retries_total", "counter", "Reintentos por base bloqueada.")
+        for site, _, _, _, retries, _ in locks:
+            out.append(f"pos_db_lock_retries_total{{{_labels(site=site)}}} {retries}")
+        header("pos_db_lock_failures_total", "counter", "Transacciones que no obtuvieron el candado tras los reintentos.")
+        for site, _, _, _, _, failures in locks:
+            out.append(f"pos_db_lock_failures_total{{{_labels(site=site)}}} {failures}")
+        return "\n".join(out) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+registry = MetricsRegistry()
+
+
+class _QueryCounter:
+    """execute_wrapper que cuenta consultas y tiempo SQL del request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED_VIEW
+    return match.url_name or match.route or match.view_name
+
+
+def _counting_queries(counter):
+    stack = ExitStack()
+    for conn in connections.all():
+        stack.enter_context(conn.execute_wrapper(counter))
+    return stack
+
+
+def _counted_stream(content, counter, finish):
+    """Itera el stream contando bytes y consultas; registra al terminar."""
+    size, chunks, done = 0, iter(content), object()
+    try:
+        while True:
+            with _counting_queries(counter):
+                chunk = next(chunks, done)
+            if chunk is done:
+                break
+            size += len(chunk)
+            yield chunk
+    finally:
+        finish(size)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        with _counting_queries(counter):
+            response = self.get_response(request)
+
+        view, method, status = _view_name(request), request.method, response.status_code
+
+        def finish(size):
+            registry.record(view, method, status, time.perf_counter() - start, counter.count, counter.seconds, size)
+
+        if response.streaming and (isinstance(response, FileResponse) or getattr(response, "is_async", False)):
+            # Archivos (boletas PDF, xlsx): se dejan intactos para que el servidor
+            # use sendfile/wsgi.file_wrapper; los bytes salen de Content-Length.
+            # Un stream asíncrono tampoco se envuelve (no es iterable con iter()).
+            finish(int(response.get("Content-Length") or 0))
+        elif response.streaming:
+            # Exportación CSV: las consultas y los bytes ocurren mientras se
+            # envía el stream, así que la serie se registra al terminar.
+            response.streaming_content = _counted_stream(response.streaming_content, counter, finish)
+        else:
+            finish(len(response.content))
+        return response
+
+
+class _MetricsAccess(permissions.BasePermission):
+    """Dueño/admin autenticado, o el header X-Metrics-Token si METRICS_TOKEN está configurado."""
+
+    def has_permission(self, request, view):
+        token = getattr(settings, "METRICS_TOKEN", None)
+        sent = request.META.get("HTTP_X_METRICS_TOKEN")
+        if token and sent and hmac.compare_digest(token, sent):
+            return True
+        return IsOwnerOrAdmin().has_permission(request, view)
+
+
+class MetricsView(views.APIView):
+    permission_classes = [_MetricsAccess]
+    max_queries = 1  # solo el usuario; con X-Metrics-Token, ninguna
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
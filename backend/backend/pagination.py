@@ -0,0 +1,25 @@
+"""Paginación por cursor (keyset) compartida por los listados de la API."""
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Pagina con WHERE sobre la columna de orden en vez de OFFSET, así el costo
+    de una página no crece con el historial. El tamaño lo acota el servidor.
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-id",)
+
+
+class CreatedAtPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class AuditLogPagination(KeysetPagination):
+    ordering = ("-ts", "-id")
+
+
+class CashSessionPagination(KeysetPagination):
+    ordering = ("-opened_at", "-id")
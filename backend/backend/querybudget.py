@@ -0,0 +1,129 @@
+"""
+Presupuesto de consultas por vista.
+
+Una vista declara cuántas consultas SQL puede hacer por request:
+
+    class SaleViewSet(viewsets.ModelViewSet):
+        max_queries = {"list": 5, "retrieve": 5}   # por acción
+
+    class SalePreviewView(views.APIView):
+        max_queries = 3                             # para todos sus métodos
+
+    @query_budget(4)
+    @decorators.action(detail=True, methods=["post"])
+    def void(self, request, pk=None): ...
+
+QueryBudgetMiddleware lo verifica con DEBUG activo (o QUERY_BUDGET_ENFORCE):
+según QUERY_BUDGET_MODE registra un warning ("log") o levanta
+QueryBudgetExceeded ("raise"), indicando las consultas repetidas agrupadas por
+huella. QueryBudgetClient siempre levanta, para usarlo en los tests. Las
+consultas que se hacen mientras se envía un stream no se cuentan.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.test import APIClient
+
+logger = logging.getLogger(__name__)
+
+ENFORCE_KEY = "querybudget.raise"
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_RE = re.compile(r"\bIN \((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries):
+    """Fija el presupuesto de un método de vista o una acción de viewset."""
+    def decorator(func):
+        func.max_queries = max_queries
+        return func
+    return decorator
+
+
+def fingerprint(sql):
+    """SQL sin literales ni listas IN, para agrupar consultas repetidas."""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _SPACE_RE.sub(" ", sql)
+    return _IN_RE.sub("IN (...)", sql).strip()
+
+
+def _view_budget(view_func, method):
+    """(presupuesto, etiqueta) de la vista resuelta, o (None, None)."""
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if cls is None:
+        return getattr(view_func, "max_queries", None), getattr(view_func, "__name__", "view")
+    actions = getattr(view_func, "actions", None)
+    handler_name = actions.get(method.lower()) if actions else method.lower()
+    budget = getattr(getattr(cls, handler_name, None), "max_queries", None)
+    if budget is None:
+        declared = getattr(cls, "max_queries", None)
+        budget = declared.get(handler_name) if isinstance(declared, dict) else declared
+    return budget, f"{cls.__name__}.{handler_name}"
+
+
+class _SQLCollector:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+
+def report(label, budget, statements, top=5):
+    repeated = [(n, fp) for fp, n in Counter(map(fingerprint, statements)).most_common(top) if n > 1]
+    lines = [f"{label}: {len(statements)} consultas (presupuesto {budget})."]
+    if repeated:
+        lines.append("Repetidas:")
+        lines.extend(f"  {n}x {fp}" for n, fp in repeated)
+    return "\n".join(lines)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _enabled(self, request):
+        return request.META.get(ENFORCE_KEY) or settings.DEBUG or getattr(settings, "QUERY_BUDGET_ENFORCE", False)
+
+    def __call__(self, request):
+        if not self._enabled(request):
+            return self.get_response(request)
+        collector = _SQLCollector()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(collector))
+            response = self.get_response(request)
+
+        budget, label = getattr(request, "_query_budget", (None, None))
+        if budget is None:
+            return response
+        response["X-Query-Budget"] = f"{len(collector.statements)}/{budget}"
+        if len(collector.statements) > budget:
+            message = report(label, budget, collector.statements)
+            if request.META.get(ENFORCE_KEY) or getattr(settings, "QUERY_BUDGET_MODE", "log") == "raise":
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self._enabled(request):
+            request._query_budget = _view_budget(view_func, request.method)
+
+
+class QueryBudgetClient(APIClient):
+    """APIClient que levanta QueryBudgetExceeded si una vista supera su presupuesto."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.defaults[ENFORCE_KEY] = True
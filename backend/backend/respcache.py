@@ -0,0 +1,145 @@
+"""
+Caché de respuestas de lectura sobre el framework de caché de Django.
+
+Cada entrada guarda (versión, payload), donde la versión son los contadores de
+cambios de las tablas de las que depende (sync.services.mark_changed). Toda
+escritura (register_movements, save/delete de Product desde la API o el admin)
+sube el contador, así que una entrada vieja se detecta con la misma consulta
+que usa el ETag, sin borrar claves a mano y también entre procesos si el
+backend de caché es compartido (FileBasedCache).
+
+Stale-while-revalidate: si la entrada ya no es la vigente se sirve igual y
+se reconstruye en segundo plano, aunque tenga minutos, así el polling del
+dashboard nunca espera una reconstrucción en frío. El tope duro es
+RESPONSE_CACHE_MAX_STALE_SECONDS sobre la edad de la entrada (no la de la
+última escritura): una entrada más vieja, p. ej. tras horas sin consultas, se
+reconstruye en el request, así lo servido nunca tiene más de ese tope. lookup()
+devuelve además los contadores de la versión servida, para que el ETag sea el
+de esa versión (ver ConditionalGetMixin.serve_version).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from rest_framework import permissions, response, views
+
+from accounts.permissions import IsOwnerOrAdmin
+from sync.services import table_counter, table_state
+
+from .routers import primary_reads
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="respcache")
+_registry = {}
+
+HIT, MISS, STALE = "HIT", "MISS", "STALE"
+
+
+class ResponseCache:
+    """
+    name: prefijo de la clave. models: tablas de las que depende el payload.
+    build: función sin argumentos que arma el payload (serializable).
+    scope: opcional, valor que también forma parte de la versión (p. ej. el día
+    local, si el payload depende de la fecha).
+    """
+
+    def __init__(self, name, models, build, scope=None):
+        self.name = name
+        self.models = tuple(models)
+        self.build = build
+        self.scope = scope
+        self.key = f"respcache:{name}"
+        self._names = {table_counter(model) for model in self.models}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "rebuilds": 0, "errors": 0}
+        _registry[name] = self
+
+    def _cache(self):
+        return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _version(self, state):
+        version = tuple(state.get(table_counter(model), (0, None))[0] for model in self.models)
+        return version + (self.scope(),) if self.scope else version
+
+    def _served_state(self, state):
+        return {name: value for name, value in state.items() if name in self._names}
+
+    def _rebuild(self, state):
+        payload = self.build()
+        served = self._served_state(state)
+        self._cache().set(self.key, (self._version(state), payload, time.time(), served), timeout=None)
+        self._count("rebuilds")
+        return payload, served
+
+    def _revalidate(self):
+        try:
+            with primary_reads():
+                self._rebuild(table_state(self.models))
+        except Exception:
+            self._count("errors")
+        finally:
+            self._cache().delete(f"{self.key}:rebuilding")
+            connections.close_all()  # conexión propia del hilo
+
+    def lookup(self, state=None):
+        """
+        Devuelve (payload, resultado, contadores) con resultado HIT, MISS o
+        STALE; contadores: el table_state de la versión servida.
+        `state` es el table_state ya leído (p. ej. por ConditionalGetMixin).
+        La versión y el payload salen del primario, aunque el request lea de la réplica.
+        """
+        with primary_reads():
+            if state is None:
+                state = table_state(self.models)
+            entry = self._cache().get(self.key)
+            if entry is not None and len(entry) == 4:  # otro formato: se reconstruye
+                version, payload, built_at, served = entry
+                if version == self._version(state):
+                    self._count("hits")
+                    return payload, HIT, served
+
+                max_stale = getattr(settings, "RESPONSE_CACHE_MAX_STALE_SECONDS", 0)
+                if max_stale > 0 and time.time() - built_at <= max_stale:
+                    # Una sola reconstrucción en curso por clave.
+                    if self._cache().add(f"{self.key}:rebuilding", 1, timeout=60):
+                        _executor.submit(self._revalidate)
+                    self._count("stale")
+                    return payload, STALE, served
+
+            self._count("misses")
+            payload, served = self._rebuild(state)
+            return payload, MISS, served
+
+    def get(self, state=None):
+        """(payload, resultado) de lookup()."""
+        payload, result, _ = self.lookup(state)
+        return payload, result
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+        lookups = data["hits"] + data["misses"] + data["stale"]
+        # Lo servido vencido no cuenta como acierto: se informa aparte.
+        data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else None
+        data["stale_ratio"] = round(data["stale"] / lookups, 4) if lookups else None
+        return data
+
+    def clear(self):
+        self._cache().delete_many([self.key, f"{self.key}:rebuilding"])
+
+
+def stats():
+    return {name: cache.stats() for name, cache in sorted(_registry.items())}
+
+
+class ResponseCacheStatsView(views.APIView):
+    permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+
+    def get(self, request):
+        return response.Response(stats())
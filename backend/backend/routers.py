@@ -0,0 +1,156 @@
+"""
+Lecturas de reportes, exportación y auditoría desde una réplica de solo lectura.
+
+Con REPLICA_DB_ALIAS configurado, ReplicaMiddleware activa la réplica para los
+GET/HEAD de las vistas marcadas con `read_replica = True` y de los listados
+del admin; el resto del sistema (la caja, el catálogo) sigue leyendo del
+primario. La réplica la mantiene al día el comando refresh_replica.
+
+Lectura de lo propio: un cliente (token o sesión) que acaba de escribir lee
+del primario durante REPLICA_PIN_SECONDS, y si el mismo request escribe algo,
+sus lecturas siguientes también vuelven al primario. El pin se guarda en la
+caché REPLICA_PIN_CACHE_ALIAS, compartida entre workers: el GET que sigue a
+una venta puede caer en otro proceso.
+"""
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Usuarios y sesiones siempre del primario: la autenticación del request no
+# puede depender de que la réplica ya tenga el usuario o la sesión recién creados.
+PRIMARY_ONLY_APPS = {"accounts", "auth", "sessions", "contenttypes", "token_blacklist"}
+
+
+class _RouteState:
+    __slots__ = ("alias", "wrote")
+
+    def __init__(self):
+        self.alias = None
+        self.wrote = False
+
+
+_state = ContextVar("replica_route", default=None)
+
+
+def replica_alias():
+    alias = getattr(settings, "REPLICA_DB_ALIAS", None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+@contextmanager
+def primary_reads():
+    """Dentro del bloque todo se lee del primario, aunque el request use la réplica."""
+    token = _state.set(None)
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.alias or state.wrote or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        # Explícito: un objeto leído de la réplica se guarda igual en el primario.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica es una copia del primario, no se migra por separado.
+        if db == replica_alias():
+            return False
+        return None
+
+
+class _Pins:
+    """Clientes que escribieron hace poco: una clave por cliente que vence sola."""
+
+    prefix = "replica-pin:"
+
+    def _cache(self):
+        return caches[getattr(settings, "REPLICA_PIN_CACHE_ALIAS", "default")]
+
+    def pin(self, key, seconds):
+        self._cache().set(self.prefix + key, 1, timeout=seconds)
+
+    def is_pinned(self, key):
+        return self._cache().get(self.prefix + key) is not None
+
+
+pins = _Pins()
+
+
+def _client_key(request):
+    raw = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not raw:
+        return None
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _reads_replica(request, view_func):
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if getattr(cls, "read_replica", False):
+        return True
+    match = request.resolver_match
+    return match is not None and match.namespace == "admin" and (match.url_name or "").endswith("_changelist")
+
+
+def _routed_stream(content, state):
+    """Las consultas que corren mientras se envía un stream (exportación) usan la misma ruta."""
+    chunks, done = iter(content), object()
+    while True:
+        token = _state.set(state)
+        try:
+            chunk = next(chunks, done)
+        finally:
+            _state.reset(token)
+        if chunk is done:
+            break
+        yield chunk
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RouteState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if replica_alias() and (request.method not in SAFE_METHODS or state.wrote):
+            key = _client_key(request)
+            if key:
+                pins.pin(key, getattr(settings, "REPLICA_PIN_SECONDS", 60))
+        # Un stream asíncrono no se puede recorrer con next(); queda como está.
+        if state.alias and response.streaming and not getattr(response, "is_async", False):
+            response.streaming_content = _routed_stream(response.streaming_content, state)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        alias = replica_alias()
+        if not alias or request.method not in SAFE_METHODS or not _reads_replica(request, view_func):
+            return None
+        key = _client_key(request)
+        if key is None or not pins.is_pinned(key):
+            _state.get().alias = alias
+        return None
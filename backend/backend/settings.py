@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +51,8 @@ INSTALLED_APPS = [
     "audit",
     "cashdesk",
     "dte",
+    "sync",
+    "backend.apps.BackendConfig",
 ]
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
@@ -64,6 +67,9 @@ SPECTACULAR_SETTINGS = {
 }
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
+    'backend.querybudget.QueryBudgetMiddleware',
+    'backend.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -99,6 +105,11 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Perfil de la base (variable POS_DB_PROFILE): "production" deja a SQLite listo
+# para varias cajas a la vez (ver backend/sqlite.py): WAL, pragmas por
+# conexión y conexiones persistentes. "dev" usa los valores por defecto.
+DB_PROFILE = os.environ.get('POS_DB_PROFILE', 'dev')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -106,6 +117,46 @@ DATABASES = {
     }
 }
 
+SQLITE_PRAGMAS = {}
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',      # con WAL no corrompe; puede perder el último commit ante un corte de luz
+        'busy_timeout': 5000,         # ms esperando el candado antes de "database is locked"
+        'mmap_size': 268435456,       # 256 MB
+        'cache_size': -32000,         # en KiB (negativo): ~32 MB por conexión
+        'temp_store': 'MEMORY',
+    }
+
+# Reintentos de BEGIN IMMEDIATE cuando la base sigue bloqueada tras busy_timeout
+# (backoff exponencial en segundos, con jitter)
+SQLITE_LOCK_RETRIES = 4
+SQLITE_LOCK_BACKOFF = 0.05
+SQLITE_LOCK_BACKOFF_MAX = 1.0
+
+# Réplica de solo lectura para reportes, exportación, auditoría y listados del
+# admin (backend/routers.py). POS_REPLICA_DB es la ruta del archivo que mantiene
+# el comando refresh_replica; sin ella todo se lee del primario.
+REPLICA_DB_ALIAS = None
+if os.environ.get('POS_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['POS_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DB_ALIAS = 'replica'
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+# Segundos entre copias de refresh_replica --loop, y cuánto lee del primario un
+# cliente después de escribir (debe cubrir al menos una copia). El pin va en una
+# caché compartida por todos los workers (ver CACHES más abajo).
+REPLICA_REFRESH_INTERVAL = 30
+REPLICA_PIN_SECONDS = 60
+REPLICA_PIN_CACHE_ALIAS = 'shared'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,6 +187,9 @@ LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
 
+# Zona horaria de la tienda: define el "día" de los reportes y resúmenes.
+STORE_TIME_ZONE = 'America/Santiago'
+
 USE_I18N = True
 
 USE_TZ = True
@@ -146,7 +200,95 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Archivo mensual de bitácora (comando archive_audit)
+AUDIT_RETENTION_DAYS = 180
+AUDIT_ARCHIVE_DIR = BASE_DIR / 'var' / 'audit_archive'
+
+# Métricas por endpoint (/api/metrics/): máximo de series en memoria y token
+# opcional para el scraper (header X-Metrics-Token)
+METRICS_MAX_SERIES = 500
+METRICS_TOKEN = None
+
+# Presupuesto de consultas por vista (backend/querybudget.py): se verifica con
+# DEBUG o QUERY_BUDGET_ENFORCE; "log" registra un warning, "raise" levanta error
+QUERY_BUDGET_ENFORCE = False
+QUERY_BUDGET_MODE = 'log'
+
+# Carga masiva de ventas offline (/api/sales/bulk/): máximo por request y
+# ventas por transacción
+SALES_BULK_MAX = 1000
+SALES_BULK_CHUNK = 200
+
+# Sincronización incremental del catálogo (/api/sync/): filas máximas por tabla
+SYNC_PAGE_SIZE = 2000
+
+# Caché de respuestas de stock y reporte de inventario (backend/respcache.py).
+# Con varios workers conviene FileBasedCache para compartirla. Una entrada
+# desactualizada se sirve mientras se reconstruye en segundo plano, salvo que se
+# haya armado hace más de MAX_STALE_SECONDS (0 = nunca servir desactualizado).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pos-default',
+    },
+    # Visible para todos los procesos de la máquina (pines de la réplica)
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache',
+    },
+}
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_MAX_STALE_SECONDS = 300
+
+# Sugerencias de reposición (inventory/reorder.py, comando update_sales_velocity):
+# peso de cada día nuevo en el promedio exponencial por día de semana, días
+# proyectados, días de venta que cubre la cantidad sugerida y aviso anticipado
+# ("pronto") cuando se llegará al mínimo en esa cantidad de días
+REORDER_EWMA_ALPHA = 0.3
+REORDER_HORIZON_DAYS = 60
+REORDER_COVER_DAYS = 14
+REORDER_LEAD_DAYS = 3
+
+# Eventos en vivo por SSE (backend/events.py; el stream corre en su propio
+# proceso ASGI, backend/events_asgi.py): eventos que se guardan en LiveEvent
+# para reanudar con Last-Event-ID, segundos entre lecturas de la tabla,
+# pendientes máximos por cliente antes de pedirle recargar, segundos entre
+# keepalive, vigencia del ticket de conexión y espera sugerida al navegador
+# antes de reconectar (ms)
+EVENTS_BUFFER_SIZE = 1000
+EVENTS_POLL_SECONDS = 0.5
+EVENTS_QUEUE_SIZE = 500
+EVENTS_KEEPALIVE_SECONDS = 15
+EVENTS_TICKET_MAX_AGE = 60
+EVENTS_RETRY_MS = 3000
+
+# Caché de la sesión de caja abierta (cashdesk/services.py), en segundos
+CASH_SESSION_CACHE_TTL = 5
+
+# Outbox de emisión de DTE (comando process_dte_outbox, ver dte/outbox.py)
+DTE_EMITTER = 'dte.emitters.LocalStubEmitter'
+DTE_BATCH_SIZE = 100
+DTE_MAX_ATTEMPTS = 8
+DTE_RETRY_BASE_SECONDS = 30
+DTE_RETRY_MAX_SECONDS = 3600
+
+# Boletas PDF ya renderizadas (ver dte/boleta_cache.py)
+BOLETA_CACHE_DIR = BASE_DIR / 'var' / 'boletas'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Índice de promociones en memoria: segundos antes de reconstruirlo aunque no
+# haya llegado ninguna señal (otros procesos/workers pueden haberlas editado).
+PROMO_INDEX_TTL = 60
+
+# Máximo de resultados por búsqueda de productos (typeahead del POS).
+PRODUCT_SEARCH_LIMIT = 20
+
+# Entradas de la caché LRU de escaneo por código (catalog/barcode.py) y
+# segundos que vive cada una: acota lo que otro worker sirve desactualizado
+# (la invalidación por signals solo alcanza al proceso que escribió)
+BARCODE_CACHE_SIZE = 4096
+BARCODE_CACHE_TTL = 5
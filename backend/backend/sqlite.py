@@ -0,0 +1,189 @@
+"""
+Ajustes de SQLite para varias cajas escribiendo sobre el mismo archivo.
+
+- configure_connection (señal connection_created): aplica SQLITE_PRAGMAS a
+  cada conexión nueva (WAL, synchronous, busy_timeout, mmap, caché); las de la
+  réplica (backend/routers.py) quedan además en query_only.
+- immediate_atomic: como transaction.atomic, pero el bloque más externo abre
+  con BEGIN IMMEDIATE. El candado de escritura se toma al empezar y no a mitad
+  de la transacción, donde SQLite no puede esperar y falla de inmediato con
+  "database is locked". Si el BEGIN agota busy_timeout se reintenta con
+  backoff; todavía no se ejecutó nada, así que reintentar es seguro. El tiempo
+  de espera va a las métricas (pos_db_lock_wait_seconds).
+- commit_scope: trabajo que se junta durante el bloque immediate_atomic más
+  externo y se escribe dentro de la misma transacción justo antes del COMMIT
+  (la bitácora, audit/writer.py).
+- copy_database: copia consistente del primario a la réplica con la API de
+  backup en línea (comando refresh_replica).
+"""
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    # Directo sobre la conexión DB-API: no pasa por los contadores de consultas.
+    for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+    if connection.alias == getattr(settings, "REPLICA_DB_ALIAS", None):
+        connection.connection.execute("PRAGMA query_only = 1")
+
+
+def is_locked_error(exc):
+    return isinstance(exc, OperationalError) and "locked" in str(exc).lower()
+
+
+def backoff_delays():
+    """Esperas entre reintentos: exponencial con jitter, acotada a SQLITE_LOCK_BACKOFF_MAX."""
+    base = getattr(settings, "SQLITE_LOCK_BACKOFF", 0.05)
+    cap = getattr(settings, "SQLITE_LOCK_BACKOFF_MAX", 1.0)
+    for attempt in range(getattr(settings, "SQLITE_LOCK_RETRIES", 4)):
+        yield min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class CommitScope:
+    """Estado del bloque immediate_atomic más externo de una conexión."""
+
+    def __init__(self):
+        self.depth = 0
+        self.data = {}
+        self._hooks = []
+
+    def before_commit(self, func):
+        """func corre dentro de la transacción, justo antes del COMMIT; si falla, se hace rollback."""
+        self._hooks.append(func)
+
+    def run_hooks(self):
+        while self._hooks:
+            self._hooks.pop(0)()
+
+
+_scopes = threading.local()
+
+
+def _scope_map():
+    if not hasattr(_scopes, "by_alias"):
+        _scopes.by_alias = {}
+    return _scopes.by_alias
+
+
+def commit_scope(using=None):
+    """
+    CommitScope del immediate_atomic más externo en curso, o None si no hay
+    uno o si se está dentro de un savepoint (un rollback parcial no deshace lo
+    que se junte en el scope: ahí conviene escribir de inmediato).
+    """
+    alias = using or DEFAULT_DB_ALIAS
+    scope = _scope_map().get(alias)
+    if scope is None or transaction.get_connection(alias).savepoint_ids:
+        return None
+    return scope
+
+
+class ImmediateAtomic(transaction.Atomic):
+    def __init__(self, using, savepoint, durable, label):
+        super().__init__(using, savepoint, durable)
+        self.label = label
+
+    def __enter__(self):
+        connection = transaction.get_connection(self.using)
+        alias = connection.alias
+        scopes = _scope_map()
+        if alias in scopes:
+            scopes[alias].depth += 1
+        elif not connection.in_atomic_block:
+            scopes[alias] = CommitScope()
+            scopes[alias].depth = 1
+        try:
+            return self._enter(connection)
+        except BaseException:
+            self._leave_scope(alias)
+            raise
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        connection = transaction.get_connection(self.using)
+        scope = _scope_map().get(connection.alias)
+        try:
+            if scope is not None and scope.depth == 1 and exc_type is None and not connection.needs_rollback:
+                try:
+                    scope.run_hooks()
+                except BaseException as exc:
+                    super().__exit__(type(exc), exc, exc.__traceback__)
+                    raise
+            return super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            self._leave_scope(connection.alias)
+
+    def _leave_scope(self, alias):
+        scopes = _scope_map()
+        if alias in scopes:
+            scopes[alias].depth -= 1
+            if scopes[alias].depth == 0:
+                del scopes[alias]
+
+    def _enter(self, connection):
+        if connection.vendor != "sqlite" or connection.in_atomic_block:
+            return super().__enter__()
+        connection.ensure_connection()  # transaction_mode se fija al conectar
+        previous = connection.transaction_mode
+        connection.transaction_mode = "IMMEDIATE"
+        start, retries = time.perf_counter(), 0
+        delays = backoff_delays()
+        try:
+            while True:
+                try:
+                    result = super().__enter__()
+                    break
+                except OperationalError as exc:
+                    delay = next(delays, None) if is_locked_error(exc) else None
+                    if delay is None:
+                        registry.record_lock_wait(self.label, time.perf_counter() - start, retries, failed=True)
+                        raise
+                    retries += 1
+                    logger.info("%s: base bloqueada, reintento %d en %.3fs", self.label, retries, delay)
+                    time.sleep(delay)
+        finally:
+            connection.transaction_mode = previous
+        registry.record_lock_wait(self.label, time.perf_counter() - start, retries)
+        return result
+
+
+def immediate_atomic(using=None, savepoint=True, durable=False, label="write"):
+    """transaction.atomic con BEGIN IMMEDIATE en SQLite; en otros motores es igual a atomic."""
+    if callable(using):
+        return ImmediateAtomic(DEFAULT_DB_ALIAS, savepoint, durable, label)(using)
+    return ImmediateAtomic(using, savepoint, durable, label)
+
+
+def copy_database(source, target, timeout=30.0):
+    """
+    Copia `source` sobre `target` en un solo paso de backup: con WAL la lectura
+    del primario no frena a las cajas, y los lectores de la réplica ven la copia
+    anterior o la nueva, nunca una mezcla. Devuelve los segundos que tomó.
+    """
+    start = time.perf_counter()
+    src = sqlite3.connect(source, timeout=timeout)
+    dst = sqlite3.connect(target, timeout=timeout)
+    try:
+        src.execute("PRAGMA query_only = 1")
+        if dst.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+            # Réplica nueva: mismo tamaño de página que el primario (requisito
+            # del backup hacia WAL) y WAL, para que los reportes no la bloqueen.
+            dst.execute(f"PRAGMA page_size = {src.execute('PRAGMA page_size').fetchone()[0]}")
+            dst.execute("PRAGMA journal_mode = WAL")
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return time.perf_counter() - start
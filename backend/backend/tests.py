@@ -0,0 +1,280 @@
+import asyncio
+import os
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from catalog.models import Product
+from inventory.services import register_movements, stock_cache
+from sync.models import LiveEvent
+
+from . import events
+
+from .metrics import registry
+from .querybudget import QueryBudgetClient
+from .routers import ReplicaMiddleware, ReplicaRouter
+from .sqlite import immediate_atomic
+
+
+class MetricsViewTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.client = QueryBudgetClient()
+
+    def login(self, role):
+        user = User.objects.create_user(role.lower(), password="x", role=role)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def test_owner_reads_metrics_within_budget(self):
+        self.login(User.OWNER)
+        self.client.get("/api/auth/me/")
+        r = self.client.get("/api/metrics/")
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("pos_http_requests_total", r.content.decode())
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_scraper_token_needs_no_user(self):
+        r = self.client.get("/api/metrics/", HTTP_X_METRICS_TOKEN="s3cret")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["X-Query-Budget"], "0/1")
+        self.assertEqual(self.client.get("/api/metrics/", HTTP_X_METRICS_TOKEN="otro").status_code, 401)
+
+
+@override_settings(RESPONSE_CACHE_MAX_STALE_SECONDS=300)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        stock_cache.clear()
+        stock_cache._stats.update(dict.fromkeys(stock_cache._stats, 0))
+        submit = mock.patch("backend.respcache._executor.submit")  # sin hilo de reconstrucción
+        self.submit = submit.start()
+        self.addCleanup(submit.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("bodega", password="x", role=User.OWNER))
+        self.product = Product.objects.create(code="C1", name="Gin", price=Decimal("9000"), stock=5)
+
+    def stock(self, **headers):
+        return self.client.get("/api/inventory/stock/", **headers)
+
+    def sell_one(self):
+        register_movements([(self.product.id, 1)], "OUT", reason="venta")
+
+    def test_stale_entry_keeps_the_etag_of_the_version_served(self):
+        first = self.stock()
+        self.assertEqual(first["X-Response-Cache"], "MISS")
+        self.sell_one()
+        stale = self.stock()
+        self.assertEqual(stale["X-Response-Cache"], "STALE")
+        self.assertEqual(stale.data[0]["stock"], 5)
+        self.assertEqual(stale["ETag"], first["ETag"])
+        self.submit.assert_called_once()
+        # El cliente ya tiene esa versión: 304 mientras se reconstruye.
+        self.assertEqual(self.stock(HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+    def test_old_entries_are_served_stale_up_to_the_hard_max_age(self):
+        self.stock()
+        self.sell_one()
+        with mock.patch("backend.respcache.time.time", return_value=time.time() + 120):
+            self.assertEqual(self.stock()["X-Response-Cache"], "STALE")  # sin esperar la reconstrucción
+        self.sell_one()
+        with mock.patch("backend.respcache.time.time", return_value=time.time() + 301):
+            r = self.stock()  # la entrada pasó el tope: se reconstruye en el request
+        self.assertEqual(r["X-Response-Cache"], "MISS")
+        self.assertEqual(r.data[0]["stock"], 3)
+
+    def test_stale_is_not_counted_as_hit(self):
+        self.stock()
+        self.stock()
+        self.sell_one()
+        self.stock()
+        stats = stock_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stale"]), (1, 1, 1))
+        self.assertEqual((stats["hit_ratio"], stats["stale_ratio"]), (0.3333, 0.3333))
+
+
+class _ReportView:
+    read_replica = True
+
+
+class ReplicaPinTests(SimpleTestCase):
+    """El pin de lectura de lo propio vive en la caché compartida, no en el proceso."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        shared = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tmp.name}
+        caches_override = override_settings(CACHES={"default": shared, "shared": shared}, REPLICA_PIN_CACHE_ALIAS="shared")
+        caches_override.enable()
+        self.addCleanup(caches_override.disable)
+        replica = mock.patch("backend.routers.replica_alias", return_value="replica")
+        replica.start()
+        self.addCleanup(replica.stop)
+
+    def read_alias(self, request):
+        """Pasa el request por un ReplicaMiddleware nuevo (como otro worker); alias de lectura de la vista."""
+        seen = {}
+
+        def view(request):
+            seen["alias"] = ReplicaRouter().db_for_read(Product)
+            if request.method == "POST":
+                ReplicaRouter().db_for_write(Product)
+            return HttpResponse()
+        view.cls = _ReportView
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+        middleware = ReplicaMiddleware(get_response)
+        middleware(request)
+        return seen["alias"]
+
+    def request(self, method, token):
+        return getattr(RequestFactory(), method)("/api/reports/sales/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_write_pins_the_client_to_the_primary_in_every_worker(self):
+        self.assertEqual(self.read_alias(self.request("get", "a")), "replica")
+        self.read_alias(self.request("post", "a"))
+        self.assertTrue(os.listdir(self.cache_dir))  # en disco, visible para otros procesos
+        self.assertIsNone(self.read_alias(self.request("get", "a")))
+        self.assertEqual(self.read_alias(self.request("get", "b")), "replica")
+
+    def test_pin_expires(self):
+        with override_settings(REPLICA_PIN_SECONDS=0.05):
+            self.read_alias(self.request("post", "a"))
+        time.sleep(0.1)
+        self.assertEqual(self.read_alias(self.request("get", "a")), "replica")
+
+
+class EventWriteTests(TransactionTestCase):
+    """Los eventos pasan por la base: los publica cualquier proceso que confirme."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("caja", password="x", role=User.OWNER))
+        self.product = Product.objects.create(code="E1", name="Pisco", price=Decimal("1000"), stock=3)
+
+    def test_checkout_writes_its_events_before_commit(self):
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.post("/api/sales/", {
+                "payment_method": "CASH", "items": [{"product": self.product.id, "qty": 3, "unit_price": "1000"}],
+            }, format="json")
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        inserts = [i for i, sql in enumerate(sqls) if sql.startswith('INSERT INTO "sync_liveevent"')]
+        # stock.level sale de un savepoint y se escribe en el momento; sale.checkout, antes del COMMIT.
+        self.assertEqual(len(inserts), 2)
+        self.assertLess(max(inserts), max(i for i, sql in enumerate(sqls) if sql == "COMMIT"))
+        self.assertEqual(list(LiveEvent.objects.values_list("type", flat=True)), ["stock.level", "sale.checkout"])
+        self.assertEqual(LiveEvent.objects.get(type="sale.checkout").data["id"], r.data["id"])
+
+    def test_rolled_back_events_are_never_published(self):
+        with self.assertRaises(RuntimeError):
+            with immediate_atomic():
+                events.emit("sale.void", {"id": 1})
+                raise RuntimeError
+        self.assertFalse(LiveEvent.objects.exists())
+
+    def test_outside_a_transaction_the_event_is_written_at_once(self):
+        # Como un comando o el admin en otro proceso.
+        events.emit("cash.open", {"id": 7})
+        self.assertEqual(LiveEvent.objects.get().data, {"id": 7})
+
+
+class BroadcasterTests(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.broadcaster = events.Broadcaster(tail=False)
+
+    def received(self, subscriber):
+        self.loop.run_until_complete(asyncio.sleep(0))  # entrega lo encolado con call_soon_threadsafe
+        chunks = []
+        while not subscriber.queue.empty():
+            chunks.append(subscriber.queue.get_nowait())
+        return chunks
+
+    def ids(self, chunks):
+        return [chunk.decode().split("\n")[0] for chunk in chunks]
+
+    def test_new_client_gets_ready_then_new_events_in_order(self):
+        events.emit("cash.open", {"id": 1})
+        subscriber, first = self.broadcaster.subscribe(self.loop)
+        start = LiveEvent.objects.get().id
+        self.assertEqual(first, [events._format(start, "ready", {})])
+        events.emit("sale.checkout", {"id": 10})
+        events.emit("sale.void", {"id": 10})
+        self.assertEqual(self.broadcaster.poll(), 2)
+        self.assertEqual(self.ids(self.received(subscriber)), [f"id: {start + 1}", f"id: {start + 2}"])
+
+    def test_reconnect_resumes_from_last_event_id(self):
+        self.broadcaster.subscribe(self.loop)
+        for n in range(3):
+            events.emit("sale.checkout", {"id": n})
+        self.broadcaster.poll()
+        first, *rest = LiveEvent.objects.order_by("id").values_list("id", flat=True)
+        _, backlog = self.broadcaster.subscribe(self.loop, str(first))
+        self.assertEqual(self.ids(backlog), [f"id: {n}" for n in rest])
+
+    @override_settings(EVENTS_BUFFER_SIZE=2)
+    def test_reconnect_after_events_were_pruned_gets_reset(self):
+        self.broadcaster.subscribe(self.loop)
+        for n in range(4):
+            events.emit("sale.checkout", {"id": n})
+        self.broadcaster.poll()
+        self.broadcaster.prune()
+        self.assertEqual(LiveEvent.objects.count(), 2)
+        last = LiveEvent.objects.order_by("id").last().id
+        for last_id in (str(last - 3), "arranque-5", str(last + 1)):
+            _, backlog = self.broadcaster.subscribe(self.loop, last_id)
+            self.assertEqual(backlog, [events._format(last, "reset", {})])
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        patcher = mock.patch.object(events, "broadcaster", events.Broadcaster(tail=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call(self, path="/api/events/", query=b""):
+        sent = []
+
+        async def receive():
+            await asyncio.sleep(0)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": []}
+        async_to_sync(events.sse_application)(scope, receive, send)
+        return sent[0]["status"], b"".join(m.get("body", b"") for m in sent[1:])
+
+    def test_ticket_requires_login_and_opens_the_stream(self):
+        client = APIClient()
+        self.assertEqual(client.post("/api/events/ticket/").status_code, 401)
+        client.force_authenticate(self.user)
+        ticket = client.post("/api/events/ticket/").data["ticket"]
+        self.assertEqual(events.check_ticket(ticket), self.user.pk)
+        status, body = self.call(query=f"ticket={ticket}".encode())
+        self.assertEqual(status, 200)
+        self.assertIn(b"event: ready", body)
+
+    def test_rejects_bad_ticket_and_other_paths(self):
+        self.assertEqual(self.call(query=b"ticket=falso")[0], 401)
+        self.assertEqual(self.call(path="/api/sales/")[0], 404)
+
+    @override_settings(EVENTS_TICKET_MAX_AGE=0)
+    def test_expired_ticket_is_rejected(self):
+        ticket = events.make_ticket(self.user)
+        time.sleep(1)
+        self.assertEqual(self.call(query=f"ticket={ticket}".encode())[0], 401)
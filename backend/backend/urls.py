@@ -6,12 +6,16 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from accounts.views import MeView, UserAdminViewSet
 from catalog.views import ProductViewSet, CategoryViewSet
 from sales.views import SaleViewSet, SalePreviewView
-from inventory.views import InventoryMovementViewSet, StockView
+from inventory.views import InventoryMovementViewSet, ReorderView, StockView, StockAsOfView
 from promos.views import PromotionViewSet
-from reports.views import SalesReportView, InventoryReportView, ExportView
-from audit.views import AuditLogViewSet
+from reports.views import AnalyticsView, SalesReportView, InventoryReportView, ExportView
+from audit.views import AuditLogViewSet, AuditArchiveView
 from cashdesk.views import CashSessionViewSet
-from dte.views import DTEViewSet, DTEWebhookSimView, DTEBoletaPDFView
+from backend.events import EventTicketView
+from backend.metrics import MetricsView
+from backend.respcache import ResponseCacheStatsView
+from sync.views import SyncView
+from dte.views import DTEViewSet, DTEWebhookSimView, DTEBoletaPDFView, DTEBoletaCacheStatsView
 
 router = DefaultRouter()
 router.register(r"products", ProductViewSet, basename="products")
@@ -32,11 +36,20 @@ urlpatterns = [
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema")),
     path("api/reports/sales/", SalesReportView.as_view()),
     path("api/reports/inventory/", InventoryReportView.as_view()),
+    path("api/reports/analytics/", AnalyticsView.as_view()),
     path("api/export/", ExportView.as_view()),
     path("api/inventory/stock/", StockView.as_view()), 
+    path("api/inventory/stock/as-of/", StockAsOfView.as_view()),
+    path("api/inventory/reorder/", ReorderView.as_view()),
     path("api/dte/simulate/", DTEWebhookSimView.as_view()),  # simula respuesta del emisor
     path("api/dte/boleta/<int:sale_id>/", DTEBoletaPDFView.as_view(), name="dte-boleta"),
+    path("api/dte/boleta/cache-stats/", DTEBoletaCacheStatsView.as_view()),
     path("api/sales/preview/", SalePreviewView.as_view()),
     path("api/auth/me/", MeView.as_view()),
+    path("api/audit/archive/", AuditArchiveView.as_view()),
+    path("api/metrics/", MetricsView.as_view()),
+    path("api/cache-stats/", ResponseCacheStatsView.as_view()),
+    path("api/sync/", SyncView.as_view()),
+    path("api/events/ticket/", EventTicketView.as_view()),  # el stream se sirve en backend/events_asgi.py
     path("api/", include(router.urls)),
 ]
@@ -1,7 +1,17 @@
 from django.contrib import admin
-from .models import CashSession
+from .models import CashSession, CashSessionTotal
+
+
+class CashSessionTotalInline(admin.TabularInline):
+    model = CashSessionTotal
+    extra = 0
+    readonly_fields = ("payment_method", "sales_count", "sales_total", "void_count", "void_total")
+    can_delete = False
+
 
 @admin.register(CashSession)
 class CashSessionAdmin(admin.ModelAdmin):
     list_display = ("id","status","opened_by","opened_at","closed_by","closed_at","opening_amount","closing_amount","diff")
     list_filter  = ("status",)
+    readonly_fields = ("z_report",)
+    inlines = [CashSessionTotalInline]
@@ -0,0 +1,10 @@
+from backend.filters import DateRangeFilterSet
+from .models import CashSession
+
+
+class CashSessionFilter(DateRangeFilterSet):
+    date_field = "opened_at"
+
+    class Meta:
+        model = CashSession
+        fields = ("status", "opened_by")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cashdesk', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashsession',
+            index=models.Index(fields=['opened_at', 'id'], name='cash_opened_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashsession',
+            index=models.Index(fields=['status', 'opened_at'], name='cash_status_opened_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cashdesk', '0002_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cashsession',
+            name='z_report',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='CashSessionTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_method', models.CharField(max_length=20)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('sales_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('void_count', models.IntegerField(default=0)),
+                ('void_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='totals', to='cashdesk.cashsession')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('session', 'payment_method'), name='cash_total_key')],
+            },
+        ),
+    ]
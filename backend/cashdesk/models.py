@@ -11,9 +11,34 @@ class CashSession(models.Model):
     diff = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     opened_at = models.DateTimeField(auto_now_add=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    z_report = models.JSONField(null=True, blank=True)  # foto congelada al cerrar
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["opened_at", "id"], name="cash_opened_idx"),
+            models.Index(fields=["status", "opened_at"], name="cash_status_opened_idx"),
+        ]
 
     
     @classmethod
     def get_current(cls):
         """Return the most recent open cash session, if any."""
         return cls.objects.filter(status=cls.OPEN).order_by("-opened_at").first()
+
+
+class CashSessionTotal(models.Model):
+    """
+    Contadores en curso de una sesión por medio de pago. Los mantienen
+    checkout_sale/void_sale dentro de su transacción (ver cashdesk/services.py).
+    """
+    session = models.ForeignKey(CashSession, on_delete=models.CASCADE, related_name="totals")
+    payment_method = models.CharField(max_length=20)
+    sales_count = models.IntegerField(default=0)
+    sales_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    void_count = models.IntegerField(default=0)
+    void_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["session", "payment_method"], name="cash_total_key"),
+        ]
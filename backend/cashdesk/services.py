@@ -0,0 +1,196 @@
+# cashdesk/services.py
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from backend.sqlite import immediate_atomic
+from sales.models import Sale
+from .models import CashSession, CashSessionTotal
+
+CASH_METHOD = "CASH"
+
+
+class SessionClosed(Exception):
+    """La sesión de caja se cerró mientras se registraba un lote de ventas."""
+
+
+class CurrentSessionCache:
+    """
+    Id de la sesión de caja abierta, en memoria.
+    Se invalida con las señales de CashSession (ver cashdesk/signals.py) y,
+    entre procesos, pasado CASH_SESSION_CACHE_TTL segundos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry = None  # (loaded_at, session_id)
+
+    def invalidate(self):
+        self._entry = None
+
+    def get(self):
+        ttl = getattr(settings, "CASH_SESSION_CACHE_TTL", 5)
+        entry = self._entry
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        with self._lock:
+            entry = self._entry
+            if entry is None or time.monotonic() - entry[0] >= ttl:
+                current = CashSession.get_current()
+                entry = (time.monotonic(), current.pk if current else None)
+                self._entry = entry
+            return entry[1]
+
+
+current_session = CurrentSessionCache()
+
+
+def _bump(session_id, payment_method, **deltas):
+    """Suma en los contadores de una sesión abierta. False si la sesión ya no está abierta."""
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    key = {"session_id": session_id, "payment_method": payment_method}
+    if CashSessionTotal.objects.filter(**key, session__status=CashSession.OPEN).update(**updates):
+        return True
+    if not CashSession.objects.filter(pk=session_id, status=CashSession.OPEN).exists():
+        return False
+    try:
+        with transaction.atomic():
+            CashSessionTotal.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT.
+        CashSessionTotal.objects.filter(**key).update(**updates)
+    return True
+
+
+def _record(session_id, payment_method, **deltas):
+    """
+    Registra en session_id; si el caché apuntaba a una sesión ya cerrada
+    (cerrada en otro proceso), reintenta con la vigente. Devuelve el id usado.
+    """
+    if session_id is None:
+        return None
+    if _bump(session_id, payment_method, **deltas):
+        return session_id
+    current_session.invalidate()
+    fresh = current_session.get()
+    if fresh is not None and fresh != session_id and _bump(fresh, payment_method, **deltas):
+        return fresh
+    return None
+
+
+def record_checkout(sale):
+    session_id = _record(sale.session_id, sale.payment_method, sales_count=1, sales_total=sale.total or Decimal("0"))
+    if session_id != sale.session_id:
+        sale.session_id = session_id
+        sale.save(update_fields=["session"])
+
+
+def _open_session(session_id):
+    """session_id si sigue abierta; si no (cerrada en otro proceso), la vigente o None."""
+    if session_id is None:
+        return None
+    if CashSession.objects.filter(pk=session_id, status=CashSession.OPEN).exists():
+        return session_id
+    current_session.invalidate()
+    return current_session.get()
+
+
+def record_checkouts(sales):
+    """
+    record_checkout para un lote de ventas de la misma sesión: una actualización
+    por medio de pago. La sesión destino se resuelve una vez y todo el lote se
+    suma en ella; si algún contador no se puede sumar, SessionClosed deshace la
+    transacción del lote.
+    """
+    if not sales:
+        return
+    session_id = sales[0].session_id
+    grouped = {}
+    for sale in sales:
+        count, total = grouped.get(sale.payment_method, (0, Decimal("0")))
+        grouped[sale.payment_method] = (count + 1, total + (sale.total or Decimal("0")))
+    target = _open_session(session_id)
+    if target is not None:
+        for method, (count, total) in grouped.items():
+            if not _bump(target, method, sales_count=count, sales_total=total):
+                raise SessionClosed(target)
+    if target != session_id:
+        # Caché atrasado: el lote queda en la sesión vigente.
+        Sale.objects.filter(pk__in=[s.pk for s in sales]).update(session_id=target)
+        for sale in sales:
+            sale.session_id = target
+
+
+def record_void(sale):
+    # La anulación sale del cajón abierto al momento de anular.
+    _record(current_session.get(), sale.payment_method, void_count=1, void_total=sale.total or Decimal("0"))
+
+
+def _money(value):
+    return str(value if value is not None else Decimal("0"))
+
+
+def running_totals(session):
+    """Contadores de la sesión y efectivo esperado, sin recorrer sus ventas."""
+    rows = list(session.totals.order_by("payment_method"))
+    by_method = [
+        {
+            "payment_method": r.payment_method,
+            "sales_count": r.sales_count,
+            "sales_total": _money(r.sales_total),
+            "void_count": r.void_count,
+            "void_total": _money(r.void_total),
+            "net_total": _money(r.sales_total - r.void_total),
+        }
+        for r in rows
+    ]
+    cash_net = sum((r.sales_total - r.void_total for r in rows if r.payment_method == CASH_METHOD), Decimal("0"))
+    opening = session.opening_amount or Decimal("0")
+    return {
+        "session": session.pk,
+        "opening_amount": _money(opening),
+        "expected_cash": _money(opening + cash_net),
+        "sales_count": sum(r.sales_count for r in rows),
+        "sales_total": _money(sum((r.sales_total for r in rows), Decimal("0"))),
+        "void_count": sum(r.void_count for r in rows),
+        "void_total": _money(sum((r.void_total for r in rows), Decimal("0"))),
+        "net_total": _money(sum((r.sales_total - r.void_total for r in rows), Decimal("0"))),
+        "by_method": by_method,
+    }
+
+
+@immediate_atomic(label="cash.close")
+def close_session(session, closing_amount, user):
+    """
+    Cierra la sesión y congela su reporte Z. diff = contado - efectivo esperado.
+    Con el candado de escritura tomado se relee el estado: si otra caja ya la
+    cerró, SessionClosed y no se toca su cierre.
+    """
+    session = CashSession.objects.select_related("opened_by").get(pk=session.pk)
+    if session.status == CashSession.CLOSED:
+        raise SessionClosed(session.pk)
+    session.status = CashSession.CLOSED
+    session.closed_by = user
+    session.closed_at = timezone.now()
+    session.closing_amount = closing_amount
+    session.save(update_fields=["status", "closed_by", "closed_at", "closing_amount"])
+    # Ya cerrada: ningún checkout posterior suma en estos contadores.
+    report = running_totals(session)
+    expected = Decimal(report["expected_cash"])
+    session.diff = closing_amount - expected
+    report.update({
+        "opened_at": session.opened_at.isoformat(),
+        "closed_at": session.closed_at.isoformat(),
+        "opened_by": session.opened_by.username,
+        "closed_by": user.username,
+        "counted_cash": _money(closing_amount),
+        "diff": _money(session.diff),
+    })
+    session.z_report = report
+    session.save(update_fields=["diff", "z_report"])
+    return session
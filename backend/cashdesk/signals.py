@@ -0,0 +1,26 @@
+# cashdesk/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.events import emit
+
+from .models import CashSession
+from .services import current_session
+
+
+@receiver(post_save, sender=CashSession)
+@receiver(post_delete, sender=CashSession)
+def cash_session_changed(sender, **kwargs):
+    # Igual que el índice de promociones: ya y de nuevo al confirmar.
+    current_session.invalidate()
+    transaction.on_commit(current_session.invalidate)
+
+
+@receiver(post_save, sender=CashSession)
+def cash_session_event(sender, instance, created, update_fields=None, **kwargs):
+    # Apertura y cierre para los clientes en vivo (backend/events.py).
+    if created:
+        emit("cash.open", {"id": instance.pk, "opened_by": instance.opened_by_id, "opened_at": instance.opened_at})
+    elif instance.status == CashSession.CLOSED and update_fields and "status" in update_fields:
+        emit("cash.close", {"id": instance.pk, "closed_by": instance.closed_by_id, "closed_at": instance.closed_at})
@@ -1,3 +1,108 @@
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from backend.sqlite import immediate_atomic
+from catalog.models import Product
+from sales.models import Sale
+
+from . import services
+from .views import CashSessionViewSet
+from .models import CashSession, CashSessionTotal
+
+
+class RecordCheckoutsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        self.old = CashSession.objects.create(opened_by=self.user)
+        services.current_session.invalidate()
+
+    def sales(self, session):
+        return [
+            Sale.objects.create(user=self.user, session=session, payment_method=method, total=Decimal(total))
+            for method, total in (("CASH", "1000"), ("CARD", "2500"), ("CASH", "500"))
+        ]
+
+    def totals(self):
+        return {
+            (t.session_id, t.payment_method): (t.sales_count, t.sales_total)
+            for t in CashSessionTotal.objects.all()
+        }
+
+    def test_batch_is_counted_in_one_session(self):
+        services.record_checkouts(self.sales(self.old))
+        self.assertEqual(self.totals(), {
+            (self.old.pk, "CASH"): (2, Decimal("1500")),
+            (self.old.pk, "CARD"): (1, Decimal("2500")),
+        })
+
+    def test_closed_session_moves_whole_batch_to_current(self):
+        sales = self.sales(self.old)
+        CashSession.objects.filter(pk=self.old.pk).update(status=CashSession.CLOSED)
+        current = CashSession.objects.create(opened_by=self.user)
+        services.record_checkouts(sales)
+        self.assertEqual({key[0] for key in self.totals()}, {current.pk})
+        self.assertEqual(set(Sale.objects.values_list("session_id", flat=True)), {current.pk})
+        self.assertEqual({s.session_id for s in sales}, {current.pk})
+
+    def test_failed_bump_rolls_back_the_batch(self):
+        sales = self.sales(self.old)
+        real_bump = services._bump
+        calls = iter([real_bump, lambda *args, **kwargs: False])
+        with mock.patch.object(services, "_bump", side_effect=lambda *a, **kw: next(calls)(*a, **kw)):
+            with self.assertRaises(services.SessionClosed):
+                with immediate_atomic():
+                    services.record_checkouts(sales)
+        self.assertFalse(CashSessionTotal.objects.exists())
+
+
+class CloseSessionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        self.other = User.objects.create_user("supervisor", password="x", role=User.OWNER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(code="C1", name="Ron", price=Decimal("1000"), stock=50)
+        self.session_id = self.client.post("/api/cash/", {"opening_amount": "10000"}, format="json").data["id"]
+        services.current_session.invalidate()
+
+    def sell(self, qty, method="CASH"):
+        return self.client.post("/api/sales/", {
+            "payment_method": method, "items": [{"product": self.product.id, "qty": qty, "unit_price": "1000"}],
+        }, format="json").data["id"]
+
+    def close(self, amount="11500"):
+        return self.client.post(f"/api/cash/{self.session_id}/close/", {"closing_amount": amount}, format="json")
+
+    def test_close_freezes_z_report_with_totals_and_diff(self):
+        self.sell(2)
+        voided = self.sell(1)
+        self.sell(3, "CARD")
+        self.client.post(f"/api/sales/{voided}/void/", {"reason": "error"}, format="json")
+
+        r = self.close()
+        self.assertEqual(r.status_code, 200, r.data)
+        report = r.data["z_report"]
+        self.assertEqual(Decimal(report["expected_cash"]), Decimal("12000"))  # 10000 + 3000 - 1000
+        self.assertEqual(Decimal(r.data["diff"]), Decimal("-500"))
+        self.assertEqual((report["sales_count"], report["void_count"]), (3, 1))
+        self.assertEqual(Decimal(report["net_total"]), Decimal("5000"))
+        self.assertEqual(report["closed_by"], "caja")
+
+        # Cerrada, totals relee la sesión y devuelve el reporte congelado.
+        self.assertEqual(self.client.get(f"/api/cash/{self.session_id}/totals/").data, report)
+        self.assertEqual(self.close().status_code, 400)
 
-# Create your tests here.
+    def test_concurrent_close_does_not_overwrite_the_first(self):
+        stale = CashSession.objects.get(pk=self.session_id)  # leída antes de que otra caja cierre
+        self.close("10000")
+        self.client.force_authenticate(self.other)
+        with mock.patch.object(CashSessionViewSet, "get_object", return_value=stale):
+            r = self.close("99999")
+        self.assertEqual(r.status_code, 400)
+        session = CashSession.objects.get(pk=self.session_id)
+        self.assertEqual((session.closed_by_id, session.closing_amount), (self.user.pk, Decimal("10000")))
+        self.assertEqual(session.z_report["counted_cash"], "10000")
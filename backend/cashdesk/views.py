@@ -1,13 +1,18 @@
 from rest_framework import viewsets, permissions, decorators, response, status
-from django.utils import timezone
 from decimal import Decimal, InvalidOperation
+from backend.pagination import CashSessionPagination
+from .filters import CashSessionFilter
 from .models import CashSession
+from .services import SessionClosed, close_session, running_totals
 from .serializers import CashSessionSerializer
 
 class CashSessionViewSet(viewsets.ModelViewSet):
-    queryset = CashSession.objects.all().order_by("-opened_at")
+    queryset = CashSession.objects.select_related("opened_by", "closed_by").order_by("-opened_at", "-id")
     serializer_class = CashSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CashSessionPagination
+    filterset_class = CashSessionFilter
+    max_queries = {"list": 2, "retrieve": 2, "totals": 3}
 
     def perform_create(self, serializer):
         # opening_amount debe venir en el serializer
@@ -39,15 +44,24 @@ class CashSessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        cs.closing_amount = closing_amount
-        cs.closed_by = request.user
-        cs.status = "CLOSED"
-        cs.closed_at = timezone.now()
-        cs.diff = (cs.closing_amount or Decimal("0")) - (cs.opening_amount or Decimal("0"))
-
-        cs.save(update_fields=["closing_amount", "closed_by", "status", "closed_at", "diff"])
+        try:
+            cs = close_session(cs, closing_amount, request.user)
+        except SessionClosed:
+            # Otra caja la cerró entre la lectura y el BEGIN IMMEDIATE.
+            return response.Response(
+                {"detail": "La caja ya está cerrada."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         return response.Response(
-            {"status": "CLOSED", "closing_amount": str(cs.closing_amount), "diff": str(cs.diff)},
+            {"status": "CLOSED", "closing_amount": str(cs.closing_amount), "diff": str(cs.diff), "z_report": cs.z_report},
             status=status.HTTP_200_OK,
         )
+
+    @decorators.action(detail=True, methods=["get"])
+    def totals(self, request, pk=None):
+        """Totales en curso de la sesión; si está cerrada, su reporte Z."""
+        cs = self.get_object()
+        if cs.status == CashSession.CLOSED and cs.z_report:
+            return response.Response(cs.z_report)
+        return response.Response(running_totals(cs))
@@ -0,0 +1,118 @@
+# catalog/barcode.py
+"""
+Caché LRU en memoria para el escaneo de códigos (GET /api/products/by-code/<code>/).
+
+Guarda una ficha compacta del producto por código (sin distinguir mayúsculas).
+Se invalida con los signals de Product y desde inventory.services cuando cambia
+el stock; como eso solo alcanza al proceso que escribió, cada ficha además
+vence a los BARCODE_CACHE_TTL segundos (lo que otro worker puede servir atrasado).
+Una lectura que empezó antes de una invalidación no guarda su resultado, así un
+commit concurrente no deja una ficha vieja en caché.
+
+El precio efectivo se calcula en cada lectura con el índice de promociones,
+así los cambios de promos no requieren invalidar esta caché.
+"""
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Product
+
+_FIELDS = ("id", "code", "name", "category_id", "price", "stock", "active")
+
+
+class BarcodeCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # código normalizado -> (vence, ficha)
+        self._keys_by_id = {}
+        self._generation = 0  # sube con cada invalidación
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, code):
+        row = Product.objects.filter(code=code).values(*_FIELDS).first()
+        if row is None:
+            row = Product.objects.filter(code__iexact=code).values(*_FIELDS).first()
+        return row
+
+    def get(self, code):
+        key = code.strip().lower()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self._keys_by_id.pop(entry[1]["id"], None)
+            self.misses += 1
+            generation = self._generation
+        row = self._load(code.strip())
+        if row is None:
+            return None
+        with self._lock:
+            if self._generation != generation:
+                return row  # hubo una invalidación durante la lectura: no se guarda
+            self._entries[key] = (time.monotonic() + self.ttl, row)
+            self._entries.move_to_end(key)
+            self._keys_by_id[row["id"]] = key
+            while len(self._entries) > self.maxsize:
+                _, (_, old) = self._entries.popitem(last=False)
+                self._keys_by_id.pop(old["id"], None)
+        return row
+
+    def invalidate_ids(self, product_ids):
+        with self._lock:
+            self._generation += 1
+            for pid in product_ids:
+                key = self._keys_by_id.pop(pid, None)
+                if key is not None:
+                    self._entries.pop(key, None)
+
+    def invalidate_on_commit(self, product_ids):
+        # Ahora y al confirmar: una lectura concurrente no deja en caché datos previos al commit.
+        product_ids = list(product_ids)
+        self.invalidate_ids(product_ids)
+        transaction.on_commit(lambda: self.invalidate_ids(product_ids))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+barcode_cache = BarcodeCache(getattr(settings, "BARCODE_CACHE_SIZE", 4096), getattr(settings, "BARCODE_CACHE_TTL", 5))
+
+
+def scan_payload(code):
+    """Ficha del producto + precio efectivo con la mejor promoción vigente."""
+    from promos.services import best_unit_discount
+
+    row = barcode_cache.get(code)
+    if row is None:
+        return None
+    price = row["price"]
+    discount = best_unit_discount(SimpleNamespace(pk=row["id"], category_id=row["category_id"]), price)
+    return {
+        "id": row["id"],
+        "code": row["code"],
+        "name": row["name"],
+        "category": row["category_id"],
+        "price": str(price),
+        "discount": str(discount),
+        "effective_price": str(price - discount),
+        "stock": row["stock"],
+        "active": row["active"],
+    }
@@ -0,0 +1,12 @@
+from django_filters import rest_framework as filters
+
+from .models import Product
+
+
+class ProductFilter(filters.FilterSet):
+    # Alertas de stock bajo del dashboard (?stock_lte=10)
+    stock_lte = filters.NumberFilter(field_name="stock", lookup_expr="lte")
+
+    class Meta:
+        model = Product
+        fields = ("category", "active", "top_seller")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from catalog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de productos (FTS5 en SQLite)."
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Índice de búsqueda de productos reconstruido."))
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from catalog.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    with schema_editor.connection.cursor() as cursor:
+        backend.create(cursor)
+    Product = apps.get_model("catalog", "Product")
+    backend.rebuild(Product.objects.using(schema_editor.connection.alias).values_list("id", "code", "name"))
+
+
+def drop_index(apps, schema_editor):
+    from catalog.search import get_backend
+
+    with schema_editor.connection.cursor() as cursor:
+        get_backend(schema_editor.connection).drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0003_alter_product_code"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
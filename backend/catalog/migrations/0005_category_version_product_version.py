@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+def recreate_index(apps, schema_editor):
+    """Rehace la tabla FTS con el id del producto como rowid (ver catalog/search.py)."""
+    from catalog.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+    Product = apps.get_model("catalog", "Product")
+    backend.rebuild(Product.objects.using(schema_editor.connection.alias).values_list("id", "code", "name"))
+
+
+def restore_product_id_column(apps, schema_editor):
+    from catalog.search import FTS_TABLE, normalize
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    Product = apps.get_model("catalog", "Product")
+    rows = Product.objects.using(schema_editor.connection.alias).values_list("id", "code", "name")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "product_id UNINDEXED, code, name, "
+            "prefix='1 2 3 4', tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (product_id, code, name) VALUES (%s, %s, %s)",
+            [(pk, normalize(code), normalize(name)) for pk, code, name in rows],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0005_category_version_product_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_index, restore_product_id_column),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 
 class Category(models.Model):
     name = models.CharField(max_length=80)
+    version = models.BigIntegerField(default=1, db_index=True, editable=False)  # ver sync/services.py
     def __str__(self): return self.name
 
 class Product(models.Model):
@@ -19,4 +20,5 @@ class Product(models.Model):
     critical_stock = models.PositiveIntegerField(default=0)
     active = models.BooleanField(default=True)      # RF-16
     top_seller = models.BooleanField(default=False) 
+    version = models.BigIntegerField(default=1, db_index=True, editable=False)  # ver sync/services.py
     def __str__(self): return f"{self.code} - {self.name}"
@@ -0,0 +1,136 @@
+# catalog/search.py
+"""
+Búsqueda de productos para el POS (typeahead).
+
+El backend se elige según la base de datos: en SQLite usa una tabla FTS5
+(catalog_product_fts) con nombre y código normalizados (minúsculas, sin
+tildes) e índice de prefijos, y el id del producto como rowid (reindexar o
+quitar un producto es una búsqueda por clave, no un recorrido de la tabla); en otros motores cae a un LIKE acotado. Para
+Postgres basta con agregar otro backend con la misma interfaz (p. ej. pg_trgm).
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = "catalog_product_fts"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    """Minúsculas y sin diacríticos: 'Piscó Añejo' -> 'pisco anejo'."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().strip()
+
+
+def max_results():
+    return getattr(settings, "PRODUCT_SEARCH_LIMIT", 20)
+
+
+class SQLiteFTSBackend:
+    """FTS5: cada término se busca como prefijo ("cerv"* AND "lag"*)."""
+
+    def __init__(self, conn):
+        self.connection = conn
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "code, name, "
+            "prefix='1 2 3 4', tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+    def index(self, product):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, code, name) VALUES (%s, %s, %s)",
+                [product.pk, normalize(product.code), normalize(product.name)],
+            )
+
+    def remove(self, product_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+    def rebuild(self, rows):
+        """rows: iterable de (id, code, name)."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, code, name) VALUES (%s, %s, %s)",
+                [(pk, normalize(code), normalize(name)) for pk, code, name in rows],
+            )
+
+    def search(self, query, limit):
+        norm = normalize(query)
+        tokens = _TOKEN_RE.findall(norm)
+        if not tokens:
+            return []
+        match = " AND ".join(f'"{tok}"*' for tok in tokens)
+        # Primero el código exacto, luego nombres/códigos que empiezan con lo
+        # tipeado, y al final el resto por relevancia (bm25, el código pesa más).
+        sql = (
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            "ORDER BY (code = %s) DESC, (code LIKE %s ESCAPE '\\') DESC, "
+            "(name LIKE %s ESCAPE '\\') DESC, "
+            f"bm25({FTS_TABLE}, 10.0, 1.0) "
+            "LIMIT %s"
+        )
+        prefix = norm.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, [match, norm, prefix, prefix, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+
+class LikeBackend:
+    """Respaldo para motores sin FTS5: LIKE sobre código y nombre, acotado."""
+
+    def __init__(self, conn):
+        self.connection = conn
+
+    def create(self, cursor):
+        pass
+
+    def drop(self, cursor):
+        pass
+
+    def index(self, product):
+        pass
+
+    def remove(self, product_id):
+        pass
+
+    def rebuild(self, rows):
+        pass
+
+    def search(self, query, limit):
+        from .models import Product
+
+        q = (query or "").strip()
+        if not q:
+            return []
+        qs = Product.objects.using(self.connection.alias).filter(Q(code__iexact=q) | Q(code__istartswith=q) | Q(name__icontains=q))
+        return list(qs.order_by("name").values_list("id", flat=True)[:limit])
+
+
+def get_backend(conn=None):
+    conn = conn or connection
+    return SQLiteFTSBackend(conn) if conn.vendor == "sqlite" else LikeBackend(conn)
+
+
+def search_product_ids(query, limit=None):
+    """Ids de producto ordenados por relevancia (máximo PRODUCT_SEARCH_LIMIT)."""
+    limit = min(limit or max_results(), max_results())
+    return get_backend().search(query, limit)
+
+
+def rebuild_index():
+    from .models import Product
+
+    rows = Product.objects.values_list("id", "code", "name").iterator(chunk_size=2000)
+    get_backend().rebuild(rows)
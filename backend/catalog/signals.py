@@ -0,0 +1,22 @@
+# catalog/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .barcode import barcode_cache
+from .models import Product
+from .search import get_backend
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, update_fields=None, **kwargs):
+    barcode_cache.invalidate_on_commit([instance.pk])
+    # Los cambios de stock/precio no tocan el índice de búsqueda.
+    if raw or (update_fields and not {"code", "name"} & set(update_fields)):
+        return
+    get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    barcode_cache.invalidate_on_commit([instance.pk])
+    get_backend().remove(instance.pk)
@@ -1,3 +1,147 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import User
+
+from .barcode import BarcodeCache, barcode_cache
+from .models import Category, Product
+from .search import FTS_TABLE, search_product_ids
+
+
+class CatalogTestCase(TestCase):
+    def setUp(self):
+        barcode_cache.clear()  # es del proceso: no debe arrastrar fichas de otro test
+        self.user = User.objects.create_user("admin", password="x", role=User.OWNER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name="Vinos")
+        self.products = [
+            Product.objects.create(code=f"78000{i}", name=f"Vino {i}", category=self.category,
+                                   price=Decimal("5000"), stock=stock)
+            for i, stock in enumerate((3, 10, 40))
+        ]
+
+
+class ProductFilterTests(CatalogTestCase):
+    def test_stock_lte_lists_only_low_stock(self):
+        r = self.client.get("/api/products/", {"stock_lte": 10, "active": "true"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(sorted(p["stock"] for p in r.data["results"]), [3, 10])
+
+
+class BarcodeCacheTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = BarcodeCache(maxsize=10, ttl=60)
+
+    def test_load_racing_an_invalidation_is_not_stored(self):
+        product = self.products[0]
+        load = self.cache._load
+
+        def racing_load(code):
+            row = load(code)  # lee el stock anterior...
+            Product.objects.filter(pk=product.pk).update(stock=99)
+            self.cache.invalidate_ids([product.pk])  # ...y el commit invalida antes de guardar
+            return row
+
+        self.cache._load = racing_load
+        self.assertEqual(self.cache.get(product.code)["stock"], 3)
+        self.cache._load = load
+        self.assertEqual(self.cache.get(product.code)["stock"], 99)
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_entries_expire_after_ttl(self):
+        product = self.products[0]
+        self.cache.get(product.code)
+        Product.objects.filter(pk=product.pk).update(stock=7)  # escrito por otro proceso: sin invalidación
+        self.assertEqual(self.cache.get(product.code)["stock"], 3)
+        with mock.patch("catalog.barcode.time.monotonic", return_value=10 ** 9):
+            self.assertEqual(self.cache.get(product.code)["stock"], 7)
+
+    def test_by_code_endpoint(self):
+        r = self.client.get(f"/api/products/by-code/{self.products[1].code}/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["stock"], 10)
+
+
+class ConditionalGetTests(CatalogTestCase):
+    def test_unchanged_list_is_not_modified_without_building_the_page(self):
+        first = self.client.get("/api/products/")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("private", first["Cache-Control"])
+        self.assertIn("no-cache", first["Cache-Control"])
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+        self.assertEqual(again.content, b"")
+        self.assertEqual(len(ctx.captured_queries), 1)  # solo los contadores
+        since = self.client.get("/api/products/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+    def test_product_and_category_writes_change_the_etag(self):
+        url = f"/api/products/{self.products[0].id}/"
+        etag = self.client.get(url)["ETag"]
+        self.client.patch(url, {"price": "5500"}, format="json")
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+        # category_name sale de Category: renombrarla también invalida productos.
+        etag = r["ETag"]
+        self.client.patch(f"/api/categories/{self.category.id}/", {"name": "Tintos"}, format="json")
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((r.status_code, r.data["category_name"]), (200, "Tintos"))
+
+    def test_non_conditional_action_has_no_etag(self):
+        r = self.client.get(f"/api/products/by-code/{self.products[0].code}/")
+        self.assertEqual(r.status_code, 200)
+        self.assertFalse(r.has_header("ETag"))
+
+
+class ProductSearchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        for code, name in (("7801", "Ron con pisco"), ("78012", "Pisco Añejo Mistral"),
+                           ("CL1", "Cerveza Lager Austral"), ("CS1", "Cerveza Stout")):
+            Product.objects.create(code=code, name=name, price=Decimal("3000"))
+
+    def names(self, query, **params):
+        r = self.client.get("/api/products/", {"search": query, **params})
+        self.assertEqual(r.status_code, 200)
+        return [p["name"] for p in r.data["results"]]
+
+    def test_prefixes_of_every_term_ignoring_accents_and_case(self):
+        self.assertEqual(self.names("AÑEJO"), ["Pisco Añejo Mistral"])
+        self.assertEqual(self.names("anej mist"), ["Pisco Añejo Mistral"])
+        self.assertEqual(self.names("cerv lag"), ["Cerveza Lager Austral"])
+        self.assertEqual(self.names("tequila"), [])
+
+    def test_exact_code_then_prefix_then_relevance(self):
+        self.assertEqual(self.names("7801"), ["Ron con pisco", "Pisco Añejo Mistral"])
+        self.assertEqual(self.names("pisco"), ["Pisco Añejo Mistral", "Ron con pisco"])
+
+    @override_settings(PRODUCT_SEARCH_LIMIT=2)
+    def test_results_are_capped(self):
+        self.assertEqual(len(self.names("78")), 2)  # 5 códigos empiezan con 78
+        self.assertEqual(len(search_product_ids("78", limit=50)), 2)
+
+    def test_index_follows_renames_and_deletes_by_rowid(self):
+        product = Product.objects.get(code="CS1")
+        product.name = "Cerveza Porter"
+        with CaptureQueriesContext(connection) as ctx:
+            product.save()
+        deletes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(f"DELETE FROM {FTS_TABLE}")]
+        self.assertEqual(len(deletes), 1)
+        self.assertIn("WHERE rowid =", deletes[0])
+        self.assertEqual(self.names("stout"), [])
+        self.assertEqual(self.names("porter"), ["Cerveza Porter"])
+        product.delete()
+        self.assertEqual(self.names("porter"), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid FROM {FTS_TABLE} ORDER BY rowid")
+            self.assertEqual([r[0] for r in cursor.fetchall()], list(Product.objects.order_by("id").values_list("id", flat=True)))
@@ -1,39 +1,84 @@
 # catalog/views.py
-from rest_framework import viewsets, filters
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import decorators, viewsets
+from backend.conditional import ConditionalGetMixin
+from backend.pagination import KeysetPagination
 from accounts.permissions import ReadOnlyOrAdmin
+from .filters import ProductFilter
 from .models import Product, Category
+from .barcode import scan_payload
+from .search import search_product_ids
 from .serializers import ProductSerializer, CategorySerializer
 from django.db.models.deletion import ProtectedError
 from rest_framework.response import Response
 from rest_framework import status
+from backend.sqlite import immediate_atomic
+from inventory.services import set_stock
 
 # ← NUEVO: para la bitácora de cambio de precio
-from audit.models import AuditLog
+from audit.writer import audit_log
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all().order_by("-id")
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.select_related("category").order_by("-id")
     serializer_class = ProductSerializer
     permission_classes = [ReadOnlyOrAdmin]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["code","name"]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ProductFilter
+    max_queries = {"list": 4, "retrieve": 3, "by_code": 2}
+    conditional_models = (Product, Category)  # category_name viene de Category
+
+    def list(self, request, *args, **kwargs):
+        # ?search= va al índice de búsqueda (catalog/search.py): resultados
+        # ordenados por relevancia y acotados, sin paginar.
+        query = request.query_params.get("search", "").strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+        ids = search_product_ids(query)
+        by_id = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        products = [by_id[pk] for pk in ids if pk in by_id]
+        data = self.get_serializer(products, many=True).data
+        return Response({"next": None, "previous": None, "results": data})
+
+    @decorators.action(detail=False, methods=["get"], url_path=r"by-code/(?P<code>[^/]+)")
+    def by_code(self, request, code=None):
+        """Escaneo de código de barras: coincidencia exacta, servida desde caché LRU."""
+        payload = scan_payload(code)
+        if payload is None:
+            return Response({"detail": "Producto no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(payload)
+
+    # El stock no se escribe directo: pasa por un movimiento ADJ del ledger
+    # (inventory/services.py, set_stock) para que stock_as_of siga cuadrando.
+    @immediate_atomic(label="product.create")
+    def perform_create(self, serializer):
+        stock = serializer.validated_data.pop("stock", 0)
+        product = serializer.save(stock=0)
+        if stock:
+            set_stock(product, stock, reason="ALTA")
 
     # Si alguien (OWNER/ADMIN) edita el producto y cambia el precio,
     # guardamos un AuditLog con el antes/después del precio.
+    @immediate_atomic(label="product.update")
     def perform_update(self, serializer):
         instance = self.get_object()
         old_price = str(instance.price)
+        stock = serializer.validated_data.pop("stock", None)
         product = serializer.save()
+        if stock is not None:
+            set_stock(product, stock)
         if str(product.price) != old_price:
-            AuditLog.objects.create(
-                actor=self.request.user, action="PRICE_CHANGE",
-                model="Product", obj_id=str(product.id),
-                changes={"price": [old_price, str(product.price)]}
+            audit_log(
+                self.request.user, "PRICE_CHANGE", "Product", product.id,
+                {"price": [old_price, str(product.price)]},
             )
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all().order_by("name")
     serializer_class = CategorySerializer
     permission_classes = [ReadOnlyOrAdmin]
+    max_queries = {"list": 3, "retrieve": 3}
+    conditional_models = (Category,)
 
     def destroy(self, request, *args, **kwargs):
         """Permite eliminar solo a Dueño/Admin y captura errores de dependencias."""
@@ -1,7 +1,11 @@
 from django.contrib import admin
-from .models import DTE
+from .models import DTE, DTEOutboxRun
 
 @admin.register(DTE)
 class DTEAdmin(admin.ModelAdmin):
-    list_display = ("id","sale","status","external_id","message")
+    list_display = ("id","sale","status","attempts","next_attempt_at","external_id","message")
     list_filter  = ("status",)
+
+@admin.register(DTEOutboxRun)
+class DTEOutboxRunAdmin(admin.ModelAdmin):
+    list_display = ("id","started_at","finished_at","emitter","claimed","sent","rejected","retried","dead")
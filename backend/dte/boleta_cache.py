@@ -0,0 +1,118 @@
+# dte/boleta_cache.py
+"""
+Caché en disco de boletas renderizadas.
+
+Cada archivo se nombra boleta_<sale_id>_<digest>.pdf, donde el digest cubre la
+versión del render (código de dte/boleta.py + logo) y los datos que se imprimen
+de la venta. Si algo de eso cambia, cambia la clave y el archivo viejo se ignora;
+al anular una venta se borran sus archivos.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+from . import boleta
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "renders": 0, "invalidations": 0, "errors": 0}
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="boleta-warm")
+
+
+def _render_version():
+    h = hashlib.sha256(Path(boleta.__file__).read_bytes())
+    if boleta.LOGO_PATH.exists():
+        h.update(boleta.LOGO_PATH.read_bytes())
+    return h.hexdigest()[:12]
+
+
+RENDER_VERSION = _render_version()
+
+
+def cache_dir():
+    return Path(getattr(settings, "BOLETA_CACHE_DIR", Path(tempfile.gettempdir()) / "boletas"))
+
+
+def _count(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def stats():
+    with _lock:
+        data = dict(_stats)
+    lookups = data["hits"] + data["misses"]
+    data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else None
+    return data
+
+
+def _digest(sale, items):
+    parts = [
+        RENDER_VERSION, sale.id, sale.status, sale.total, sale.payment_method,
+        sale.created_at.isoformat(),
+    ]
+    for it in items:
+        name = it.product.name if getattr(it, "product", None) else ""
+        parts.append((it.product_id, name, it.qty, it.unit_price, it.discount))
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:20]
+
+
+def cache_path(sale, items):
+    return cache_dir() / f"boleta_{sale.id}_{_digest(sale, items)}.pdf"
+
+
+def _store(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(content)
+    os.replace(tmp, path)  # atómico: nadie lee un PDF a medio escribir
+
+
+def get_boleta(sale, items):
+    """Devuelve (ruta del PDF, hit) renderizando y guardando si no estaba."""
+    path = cache_path(sale, items)
+    if path.exists():
+        _count("hits")
+        return path, True
+    _count("misses")
+    _store(path, boleta._build_boleta_pdf(sale, items))
+    _count("renders")
+    return path, False
+
+
+def invalidate(sale_id):
+    for path in cache_dir().glob(f"boleta_{sale_id}_*.pdf"):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+    _count("invalidations")
+
+
+def _warm(sale_id):
+    from sales.models import Sale
+
+    try:
+        sale = Sale.objects.filter(pk=sale_id).first()
+        if sale is None:
+            return
+        items = list(sale.items.select_related("product"))
+        path = cache_path(sale, items)
+        if not path.exists():
+            _store(path, boleta._build_boleta_pdf(sale, items))
+            _count("renders")
+    except Exception:
+        _count("errors")
+    finally:
+        connection.close()  # conexión propia del hilo
+
+
+def warm_async(sale_id):
+    """Renderiza la boleta en segundo plano (llamar después del commit)."""
+    _executor.submit(_warm, sale_id)
@@ -0,0 +1,35 @@
+# dte/emitters.py
+"""
+Emisores de DTE para el outbox. Se elige con settings.DTE_EMITTER (ruta a la
+clase). Un emisor recibe un lote de DTE y devuelve un EmitResult por cada uno.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+@dataclass
+class EmitResult:
+    ok: bool
+    external_id: str = ""
+    message: str = ""
+    retryable: bool = True  # False = rechazo definitivo del SII/proveedor
+
+
+class BaseEmitter:
+    def emit(self, dtes):
+        """Envía el lote; debe devolver un EmitResult por DTE, en el mismo orden."""
+        raise NotImplementedError
+
+
+class LocalStubEmitter(BaseEmitter):
+    """Emisor local de prueba: acepta todo y asigna un folio ficticio."""
+
+    def emit(self, dtes):
+        return [EmitResult(ok=True, external_id=f"STUB-{dte.sale_id}", message="Emitido (stub local)") for dte in dtes]
+
+
+def get_emitter():
+    path = getattr(settings, "DTE_EMITTER", "dte.emitters.LocalStubEmitter")
+    return import_string(path)()
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dte.outbox import run_once
+
+
+class Command(BaseCommand):
+    help = "Emite los DTE pendientes por lotes, con reintentos y dead-letter."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--max-batches", type=int, default=None, help="Tope de lotes por pasada.")
+        parser.add_argument("--loop", action="store_true", help="Seguir corriendo y volver a consultar el outbox.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Segundos entre pasadas con --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            counts = run_once(batch_size=options["batch_size"], max_batches=options["max_batches"])
+            if counts["claimed"] or not options["loop"]:
+                self.stdout.write(
+                    "DTE outbox: reclamados={claimed} enviados={sent} rechazados={rejected} "
+                    "reintentos={retried} dead={dead}".format(**counts)
+                )
+            if not options["loop"]:
+                break
+            if not counts["claimed"]:
+                time.sleep(options["interval"])
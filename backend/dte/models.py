@@ -1,9 +1,32 @@
 from django.db import models
+from django.utils import timezone
 from sales.models import Sale
 
 class DTE(models.Model):
-    PENDING, SENT, REJECTED = "PENDING","SENT","REJECTED"
+    PENDING, SENT, REJECTED, DEAD = "PENDING","SENT","REJECTED","DEAD"
     sale = models.OneToOneField(Sale, on_delete=models.CASCADE, related_name="dte")
     status = models.CharField(max_length=10, default=PENDING)
     external_id = models.CharField(max_length=64, blank=True)
     message = models.CharField(max_length=200, blank=True)
+    # Outbox de emisión (ver dte/outbox.py)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="dte_outbox_idx"),
+        ]
+
+
+class DTEOutboxRun(models.Model):
+    """Resumen de cada pasada del worker de emisión."""
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    emitter = models.CharField(max_length=120)
+    claimed = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    retried = models.PositiveIntegerField(default=0)
+    dead = models.PositiveIntegerField(default=0)
@@ -0,0 +1,116 @@
+# dte/outbox.py
+"""
+Worker de emisión de DTE (outbox en BD).
+
+La venta solo deja su DTE en PENDING; este módulo los reclama por lotes,
+los envía con el emisor configurado y aplica reintentos con backoff
+exponencial. Tras DTE_MAX_ATTEMPTS fallos el DTE pasa a DEAD (dead-letter).
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from backend.sqlite import immediate_atomic
+
+from .emitters import get_emitter
+from .models import DTE, DTEOutboxRun
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def backoff(attempts):
+    """Segundos hasta el próximo intento: base * 2^(n-1), con tope y algo de jitter."""
+    base = _setting("DTE_RETRY_BASE_SECONDS", 30)
+    cap = _setting("DTE_RETRY_MAX_SECONDS", 3600)
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(batch_size, now=None):
+    """
+    Reclama hasta batch_size DTE listos y les pone un lease (locked_until).
+    select_for_update(skip_locked) reparte filas entre workers en Postgres; en
+    SQLite BEGIN IMMEDIATE toma el candado de escritura antes del SELECT (una
+    transacción diferida fallaría al pasar de lectura a escritura si hay otro
+    escritor), y el lease evita que otro reclame lo mismo mientras se envía.
+    """
+    now = now or timezone.now()
+    lease = timedelta(seconds=_setting("DTE_CLAIM_LEASE_SECONDS", 120))
+    with immediate_atomic(label="dte.claim"):
+        ids = list(
+            DTE.objects.select_for_update(skip_locked=True)
+            .filter(status=DTE.PENDING, next_attempt_at__lte=now)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        DTE.objects.filter(id__in=ids).update(locked_until=now + lease)
+    return list(DTE.objects.filter(id__in=ids).order_by("id"))
+
+
+def process_batch(emitter, batch, counts):
+    error = ""
+    try:
+        results = emitter.emit(batch)
+        if len(results) != len(batch):
+            raise ValueError("El emisor devolvió una cantidad de resultados distinta al lote")
+    except Exception as exc:  # caída del emisor: todo el lote se reintenta
+        logger.exception("Fallo del emisor DTE")
+        results = None
+        error = str(exc)[:200]
+
+    now = timezone.now()
+    max_attempts = _setting("DTE_MAX_ATTEMPTS", 8)
+    for i, dte in enumerate(batch):
+        res = results[i] if results is not None else None
+        dte.locked_until = None
+        if res is not None and res.ok:
+            dte.status, dte.external_id, dte.message, dte.sent_at = DTE.SENT, res.external_id, res.message[:200], now
+            counts["sent"] += 1
+            continue
+        dte.attempts += 1
+        dte.message = (res.message if res is not None else error)[:200]
+        if res is not None and not res.retryable:
+            dte.status = DTE.REJECTED
+            counts["rejected"] += 1
+        elif dte.attempts >= max_attempts:
+            dte.status = DTE.DEAD
+            counts["dead"] += 1
+        else:
+            dte.next_attempt_at = now + timedelta(seconds=backoff(dte.attempts))
+            counts["retried"] += 1
+    DTE.objects.bulk_update(
+        batch, ["status", "external_id", "message", "sent_at", "attempts", "next_attempt_at", "locked_until"]
+    )
+
+
+def run_once(batch_size=None, max_batches=None, emitter=None):
+    """Drena el outbox (o hasta max_batches lotes) y registra la pasada en DTEOutboxRun."""
+    emitter = emitter or get_emitter()
+    batch_size = batch_size or _setting("DTE_BATCH_SIZE", 100)
+    counts = {"claimed": 0, "sent": 0, "rejected": 0, "retried": 0, "dead": 0}
+    started = timezone.now()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = claim_batch(batch_size)
+        if not batch:
+            break
+        counts["claimed"] += len(batch)
+        process_batch(emitter, batch, counts)
+        batches += 1
+    if counts["claimed"]:
+        DTEOutboxRun.objects.create(
+            started_at=started, finished_at=timezone.now(),
+            emitter=type(emitter).__name__, **counts,
+        )
+    return counts
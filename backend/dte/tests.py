@@ -1,3 +1,186 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.http import FileResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from backend.metrics import MetricsMiddleware, registry
+from catalog.models import Product
+from sales.models import Sale
+
+from . import boleta_cache, outbox
+from .emitters import BaseEmitter, EmitResult
+from .models import DTE, DTEOutboxRun
+
+
+class BoletaPDFTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        product = Product.objects.create(code="B1", name="Ron", price=Decimal("8990"), stock=5)
+        r = self.client.post("/api/sales/", {
+            "payment_method": "CASH", "items": [{"product": product.id, "qty": 1, "unit_price": "8990"}],
+        }, format="json")
+        self.sale_id = r.data["id"]
+        registry.reset()
+
+    def test_pdf_keeps_file_response_and_is_measured_by_content_length(self):
+        with override_settings(BOLETA_CACHE_DIR=self.tmp.name):
+            r = self.client.get(f"/api/dte/boleta/{self.sale_id}/")
+            body = b"".join(r.streaming_content)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(int(r["Content-Length"]), len(body))
+        self.assertIn(f'pos_http_response_bytes_total{{view="dte-boleta",method="GET"}} {len(body)}', registry.render())
+
+    def test_middleware_leaves_file_and_async_streams_untouched(self):
+        # El cliente de tests envuelve el stream por su cuenta: se prueba el middleware solo.
+        async def chunks():
+            yield b"data"
+
+        file_response = FileResponse(open(__file__, "rb"))
+        self.addCleanup(file_response.close)
+        MetricsMiddleware(lambda request: file_response)(RequestFactory().get("/"))
+        self.assertIsNotNone(file_response.file_to_stream)  # sigue disponible para sendfile
+
+        stream = chunks()
+        async_response = StreamingHttpResponse(stream)
+        MetricsMiddleware(lambda request: async_response)(RequestFactory().get("/"))
+        self.assertTrue(async_response.is_async)
+        self.assertIs(async_response._iterator, stream)
+
+
+class BoletaCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        settings_override = override_settings(BOLETA_CACHE_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("caja", password="x", role=User.OWNER))
+        self.product = Product.objects.create(code="B1", name="Ron", price=Decimal("8990"), stock=5)
+
+    def sell(self):
+        return self.client.post("/api/sales/", {
+            "payment_method": "CASH", "items": [{"product": self.product.id, "qty": 1, "unit_price": "8990"}],
+        }, format="json").data["id"]
+
+    def fetch(self, sale_id):
+        r = self.client.get(f"/api/dte/boleta/{sale_id}/")
+        r.close()
+        return r["X-Boleta-Cache"]
+
+    def files(self):
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_warm_is_queued_after_commit_and_prerenders(self):
+        with mock.patch.object(boleta_cache, "warm_async") as warm:
+            with self.captureOnCommitCallbacks(execute=True):
+                sale_id = self.sell()
+                warm.assert_not_called()  # la venta aún no confirma
+        warm.assert_called_once_with(sale_id)
+
+        with mock.patch.object(boleta_cache, "connection"):  # el hilo cierra su conexión; aquí es la del test
+            boleta_cache._warm(sale_id)
+        self.assertEqual(len(self.files()), 1)
+        self.assertEqual(self.fetch(sale_id), "HIT")
+
+    def test_misses_when_the_sale_or_the_render_changes(self):
+        sale_id = self.sell()
+        self.assertEqual([self.fetch(sale_id), self.fetch(sale_id)], ["MISS", "HIT"])
+
+        self.product.name = "Ron añejo"  # sale en la boleta
+        self.product.save()
+        self.assertEqual([self.fetch(sale_id), self.fetch(sale_id)], ["MISS", "HIT"])
+
+        with mock.patch.object(boleta_cache, "RENDER_VERSION", "otra"):
+            self.assertEqual(self.fetch(sale_id), "MISS")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/sales/{sale_id}/void/", {"reason": "error"}, format="json")
+        self.assertEqual(self.files(), [])  # la anulación borra sus boletas
+        self.assertEqual(self.fetch(sale_id), "MISS")
+
+
+class _ScriptedEmitter(BaseEmitter):
+    """Responde con `results(dtes)`; cuenta los lotes recibidos."""
+
+    def __init__(self, results):
+        self.results = results
+        self.batches = []
+
+    def emit(self, dtes):
+        self.batches.append([dte.id for dte in dtes])
+        return self.results(dtes)
+
+
+@override_settings(DTE_MAX_ATTEMPTS=2, DTE_RETRY_BASE_SECONDS=30)
+class OutboxTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        self.dtes = [DTE.objects.create(sale=Sale.objects.create(user=user, total=Decimal("1000"))) for _ in range(3)]
+
+    def statuses(self):
+        return list(DTE.objects.order_by("id").values_list("status", flat=True))
+
+    def due_now(self):
+        DTE.objects.update(next_attempt_at=timezone.now())
+
+    def test_sends_in_batches_and_records_the_run(self):
+        emitter = _ScriptedEmitter(lambda dtes: [EmitResult(ok=True, external_id=f"F{d.id}") for d in dtes])
+        counts = outbox.run_once(batch_size=2, emitter=emitter)
+        self.assertEqual((counts["claimed"], counts["sent"]), (3, 3))
+        self.assertEqual([len(batch) for batch in emitter.batches], [2, 1])
+        self.assertEqual(self.statuses(), [DTE.SENT] * 3)
+        self.assertEqual(DTEOutboxRun.objects.get().sent, 3)
+        self.assertEqual(outbox.run_once(emitter=emitter)["claimed"], 0)
+
+    def test_rejections_retries_and_dead_letter(self):
+        emitter = _ScriptedEmitter(lambda dtes: [
+            EmitResult(ok=False, message="folio inválido", retryable=False) if d.id == self.dtes[0].id
+            else EmitResult(ok=False, message="timeout") for d in dtes
+        ])
+        outbox.run_once(emitter=emitter)
+        self.assertEqual(self.statuses(), [DTE.REJECTED, DTE.PENDING, DTE.PENDING])
+        retry = DTE.objects.get(pk=self.dtes[1].pk)
+        self.assertEqual(retry.attempts, 1)
+        self.assertGreater(retry.next_attempt_at, timezone.now() + timedelta(seconds=20))
+        self.assertEqual(outbox.run_once(emitter=emitter)["claimed"], 0)  # todavía no toca
+
+        self.due_now()
+        outbox.run_once(emitter=emitter)
+        self.assertEqual(self.statuses(), [DTE.REJECTED, DTE.DEAD, DTE.DEAD])
+
+    def test_emitter_crash_retries_the_whole_batch(self):
+        def crash(dtes):
+            raise ConnectionError("SII no responde")
+        outbox.run_once(emitter=_ScriptedEmitter(crash))
+        self.assertEqual(list(DTE.objects.values_list("attempts", "message").distinct()), [(1, "SII no responde")])
+        self.assertEqual(self.statuses(), [DTE.PENDING] * 3)
+
+    def test_claimed_rows_are_leased(self):
+        self.assertEqual(len(outbox.claim_batch(10)), 3)
+        self.assertEqual(outbox.claim_batch(10), [])
+
+
+class OutboxClaimLockTests(TransactionTestCase):
+    def test_claim_takes_the_write_lock_before_selecting(self):
+        user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        DTE.objects.create(sale=Sale.objects.create(user=user, total=Decimal("1000")))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(len(outbox.claim_batch(10)), 1)
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        self.assertEqual(sqls[0], "BEGIN IMMEDIATE")
+        self.assertIn('"dte_dte"', sqls[1])
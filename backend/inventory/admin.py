@@ -1,8 +1,19 @@
 from django.contrib import admin
-from .models import InventoryMovement
+from .models import InventoryMovement, SalesVelocity, StockSnapshot
 
 @admin.register(InventoryMovement)
 class InventoryMovementAdmin(admin.ModelAdmin):
-    list_display = ("id","product","type","qty","reason","created_at")
+    list_display = ("id","product","type","qty","balance_after","reason","created_at")
     list_filter  = ("type",)
     search_fields = ("product__name","reason")
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("id","product","taken_at","stock","last_movement_id")
+    search_fields = ("product__name",)
+
+@admin.register(SalesVelocity)
+class SalesVelocityAdmin(admin.ModelAdmin):
+    list_display = ("product","rates")
+    list_select_related = ("product",)
+    search_fields = ("product__name",)
@@ -0,0 +1,8 @@
+from backend.filters import DateRangeFilterSet
+from .models import InventoryMovement
+
+
+class InventoryMovementFilter(DateRangeFilterSet):
+    class Meta:
+        model = InventoryMovement
+        fields = ("product", "type")
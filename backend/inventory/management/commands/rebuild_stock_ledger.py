@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog.models import Product
+from inventory.models import InventoryMovement
+from inventory.services import take_snapshots
+
+EFFECT = {"IN": 1, "OUT": -1}
+
+
+class Command(BaseCommand):
+    help = (
+        "Completa balance_after de los movimientos sin saldo, recorriendo el "
+        "historial hacia atrás desde el stock actual, y toma una foto inicial. "
+        "Es una aproximación: los ajustes que quedaron recortados en 0 no se "
+        "pueden reconstruir exactamente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recalcula también los movimientos que ya tienen saldo.")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        todo = InventoryMovement.objects.all()
+        if not options["all"]:
+            todo = todo.filter(balance_after__isnull=True)
+        product_ids = set(todo.values_list("product_id", flat=True).distinct())
+        updated = 0
+        for product in Product.objects.filter(pk__in=product_ids).only("id", "stock").iterator():
+            balance = product.stock
+            batch = []
+            for mv in InventoryMovement.objects.filter(product=product).order_by("-created_at", "-id").iterator():
+                if mv.balance_after is not None and not options["all"]:
+                    balance = mv.balance_after
+                else:
+                    mv.balance_after = balance
+                    batch.append(mv)
+                sign = EFFECT.get(mv.type, 1)
+                qty = abs(mv.qty) if mv.type in EFFECT else mv.qty
+                balance = max(0, balance - sign * qty)
+            InventoryMovement.objects.bulk_update(batch, ["balance_after"], batch_size=500)
+            updated += len(batch)
+        snaps = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Movimientos actualizados: {updated}. Fotos de stock: {snaps}."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.services import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Guarda una foto del stock de todos los productos (programar p. ej. cada noche)."
+
+    def handle(self, *args, **options):
+        count = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Fotos de stock guardadas: {count}."))
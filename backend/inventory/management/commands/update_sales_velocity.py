@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.reorder import update_velocity
+
+
+class Command(BaseCommand):
+    help = "Actualiza la velocidad de venta por producto con los movimientos nuevos (incremental)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Seguir corriendo cada --interval segundos.")
+        parser.add_argument("--interval", type=float, default=300.0, help="Segundos entre pasadas con --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            result = update_velocity()
+            self.stdout.write(
+                "Velocidad de venta: movimientos hasta id={movements}, días cerrados={closed_days}".format(**result)
+            )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_alter_product_code'),
+        ('inventory', '0002_alter_inventorymovement_product'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['created_at', 'id'], name='mov_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['product', 'created_at'], name='mov_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['type', 'created_at'], name='mov_type_created_idx'),
+        ),
+    ]
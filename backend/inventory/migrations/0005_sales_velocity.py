@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_category_version_product_version'),
+        ('inventory', '0004_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesVelocity',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='velocity', serialize=False, to='catalog.product')),
+                ('rates', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VelocityState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_movement_id', models.BigIntegerField(default=0)),
+                ('last_closed_day', models.DateField(blank=True, null=True)),
+                ('observations', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PendingDailyOut',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('qty', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalog.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'day'), name='pending_out_key')],
+            },
+        ),
+    ]
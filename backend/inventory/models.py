@@ -9,3 +9,56 @@ class InventoryMovement(models.Model):
     qty = models.IntegerField()
     reason = models.CharField(max_length=140, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Stock del producto después de aplicar este movimiento (null en historial previo al ledger)
+    balance_after = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="mov_created_idx"),
+            models.Index(fields=["product", "created_at"], name="mov_product_created_idx"),
+            models.Index(fields=["type", "created_at"], name="mov_type_created_idx"),
+        ]
+
+
+class StockSnapshot(models.Model):
+    """Foto periódica del stock por producto (ver comando snapshot_stock)."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_snapshots")
+    taken_at = models.DateTimeField()
+    stock = models.IntegerField()
+    # Último InventoryMovement existente al tomar la foto
+    last_movement_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "taken_at"], name="snap_product_taken_idx"),
+        ]
+
+
+class SalesVelocity(models.Model):
+    """
+    Venta diaria esperada del producto por día de semana (0=lunes): promedio
+    móvil exponencial de las salidas de cada día cerrado (ver inventory/reorder.py).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name="velocity")
+    rates = models.JSONField(default=list)  # 7 valores, sin corregir el sesgo inicial
+
+
+class VelocityState(models.Model):
+    """Fila única con el avance del cálculo incremental de SalesVelocity."""
+    last_movement_id = models.BigIntegerField(default=0)
+    last_closed_day = models.DateField(null=True, blank=True)
+    # Días cerrados por día de semana (para corregir el sesgo del promedio exponencial)
+    observations = models.JSONField(default=list)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+
+class PendingDailyOut(models.Model):
+    """Salidas netas por producto de los días locales todavía abiertos (aún no incorporados a SalesVelocity)."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    qty = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "day"], name="pending_out_key"),
+        ]
@@ -0,0 +1,245 @@
+"""
+Sugerencias de reposición a partir de la velocidad de venta.
+
+update_velocity() (comando update_sales_velocity) procesa solo los movimientos
+nuevos desde VelocityState.last_movement_id: suma las salidas netas (OUT menos
+devoluciones por anulación) por producto y día local en PendingDailyOut, y por
+cada día ya terminado actualiza, para todos los productos a la vez, el promedio
+exponencial de ese día de semana en SalesVelocity.
+
+reorder_cache arma la lista: proyecta la demanda de los próximos
+REORDER_HORIZON_DAYS días con la tasa de cada día de semana, estima los días
+hasta el stock mínimo, el crítico y el quiebre, y sugiere reponer hasta cubrir
+REORDER_COVER_DAYS días más el stock mínimo. Se invalida con los contadores de
+Product y SalesVelocity (ver backend/respcache.py) y al cambiar el día.
+
+Vectorizado con NumPy si está instalado; si no, el mismo cálculo en Python.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Max, Q, Sum, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from backend.respcache import ResponseCache
+from backend.sqlite import immediate_atomic
+from catalog.models import Product
+from reports.services import local_day, store_tz
+from sync.services import mark_changed
+from .models import InventoryMovement, PendingDailyOut, SalesVelocity, VelocityState
+
+try:
+    import numpy as np
+except ImportError:  # opcional
+    np = None
+
+CRITICAL, LOW, SOON = "critico", "bajo", "pronto"
+_STATUS_ORDER = {CRITICAL: 0, LOW: 1, SOON: 2}
+
+
+def _alpha():
+    return getattr(settings, "REORDER_EWMA_ALPHA", 0.3)
+
+
+def _new_out_by_day(after_id, up_to_id):
+    """{(product_id, día local): salidas netas} de los movimientos en (after_id, up_to_id]."""
+    net = Sum(Case(
+        When(type=InventoryMovement.OUT, then=F("qty")),
+        When(type=InventoryMovement.IN, then=-F("qty")),  # solo reason=VOID, ver filtro
+        default=0, output_field=IntegerField(),
+    ))
+    rows = (
+        InventoryMovement.objects.filter(id__gt=after_id, id__lte=up_to_id)
+        .filter(Q(type=InventoryMovement.OUT) | Q(type=InventoryMovement.IN, reason="VOID"))
+        .annotate(day=TruncDate("created_at", tzinfo=store_tz()))
+        .values_list("product_id", "day")
+        .annotate(out=net)
+        .order_by()
+    )
+    return {(pid, day): out for pid, day, out in rows}
+
+
+def _fold_days(days, pending, observations):
+    """Incorpora los días cerrados `days` al promedio exponencial de cada producto."""
+    alpha = _alpha()
+    product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+    index = {pid: i for i, pid in enumerate(product_ids)}
+    stored = dict(SalesVelocity.objects.values_list("product_id", "rates"))
+    rates = [stored.get(pid) if len(stored.get(pid) or ()) == 7 else [0.0] * 7 for pid in product_ids]
+    by_day = {}
+    for (pid, day), qty in pending.items():
+        if pid in index:
+            by_day.setdefault(day, {})[index[pid]] = max(qty, 0)  # anulaciones de días ya cerrados
+
+    if np is not None:
+        matrix = np.array(rates, dtype=float).reshape(len(product_ids), 7)
+        for day in days:
+            out = np.zeros(len(product_ids))
+            sold = by_day.get(day, {})
+            out[np.fromiter(sold.keys(), dtype=np.intp, count=len(sold))] = np.fromiter(sold.values(), dtype=float, count=len(sold))
+            wd = day.weekday()
+            matrix[:, wd] = alpha * out + (1 - alpha) * matrix[:, wd]
+            observations[wd] += 1
+        rates = matrix.tolist()
+    else:
+        for day in days:
+            sold, wd = by_day.get(day, {}), day.weekday()
+            for i, row in enumerate(rates):
+                row[wd] = alpha * sold.get(i, 0) + (1 - alpha) * row[wd]
+            observations[wd] += 1
+
+    rows = [SalesVelocity(product_id=pid, rates=[round(r, 6) for r in rates[index[pid]]]) for pid in product_ids]
+    SalesVelocity.objects.bulk_update([r for r in rows if r.product_id in stored], ["rates"], batch_size=500)
+    SalesVelocity.objects.bulk_create([r for r in rows if r.product_id not in stored], batch_size=500)
+
+
+@immediate_atomic(label="velocity")
+def update_velocity(today=None):
+    """
+    Avance incremental: toma los movimientos nuevos y cierra los días locales
+    anteriores a `today`. Devuelve {"movements": último id procesado, "closed_days": n}.
+    """
+    today = today or local_day(timezone.now())
+    state, _ = VelocityState.objects.select_for_update().get_or_create(pk=1, defaults={"observations": [0] * 7})
+    max_id = InventoryMovement.objects.aggregate(m=Max("id"))["m"] or 0
+    pending = {(pid, day): qty for pid, day, qty in PendingDailyOut.objects.values_list("product_id", "day", "qty")}
+    changed = False
+
+    if max_id > state.last_movement_id:
+        first_open = state.last_closed_day + timedelta(days=1) if state.last_closed_day else None
+        for (pid, day), out in _new_out_by_day(state.last_movement_id, max_id).items():
+            if first_open and day < first_open:
+                day = first_open  # confirmado después de cerrar su día
+            pending[(pid, day)] = pending.get((pid, day), 0) + out
+        changed = True
+
+    start = state.last_closed_day + timedelta(days=1) if state.last_closed_day else min((d for _, d in pending), default=None)
+    closing = [start + timedelta(days=i) for i in range((today - start).days)] if start else []
+    if closing:
+        observations = list(state.observations) if len(state.observations or ()) == 7 else [0] * 7
+        _fold_days(closing, pending, observations)
+        state.observations = observations
+        state.last_closed_day = closing[-1]
+        pending = {key: qty for key, qty in pending.items() if key[1] > closing[-1]}
+        changed = True
+
+    if changed:
+        PendingDailyOut.objects.all().delete()
+        PendingDailyOut.objects.bulk_create(
+            [PendingDailyOut(product_id=pid, day=day, qty=qty) for (pid, day), qty in pending.items()], batch_size=500,
+        )
+    state.last_movement_id = max_id
+    state.updated_at = timezone.now()
+    state.save()
+    if closing:
+        mark_changed(SalesVelocity)  # invalida reorder_cache
+    return {"movements": max_id, "closed_days": len(closing)}
+
+
+def _corrected(rates, observations, alpha):
+    """Tasas por día de semana sin el sesgo hacia 0 de los primeros días."""
+    factors = [1 - (1 - alpha) ** n if n else 0 for n in observations]
+    return [r / f if f else 0.0 for r, f in zip(rates, factors)]
+
+
+def _days_until(cumulative, need):
+    """Primer día (1 = hoy) en que la demanda acumulada alcanza `need`; 0 si ya está; None si no ocurre en el horizonte."""
+    if need <= 0:
+        return 0
+    for i, value in enumerate(cumulative):
+        if value >= need:
+            return i + 1
+    return None
+
+
+def _forecast(rates, stocks, levels, sequence, cover):
+    """
+    rates: tasas corregidas (P x 7). Devuelve, por producto, los días hasta
+    cada nivel de `levels` (listas P) y la demanda de los primeros `cover` días.
+    """
+    if np is not None and rates:
+        demand = np.asarray(rates, dtype=float)[:, sequence].cumsum(axis=1)
+        stocks = np.asarray(stocks, dtype=float)
+        results = []
+        for level in levels:
+            need = stocks - np.asarray(level, dtype=float)
+            reached = demand >= need[:, None]
+            first = reached.argmax(axis=1) + 1
+            days = np.where(need <= 0, 0, np.where(reached.any(axis=1), first, -1))
+            results.append([None if d < 0 else int(d) for d in days.tolist()])
+        return results, demand[:, cover - 1].tolist()
+
+    cumulative = []
+    for row in rates:
+        total, acc = 0.0, []
+        for wd in sequence:
+            total += row[wd]
+            acc.append(total)
+        cumulative.append(acc)
+    results = [[_days_until(cumulative[i], stocks[i] - level[i]) for i in range(len(rates))] for level in levels]
+    return results, [acc[cover - 1] for acc in cumulative]
+
+
+def reorder_list():
+    alpha = _alpha()
+    horizon = getattr(settings, "REORDER_HORIZON_DAYS", 60)
+    cover = min(getattr(settings, "REORDER_COVER_DAYS", 14), horizon)
+    lead = getattr(settings, "REORDER_LEAD_DAYS", 3)
+    today = local_day(timezone.now())
+    state = VelocityState.objects.filter(pk=1).values("observations", "last_closed_day").first() or {}
+    observations = state.get("observations") or [0] * 7
+
+    rows = list(
+        Product.objects.filter(active=True)
+        .values_list("id", "code", "name", "stock", "min_stock", "critical_stock", "velocity__rates")
+        .order_by("id")
+    )
+    rates = [_corrected(r[6] if len(r[6] or ()) == 7 else [0.0] * 7, observations, alpha) for r in rows]
+    stocks = [r[3] for r in rows]
+    sequence = [(today.weekday() + i) % 7 for i in range(horizon)]
+    (to_zero, to_critical, to_min), covered = _forecast(
+        rates, stocks, ([0] * len(rows), [r[5] for r in rows], [r[4] for r in rows]), sequence, cover,
+    )
+
+    items = []
+    for i, (pid, code, name, stock, min_stock, critical_stock, _) in enumerate(rows):
+        suggested = max(0, math.ceil(covered[i] + min_stock - stock - 1e-9))
+        if stock <= critical_stock:
+            status = CRITICAL
+        elif stock <= min_stock:
+            status = LOW
+        elif to_min[i] is not None and to_min[i] <= lead:
+            status = SOON
+        else:
+            continue
+        if not suggested:
+            continue
+        items.append({
+            "product_id": pid,
+            "code": code,
+            "name": name,
+            "stock": stock,
+            "min_stock": min_stock,
+            "critical_stock": critical_stock,
+            "velocidad_diaria": round(sum(rates[i]) / 7, 2),
+            "dias_para_minimo": to_min[i],
+            "dias_para_critico": to_critical[i],
+            "dias_para_quiebre": to_zero[i],
+            "sugerido": suggested,
+            "estado": status,
+        })
+    horizon_end = horizon + 1
+    items.sort(key=lambda it: (_STATUS_ORDER[it["estado"]], it["dias_para_quiebre"] if it["dias_para_quiebre"] is not None else horizon_end, it["name"]))
+    return {
+        "dia": today,
+        "velocidad_hasta": state.get("last_closed_day"),
+        "horizonte_dias": horizon,
+        "items": items,
+    }
+
+
+reorder_cache = ResponseCache(
+    "reorder", (Product, SalesVelocity), reorder_list, scope=lambda: local_day(timezone.now()).isoformat(),
+)
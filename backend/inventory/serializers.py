@@ -6,6 +6,7 @@ class InventoryMovementSerializer(serializers.ModelSerializer):
     class Meta:
         model = InventoryMovement
         fields = "__all__"
+        read_only_fields = ("balance_after",)
         
 class StockSerializer(serializers.ModelSerializer):
     name = serializers.CharField(source="name", read_only=True)
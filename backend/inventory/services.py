@@ -1,15 +1,183 @@
+from collections import defaultdict
+
 from django.db import transaction
-from .models import InventoryMovement
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from backend.events import emit
+from backend.respcache import ResponseCache
+from catalog.barcode import barcode_cache
+from catalog.models import Product
+from sync.services import next_version
+from .models import InventoryMovement, StockSnapshot
+
+
+def _stock_expression(type_, qty):
+    """Expresión SQL con el nuevo stock, calculado sobre el valor actual de la fila."""
+    if type_ == "IN":
+        return F("stock") + Value(max(0, qty))
+    if type_ == "OUT":
+        return Greatest(F("stock") - Value(max(0, qty)), Value(0), output_field=IntegerField())
+    # ADJ
+    return Greatest(F("stock") + Value(qty), Value(0), output_field=IntegerField())
+
+
+def _stock_rows():
+    return list(Product.objects.values("id", "name", "price", "stock").order_by("name"))
+
+
+# Payload de /api/inventory/stock/; se invalida con el contador de Product.
+stock_cache = ResponseCache("stock", (Product,), _stock_rows)
+
+
+OK, LOW, CRITICAL, OUT_OF_STOCK = "ok", "bajo", "critico", "agotado"
+
+
+def stock_level(stock, min_stock, critical_stock):
+    if stock <= 0:
+        return OUT_OF_STOCK
+    if stock <= critical_stock:
+        return CRITICAL
+    if stock <= min_stock:
+        return LOW
+    return OK
+
+
+def apply_movement(stock, type_, qty):
+    """Mismo cálculo que _stock_expression, en Python."""
+    if type_ == "IN":
+        return stock + max(0, qty)
+    if type_ == "OUT":
+        return max(0, stock - max(0, qty))
+    return max(0, stock + qty)
+
+
+@transaction.atomic
+def register_movements(lines, type_, reason=""):
+    """
+    Versión por lotes de register_movement.
+    lines: iterable de (product_id, qty). Inserta todos los movimientos con un
+    solo INSERT y descuenta/suma el stock con un único UPDATE ... CASE atómico.
+    """
+    lines = [(pid, qty) for pid, qty in lines]
+    if not lines:
+        return []
+    per_product = defaultdict(int)
+    for pid, qty in lines:
+        per_product[pid] += qty
+    # Saldo resultante de cada movimiento (ledger), calculado sobre filas bloqueadas.
+    locked = {
+        pid: row for pid, *row in Product.objects.select_for_update().filter(pk__in=per_product)
+        .values_list("id", "stock", "min_stock", "critical_stock", "code", "name")
+    }
+    balances = {pid: row[0] for pid, row in locked.items()}
+    movements = []
+    for pid, qty in lines:
+        balances[pid] = apply_movement(balances.get(pid, 0), type_, qty)
+        movements.append(InventoryMovement(
+            product_id=pid, type=type_, qty=qty, reason=reason, balance_after=balances[pid],
+        ))
+    InventoryMovement.objects.bulk_create(movements)
+    Product.objects.filter(pk__in=per_product).update(
+        stock=Case(
+            *[When(pk=pid, then=_stock_expression(type_, qty)) for pid, qty in per_product.items()],
+            default=F("stock"),
+            output_field=IntegerField(),
+        ),
+        # Versión para la sincronización incremental y, en el mismo UPDATE, el
+        # contador que invalida los ETag de productos y stock (sync/services.py)
+        version=next_version(Product),
+    )
+    barcode_cache.invalidate_on_commit(per_product)
+    for pid, (stock, min_stock, critical_stock, code, name) in locked.items():
+        before = stock_level(stock, min_stock, critical_stock)
+        after = stock_level(balances[pid], min_stock, critical_stock)
+        if after != before:
+            emit("stock.level", {
+                "product": pid, "code": code, "name": name, "stock": balances[pid],
+                "level": after, "previous": before,
+            })
+    return movements
+
 
 @transaction.atomic
 def register_movement(product, type_, qty, reason=""):
-    mv = InventoryMovement.objects.create(product=product, type=type_, qty=qty, reason=reason)
-    if type_ == "IN":
-        product.stock += max(0, qty)
-    elif type_ == "OUT":
-        product.stock = max(0, product.stock - max(0, qty))
-    else:  # ADJ
-        product.stock += qty
-        if product.stock < 0: product.stock = 0
-    product.save(update_fields=["stock"])
+    mv = register_movements([(product.pk, qty)], type_, reason=reason)[0]
+    product.stock = mv.balance_after
     return mv
+
+
+@transaction.atomic
+def set_stock(product, stock, reason="AJUSTE"):
+    """
+    Lleva el stock de `product` a `stock` con un movimiento ADJ, para que el
+    ledger siga siendo la fuente del saldo. Debe correr en la transacción de
+    escritura del llamador (immediate_atomic) para leer y ajustar sin carrera.
+    Devuelve el movimiento, o None si ya tenía ese stock.
+    """
+    current = Product.objects.filter(pk=product.pk).values_list("stock", flat=True).get()
+    if current == stock:
+        product.stock = stock
+        return None
+    return register_movement(product, InventoryMovement.ADJ, stock - current, reason=reason)
+
+
+@transaction.atomic
+def take_snapshots(taken_at=None):
+    """Guarda una foto del stock actual de todos los productos."""
+    taken_at = taken_at or timezone.now()
+    last_id = InventoryMovement.objects.aggregate(m=Max("id"))["m"] or 0
+    rows = Product.objects.values_list("id", "stock").iterator(chunk_size=2000)
+    snaps = StockSnapshot.objects.bulk_create(
+        (StockSnapshot(product_id=pid, stock=stock, taken_at=taken_at, last_movement_id=last_id)
+         for pid, stock in rows),
+        batch_size=500,
+    )
+    return len(snaps)
+
+
+def stock_as_of(at, product_ids=None):
+    """
+    Stock de cada producto al instante `at` -> {product_id: stock}.
+
+    Por producto toma lo más reciente entre el último movimiento <= at (su
+    balance_after) y la última foto <= at. Solo si el movimiento es de historial
+    sin saldo se reproduce el tramo desde la foto (o desde 0) hasta `at`.
+    """
+    movements = InventoryMovement.objects.filter(product=OuterRef("pk"), created_at__lte=at).order_by("-created_at", "-id")
+    snapshots = StockSnapshot.objects.filter(product=OuterRef("pk"), taken_at__lte=at).order_by("-taken_at", "-id")
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    rows = products.annotate(
+        mv_id=Subquery(movements.values("id")[:1]),
+        mv_balance=Subquery(movements.values("balance_after")[:1]),
+        snap_stock=Subquery(snapshots.values("stock")[:1]),
+        snap_last_mv=Subquery(snapshots.values("last_movement_id")[:1]),
+    ).values_list("id", "mv_id", "mv_balance", "snap_stock", "snap_last_mv")
+
+    result, replay = {}, {}
+    for pid, mv_id, mv_balance, snap_stock, snap_last_mv in rows:
+        if snap_stock is not None and (mv_id is None or mv_id <= snap_last_mv):
+            result[pid] = snap_stock
+        elif mv_balance is not None:
+            result[pid] = mv_balance
+        elif mv_id is None:
+            result[pid] = 0
+        else:
+            replay[pid] = (snap_stock or 0, snap_last_mv or 0)
+
+    if replay:
+        pending = (
+            InventoryMovement.objects.filter(product_id__in=replay, created_at__lte=at)
+            .order_by("product_id", "created_at", "id")
+            .values_list("product_id", "id", "type", "qty", "balance_after")
+        )
+        state = {pid: base for pid, (base, _) in replay.items()}
+        for pid, mv_id, type_, qty, balance in pending.iterator(chunk_size=2000):
+            if mv_id <= replay[pid][1]:
+                continue
+            state[pid] = balance if balance is not None else apply_movement(state[pid], type_, qty)
+        result.update(state)
+    return result
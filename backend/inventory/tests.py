@@ -1,3 +1,178 @@
-from django.test import TestCase
+import unittest
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from backend.querybudget import QueryBudgetClient
+from catalog.models import Product
+
+from . import reorder
+from .models import InventoryMovement, SalesVelocity, StockSnapshot
+from .reorder import reorder_list, update_velocity
+from .services import register_movements, stock_as_of
+
+NUMPY = reorder.np  # antes de que los tests fuercen el camino sin NumPy
+
+
+class StockAsOfTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("bodega", password="x", role=User.OWNER)
+        self.client = QueryBudgetClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        self.product = Product.objects.create(code="S1", name="Ron", price=Decimal("5000"), stock=0)
+
+    def as_of(self):
+        r = self.client.get("/api/inventory/stock/as-of/", {"product": self.product.id})
+        self.assertEqual(r.status_code, 200)
+        return r.data["items"]
+
+    def test_reads_balance_from_the_ledger(self):
+        register_movements([(self.product.id, 10)], "IN", reason="compra")
+        register_movements([(self.product.id, 3)], "OUT", reason="venta")
+        self.assertEqual(self.as_of(), [{"product": self.product.id, "stock": 7}])
+
+    def test_replays_history_without_balance_within_budget(self):
+        # Historial previo al ledger: sin balance_after, se reproduce desde 0.
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(product=self.product, type="IN", qty=10),
+            InventoryMovement(product=self.product, type="OUT", qty=4),
+        ])
+        self.assertEqual(self.as_of(), [{"product": self.product.id, "stock": 6}])
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(code="L1", name="Vodka", price=Decimal("7000"), stock=5)
+
+    def balances(self):
+        return list(InventoryMovement.objects.order_by("id").values_list("balance_after", flat=True))
+
+    def test_movements_carry_running_balances(self):
+        register_movements([(self.product.id, 2), (self.product.id, 1)], "OUT", reason="SALE")
+        register_movements([(self.product.id, 10)], "OUT", reason="SALE")  # el stock no baja de 0
+        register_movements([(self.product.id, 4)], "IN", reason="VOID")
+        self.assertEqual(self.balances(), [3, 2, 0, 4])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 4)
+
+    def test_rebuild_fills_history_backwards_and_takes_a_snapshot(self):
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(product=self.product, type="IN", qty=9),
+            InventoryMovement(product=self.product, type="OUT", qty=4),
+        ])
+        call_command("rebuild_stock_ledger", stdout=StringIO())
+        self.assertEqual(self.balances(), [9, 5])
+        self.assertEqual(list(StockSnapshot.objects.values_list("product_id", "stock")), [(self.product.id, 5)])
+        self.assertEqual(stock_as_of(timezone.now(), [self.product.id]), {self.product.id: 5})
+
+
+class LedgerWritesTests(TestCase):
+    """Toda escritura de stock por la API deja su movimiento con saldo."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("bodega", password="x", role=User.OWNER))
+        self.product = Product.objects.create(code="W1", name="Gin", price=Decimal("9000"), stock=5)
+
+    def ledger(self):
+        return list(InventoryMovement.objects.order_by("id").values_list("type", "qty", "balance_after"))
+
+    def assert_stock(self, stock):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, stock)
+        self.assertEqual(stock_as_of(timezone.now(), [self.product.id]), {self.product.id: stock})
+
+    def test_posted_movement_updates_stock_and_cannot_be_edited(self):
+        r = self.client.post("/api/inventory/movements/", {
+            "product": self.product.id, "type": "IN", "qty": 7, "reason": "Compra",
+        }, format="json")
+        self.assertEqual(r.status_code, 201, r.data)
+        self.assertEqual((r.data["balance_after"], r.data["reason"]), (12, "Compra"))
+        self.assert_stock(12)
+        url = f"/api/inventory/movements/{r.data['id']}/"
+        self.assertEqual(self.client.patch(url, {"qty": 1}, format="json").status_code, 405)
+        self.assertEqual(self.client.delete(url).status_code, 405)
+
+    def test_product_stock_edits_go_through_the_ledger(self):
+        url = f"/api/products/{self.product.id}/"
+        self.assertEqual(self.client.patch(url, {"stock": 2}, format="json").data["stock"], 2)
+        self.client.patch(url, {"stock": 2, "price": "9500"}, format="json")  # sin cambio de stock
+        self.assertEqual(self.ledger(), [("ADJ", -3, 2)])
+        self.assert_stock(2)
+
+        r = self.client.post("/api/products/", {"code": "W2", "name": "Tónica", "price": "1500", "stock": 24}, format="json")
+        self.assertEqual((r.status_code, r.data["stock"]), (201, 24))
+        self.assertEqual(
+            list(InventoryMovement.objects.filter(product_id=r.data["id"]).values_list("type", "qty", "balance_after", "reason")),
+            [("ADJ", 24, 24, "ALTA")],
+        )
+
+
+@override_settings(REORDER_EWMA_ALPHA=0.5)
+class SalesVelocityTests(TestCase):
+    """Por el camino en Python puro (NumPy es opcional y no siempre está instalado)."""
+    MONDAY = date(2026, 1, 5)
+
+    def setUp(self):
+        self.product = Product.objects.create(code="V1", name="Cerveza", price=Decimal("1000"), stock=100,
+                                              min_stock=120, critical_stock=10)
+        patcher = mock.patch.object(reorder, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def move(self, type_, qty, day, reason="SALE"):
+        """Movimiento a las 12:00 hora de Santiago (15:00 UTC) de `day`."""
+        [mv] = register_movements([(self.product.id, qty)], type_, reason=reason)
+        at = datetime(day.year, day.month, day.day, 15, tzinfo=dt_timezone.utc)
+        InventoryMovement.objects.filter(pk=mv.pk).update(created_at=at)
+
+    def rates(self):
+        return SalesVelocity.objects.get(product=self.product).rates
+
+    def test_closed_days_update_weekday_rates_incrementally(self):
+        self.move("OUT", 4, self.MONDAY)
+        self.move("IN", 1, self.MONDAY, reason="VOID")  # la anulación descuenta
+        self.move("IN", 50, self.MONDAY, reason="PURCHASE")  # una compra no es venta
+        tuesday = date(2026, 1, 6)
+        self.assertEqual(update_velocity(today=tuesday)["closed_days"], 1)
+        self.assertEqual(self.rates()[0], 1.5)
+        self.assertEqual(update_velocity(today=tuesday)["closed_days"], 0)
+
+        # Confirmada después de cerrar el lunes: cuenta en el primer día abierto.
+        self.move("OUT", 2, self.MONDAY)
+        update_velocity(today=date(2026, 1, 7))
+        self.assertEqual(self.rates()[:2], [1.5, 1.0])
+
+    def test_reorder_list_suggests_low_stock_products(self):
+        self.move("OUT", 10, self.MONDAY)
+        update_velocity(today=date(2026, 1, 6))
+        [item] = reorder_list()["items"]
+        self.assertEqual((item["product_id"], item["estado"]), (self.product.id, "bajo"))
+        # Tasa corregida: 10 los lunes y 0 el resto; 14 días siempre tienen dos lunes.
+        self.assertEqual((item["sugerido"], item["velocidad_diaria"]), (20 + 120 - 90, 1.43))
+
+    def test_reorder_endpoint_filters_by_status(self):
+        self.move("OUT", 10, self.MONDAY)
+        update_velocity(today=date(2026, 1, 6))
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("bodega", password="x", role=User.OWNER))
+        r = client.get("/api/inventory/reorder/")
+        self.assertEqual([it["code"] for it in r.data["items"]], ["V1"])
+        self.assertEqual(r.data["velocidad_hasta"], self.MONDAY)
+        self.assertEqual(client.get("/api/inventory/reorder/", {"estado": "critico"}).data["items"], [])
+
+    @unittest.skipIf(NUMPY is None, "NumPy no está instalado")
+    def test_numpy_forecast_matches_python(self):
+        rates = [[10.0, 0, 0, 0, 0, 0, 2.5], [0.0] * 7, [1.0] * 7]
+        args = (rates, [90, 5, 3], ([0] * 3, [10, 0, 5], [120, 1, 2]), [(2 + i) % 7 for i in range(60)], 14)
+        expected = reorder._forecast(*args)
+        with mock.patch.object(reorder, "np", NUMPY):
+            self.assertEqual(reorder._forecast(*args), expected)
@@ -1,18 +1,77 @@
-from rest_framework import viewsets, permissions, views
+from rest_framework import mixins, viewsets, permissions, views
 from rest_framework.response import Response
+from backend.conditional import ConditionalGetMixin
+from backend.pagination import CreatedAtPagination
+from .filters import InventoryMovementFilter
 from .models import InventoryMovement
 from .serializers import InventoryMovementSerializer
 from catalog.models import Product
+from backend.filters import parse_bound
+from datetime import timedelta
+from django.utils import timezone
+from backend.respcache import STALE
+from .reorder import reorder_cache
+from backend.sqlite import immediate_atomic
+from .services import register_movement, stock_as_of, stock_cache
 
-# Para listar movimientos
-class InventoryMovementViewSet(viewsets.ModelViewSet):
-    queryset = InventoryMovement.objects.all().order_by("-id")
+# Para listar movimientos y registrar entradas/salidas/ajustes manuales. Los
+# movimientos no se editan ni borran: cada uno guarda el saldo resultante.
+class InventoryMovementViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
+                               mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = InventoryMovement.objects.all().order_by("-created_at", "-id")
     serializer_class = InventoryMovementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtPagination
+    filterset_class = InventoryMovementFilter
+    max_queries = {"list": 2, "retrieve": 2}
+
+    @immediate_atomic(label="movement")
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        serializer.instance = register_movement(data["product"], data["type"], data["qty"], reason=data.get("reason", ""))
+
+# Stock a una fecha/hora: ?at=<ISO datetime o YYYY-MM-DD>&product=1&product=2
+class StockAsOfView(views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    max_queries = 3  # usuario, saldos por producto y el tramo a reproducir
+    def get(self, request):
+        raw = request.query_params.get("at")
+        at, is_day = parse_bound(raw, end=True) if raw else (timezone.now(), False)
+        if at is None:
+            return Response({"error": "at inválido"}, status=400)
+        if is_day:
+            at -= timedelta(microseconds=1)  # un día = su cierre
+        product_ids = None
+        raw_ids = request.query_params.getlist("product")
+        if raw_ids:
+            try:
+                product_ids = [int(x) for v in raw_ids for x in v.split(",") if x]
+            except ValueError:
+                return Response({"error": "product inválido"}, status=400)
+        stock = stock_as_of(at, product_ids)
+        return Response({
+            "at": at.isoformat(),
+            "items": [{"product": pid, "stock": qty} for pid, qty in sorted(stock.items())],
+        })
 
 # Para ver el stock de todos los productos
-class StockView(views.APIView):
+class StockView(ConditionalGetMixin, views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    max_queries = 3
+    conditional_models = (Product,)
+    def get(self, request):
+        rows, result, served = stock_cache.lookup(self.conditional_state)
+        if result == STALE:
+            self.serve_version(served)
+        return Response(rows, headers={"X-Response-Cache": result})
+
+# Sugerencias de reposición (ver inventory/reorder.py); ?estado=critico|bajo|pronto
+class ReorderView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    max_queries = 4
     def get(self, request):
-        qs = Product.objects.values("id","name","price","stock").order_by("name")
-        return Response(list(qs))
+        data, result = reorder_cache.get()
+        status = request.query_params.get("estado")
+        if status:
+            data = {**data, "items": [it for it in data["items"] if it["estado"] == status]}
+        return Response(data, headers={"X-Response-Cache": result})
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotion',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=1, editable=False),
+        ),
+    ]
@@ -10,3 +10,4 @@ class Promotion(models.Model):
     active = models.BooleanField(default=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     products = models.ManyToManyField(Product, blank=True)
+    version = models.BigIntegerField(default=1, db_index=True, editable=False)  # ver sync/services.py
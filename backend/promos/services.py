@@ -1,5 +1,11 @@
 # promos/services.py
+import threading
+import time
 from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+
+from sales.models import SaleItem
 from .models import Promotion
 
 CLP_QUANT = Decimal("1")
@@ -53,9 +59,88 @@ def _active_promotions():
     return promos
 
 
+class PromotionIndex:
+    """
+    Índice en memoria de las promociones activas.
+
+    Por cada producto y cada categoría guarda el mayor % y el mayor monto fijo
+    aplicables, así el mejor descuento de una línea es un par de lookups en
+    diccionario. Se invalida con las señales de Promotion (ver promos/signals.py)
+    y, como red de seguridad entre procesos, se reconstruye pasado PROMO_INDEX_TTL.
+    Una reconstrucción que empezó antes de una invalidación no guarda su
+    resultado (igual que catalog/barcode.py), así no queda un índice armado
+    con datos previos al cambio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # una sola reconstrucción a la vez
+        self._state_lock = threading.Lock()
+        self._snapshot = None  # (built_at, promos, by_product, by_category)
+        self._generation = 0  # sube con cada invalidación
+
+    def invalidate(self):
+        with self._state_lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def _ttl(self):
+        return getattr(settings, "PROMO_INDEX_TTL", 60)
+
+    def _build(self):
+        promos = _active_promotions()
+        by_product, by_category = {}, {}
+        for promo in promos:
+            keys = [(by_product, pid) for pid in _product_ids(promo)]
+            if promo.category_id:
+                keys.append((by_category, promo.category_id))
+            for table, key in keys:
+                pct, fixed = table.get(key, (None, None))
+                if promo.type == Promotion.PCT:
+                    pct = promo.value if pct is None else max(pct, promo.value)
+                else:
+                    fixed = promo.value if fixed is None else max(fixed, promo.value)
+                table[key] = (pct, fixed)
+        return (time.monotonic(), promos, by_product, by_category)
+
+    def _get(self):
+        snap = self._snapshot
+        if snap is None or time.monotonic() - snap[0] > self._ttl():
+            with self._lock:
+                snap = self._snapshot
+                if snap is None or time.monotonic() - snap[0] > self._ttl():
+                    with self._state_lock:
+                        generation = self._generation
+                    snap = self._build()
+                    with self._state_lock:
+                        if self._generation == generation:
+                            self._snapshot = snap
+        return snap
+
+    def promotions(self):
+        return list(self._get()[1])
+
+    def best_unit_discount(self, product, unit_price: Decimal) -> Decimal:
+        _, _, by_product, by_category = self._get()
+        best = Decimal("0")
+        for entry in (by_product.get(product.pk), by_category.get(product.category_id)):
+            if entry is None:
+                continue
+            pct, fixed = entry
+            if pct is not None:
+                best = max(best, unit_price * pct / Decimal("100"))
+            if fixed is not None:
+                best = max(best, Decimal(fixed))
+        if best > unit_price:
+            best = unit_price
+        return _quantize_clp(best)
+
+
+promotion_index = PromotionIndex()
+
+
 def best_unit_discount(product, unit_price: Decimal, promos=None) -> Decimal:
     if promos is None:
-        promos = _active_promotions()
+        return promotion_index.best_unit_discount(product, unit_price)
     best = Decimal("0")
     for promo in promos:
         disc = _unit_discount_for(product, unit_price, promo)
@@ -65,23 +150,30 @@ def best_unit_discount(product, unit_price: Decimal, promos=None) -> Decimal:
 
 
 def get_active_promotions():
-    return _active_promotions()
+    return promotion_index.promotions()
 
 
-def apply_promotions_to_sale(sale):
+def price_sale_items(items, promos=None):
     """
-    Recalcula el 'discount' por unidad de cada ítem de la venta
-    usando la mejor promoción disponible (sin acumulación).
+    Asigna en memoria el 'discount' por unidad de cada ítem (sin tocar la BD).
+    Devuelve los ítems cuyo descuento cambió.
     """
-    promos = _active_promotions()
-    if not promos:
-        # Si no hay promociones activas dejamos los descuentos en cero
-        sale.items.exclude(discount=Decimal("0")).update(discount=Decimal("0"))
-        return sale
-
-    for it in sale.items.select_related("product__category"):
+    changed = []
+    for it in items:
         best = best_unit_discount(it.product, it.unit_price, promos)
         if it.discount != best:
             it.discount = best
-            it.save(update_fields=["discount"])
+            changed.append(it)
+    return changed
+
+
+def apply_promotions_to_sale(sale):
+    """
+    Recalcula el 'discount' por unidad de cada ítem de la venta
+    usando la mejor promoción disponible (sin acumulación).
+    """
+    items = list(sale.items.select_related("product__category"))
+    changed = price_sale_items(items)
+    if changed:
+        SaleItem.objects.bulk_update(changed, ["discount"])
     return sale
@@ -0,0 +1,33 @@
+# promos/signals.py
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.models import Category
+from .models import Promotion
+from .services import promotion_index
+
+
+def _invalidate_index():
+    # Invalida ya y de nuevo al confirmar la transacción, para no quedarnos
+    # con un índice reconstruido a partir de datos aún no confirmados.
+    promotion_index.invalidate()
+    transaction.on_commit(promotion_index.invalidate)
+
+
+@receiver(post_save, sender=Promotion)
+@receiver(post_delete, sender=Promotion)
+def promotion_changed(sender, **kwargs):
+    _invalidate_index()
+
+
+@receiver(m2m_changed, sender=Promotion.products.through)
+def promotion_products_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        _invalidate_index()
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, **kwargs):
+    # on_delete=SET_NULL actualiza las promociones sin emitir post_save.
+    _invalidate_index()
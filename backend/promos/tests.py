@@ -1,3 +1,64 @@
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from catalog.models import Category, Product
+
+from . import services
+from .models import Promotion
+from .services import best_unit_discount, promotion_index
+
+
+class PromotionIndexTests(TestCase):
+    def setUp(self):
+        self.beers = Category.objects.create(name="Cervezas")
+        self.wines = Category.objects.create(name="Vinos")
+        self.products = [
+            Product.objects.create(code=f"P{i}", name=f"Producto {i}", category=category, price=Decimal("1990"))
+            for i, category in enumerate((self.beers, self.beers, self.wines, None))
+        ]
+        promotion_index.invalidate()
+
+    def discount(self, product, price="1990"):
+        return promotion_index.best_unit_discount(product, Decimal(price))
+
+    def test_matches_the_per_promotion_lookup(self):
+        Promotion.objects.create(name="Cervezas 15%", type=Promotion.PCT, value=Decimal("15"), category=self.beers)
+        Promotion.objects.create(name="Fijo 250", type=Promotion.FIXED, value=Decimal("250")).products.set(self.products[:1])
+        Promotion.objects.create(name="Vinos 12,5%", type=Promotion.PCT, value=Decimal("12.5"), category=self.wines)
+        Promotion.objects.create(name="Regalo", type=Promotion.FIXED, value=Decimal("5000")).products.set(self.products[2:3])
+        Promotion.objects.create(name="Inactiva", type=Promotion.PCT, value=Decimal("90"), active=False).products.set(self.products)
+        legacy = list(Promotion.objects.prefetch_related("products"))
+        for product in self.products:
+            for price in ("1990", "999", "100"):
+                with self.subTest(product=product.code, price=price):
+                    self.assertEqual(self.discount(product, price), best_unit_discount(product, Decimal(price), legacy))
+        self.assertEqual(self.discount(self.products[0]), Decimal("299"))  # 15% de 1990 > 250
+        self.assertEqual(self.discount(self.products[2]), Decimal("1990"))  # tope: el precio
+
+    def test_signals_invalidate_the_index(self):
+        product = self.products[3]
+        self.assertEqual(self.discount(product), Decimal("0"))
+        promo = Promotion.objects.create(name="Fijo 100", type=Promotion.FIXED, value=Decimal("100"))
+        promo.products.add(product)
+        self.assertEqual(self.discount(product), Decimal("100"))
+        promo.value = Decimal("300")
+        promo.save()
+        self.assertEqual(self.discount(product), Decimal("300"))
+        promo.delete()
+        self.assertEqual(self.discount(product), Decimal("0"))
+
+    def test_build_overlapping_an_invalidation_is_not_kept(self):
+        real_active = services._active_promotions
+
+        def invalidated_meanwhile():
+            promos = real_active()
+            promotion_index.invalidate()  # llega la señal de otro cambio durante la lectura
+            return promos
+
+        with mock.patch.object(services, "_active_promotions", side_effect=invalidated_meanwhile):
+            promotion_index.promotions()
+        self.assertIsNone(promotion_index._snapshot)
+        promotion_index.promotions()
+        self.assertIsNotNone(promotion_index._snapshot)
@@ -1,9 +1,12 @@
 from rest_framework import viewsets, permissions
+from backend.conditional import ConditionalGetMixin
 from .models import Promotion
 from .serializers import PromotionSerializer
 from accounts.permissions import IsOwnerOrAdmin
 
-class PromotionViewSet(viewsets.ModelViewSet):
-    queryset = Promotion.objects.all().order_by("-id")
+class PromotionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Promotion.objects.prefetch_related("products").order_by("-id")
     serializer_class = PromotionSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
+    max_queries = {"list": 4, "retrieve": 4}
+    conditional_models = (Promotion,)
@@ -1,3 +1,20 @@
 from django.contrib import admin
+from .models import DailySales, HourlyProductSales, HourlySales
 
-# Register your models here.
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ("day","payment_method","seller","sales_count","total","void_count","void_total")
+    list_filter  = ("payment_method",)
+    date_hierarchy = "day"
+
+@admin.register(HourlySales)
+class HourlySalesAdmin(admin.ModelAdmin):
+    list_display = ("day","hour","seller","sales_count","total","void_count","void_total")
+    list_select_related = ("seller",)
+    date_hierarchy = "day"
+
+@admin.register(HourlyProductSales)
+class HourlyProductSalesAdmin(admin.ModelAdmin):
+    list_display = ("day","hour","product","qty","amount")
+    list_select_related = ("product",)
+    date_hierarchy = "day"
@@ -0,0 +1,96 @@
+"""
+Cubo de ventas para /api/reports/analytics/, desde los hechos por hora
+(HourlySales, HourlyProductSales) y nunca desde SaleItem.
+
+El heatmap día de semana x hora se arma con NumPy si está instalado (np.add.at
+sobre los ~24 registros por día del rango); si no, con el mismo cálculo en
+Python puro.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F, Sum
+
+from .models import HourlyProductSales, HourlySales
+
+try:
+    import numpy as np
+except ImportError:  # opcional
+    np = None
+
+WEEKDAYS = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+
+
+def weekday_occurrences(date_from, date_to):
+    """Cuántas veces aparece cada día de semana (0=lunes) en [date_from, date_to]."""
+    days = (date_to - date_from).days + 1
+    counts = [days // 7] * 7
+    for i in range(days % 7):
+        counts[(date_from + timedelta(days=i)).weekday()] += 1
+    return counts
+
+
+def pivot(rows, occurrences):
+    """
+    rows: (día, hora, ventas, total). Devuelve matrices 7x24 (fila = día de
+    semana) con ventas, total y total promedio por ocurrencia del día de semana.
+    """
+    if np is not None:
+        rows = list(rows)
+        weekday = np.fromiter((r[0].weekday() for r in rows), dtype=np.intp, count=len(rows))
+        hour = np.fromiter((r[1] for r in rows), dtype=np.intp, count=len(rows))
+        sales = np.zeros((7, 24), dtype=np.int64)
+        totals = np.zeros((7, 24))
+        np.add.at(sales, (weekday, hour), np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows)))
+        np.add.at(totals, (weekday, hour), np.fromiter((r[3] for r in rows), dtype=float, count=len(rows)))
+        average = totals / np.maximum(np.asarray(occurrences, dtype=float), 1)[:, None]
+        return sales.tolist(), np.round(totals, 2).tolist(), np.round(average, 2).tolist()
+
+    sales = [[0] * 24 for _ in range(7)]
+    totals = [[0.0] * 24 for _ in range(7)]
+    for day, hour, count, total in rows:
+        sales[day.weekday()][hour] += count
+        totals[day.weekday()][hour] += float(total)
+    average = [[round(v / max(occurrences[wd], 1), 2) for v in totals[wd]] for wd in range(7)]
+    return sales, [[round(v, 2) for v in row] for row in totals], average
+
+
+def analytics(date_from, date_to, seller=None, top=50):
+    facts = HourlySales.objects.filter(day__gte=date_from, day__lte=date_to)
+    product_facts = HourlyProductSales.objects.filter(day__gte=date_from, day__lte=date_to)
+    if seller:
+        facts = facts.filter(seller_id=seller)
+        product_facts = product_facts.none()  # los hechos por producto no distinguen vendedor
+
+    by_hour = facts.values_list("day", "hour").annotate(n=Sum("sales_count"), t=Sum("total")).order_by()
+    sales, totals, average = pivot(((d, h, n or 0, t or Decimal("0")) for d, h, n, t in by_hour),
+                                   weekday_occurrences(date_from, date_to))
+
+    by_seller = (
+        facts.values("seller_id", seller_name=F("seller__username"))
+        .annotate(ventas=Sum("sales_count"), total=Sum("total"), anuladas=Sum("void_count"), total_anulado=Sum("void_total"))
+        .order_by("-total")
+    )
+    by_product = (
+        product_facts.values("product_id", product_name=F("product__name"))
+        .annotate(unidades=Sum("qty"), total=Sum("amount"))
+        .order_by("-total", "product_id")[:top]
+    )
+    by_category = (
+        product_facts.values(category_id=F("product__category_id"), category_name=F("product__category__name"))
+        .annotate(unidades=Sum("qty"), total=Sum("amount"))
+        .order_by("-total")
+    )
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "heatmap": {
+            "dias": WEEKDAYS,
+            "ventas": sales,
+            "total": totals,
+            "promedio_total": average,
+        },
+        "por_vendedor": list(by_seller),
+        "por_categoria": list(by_category),
+        "por_producto": list(by_product),
+    }
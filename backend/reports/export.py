@@ -0,0 +1,104 @@
+# reports/export.py
+"""Exportación de ítems de venta en streaming (memoria constante)."""
+import csv
+import tempfile
+from decimal import Decimal
+
+from openpyxl import Workbook
+
+from backend.filters import parse_bound
+from sales.models import SaleItem
+
+CHUNK_SIZE = 2000
+
+# nombre de columna -> (campos de values_list que necesita, función que arma el valor)
+COLUMNS = {
+    "venta_id": (("sale_id",), lambda r: r["sale_id"]),
+    "fecha": (("sale__created_at",), lambda r: r["sale__created_at"].isoformat()),
+    "estado": (("sale__status",), lambda r: r["sale__status"]),
+    "medio_pago": (("sale__payment_method",), lambda r: r["sale__payment_method"]),
+    "vendedor": (("sale__user__username",), lambda r: r["sale__user__username"]),
+    "codigo": (("product__code",), lambda r: r["product__code"]),
+    "producto": (("product__name",), lambda r: r["product__name"]),
+    "qty": (("qty",), lambda r: r["qty"]),
+    "unit_price": (("unit_price",), lambda r: r["unit_price"]),
+    "discount": (("discount",), lambda r: r["discount"]),
+    "total_linea": (
+        ("unit_price", "discount", "qty"),
+        lambda r: (r["unit_price"] - r["discount"]) * r["qty"],
+    ),
+}
+DEFAULT_COLUMNS = ["venta_id", "producto", "qty", "unit_price", "discount", "total_linea"]
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_columns(raw):
+    if not raw:
+        return list(DEFAULT_COLUMNS)
+    columns = [c.strip() for c in raw.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown or not columns:
+        raise ExportError(f"Columnas desconocidas: {', '.join(unknown)}. Disponibles: {', '.join(COLUMNS)}")
+    return columns
+
+
+def export_queryset(params):
+    """SaleItem filtrado por date_from/date_to, session, product, status y seller."""
+    qs = SaleItem.objects.all()
+    for param, lookup, end in (("date_from", "sale__created_at__gte", False), ("date_to", "sale__created_at__lt", True)):
+        if params.get(param):
+            bound, is_day = parse_bound(params[param], end=end)
+            if bound is None:
+                raise ExportError(f"{param} inválido")
+            if end and not is_day:
+                lookup = "sale__created_at__lte"
+            qs = qs.filter(**{lookup: bound})
+    for param, lookup in (("session", "sale__session"), ("product", "product"),
+                          ("status", "sale__status"), ("seller", "sale__user")):
+        if params.get(param):
+            qs = qs.filter(**{lookup: params[param]})
+    return qs.order_by("sale_id", "id")
+
+
+def iter_rows(qs, columns):
+    fields = []
+    for col in columns:
+        for f in COLUMNS[col][0]:
+            if f not in fields:
+                fields.append(f)
+    builders = [COLUMNS[col][1] for col in columns]
+    for values in qs.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        row = dict(zip(fields, values))
+        yield [build(row) for build in builders]
+
+
+class _Echo:
+    """Pseudo-buffer: csv.writer devuelve la línea en vez de acumularla."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(qs, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in iter_rows(qs, columns):
+        yield writer.writerow(row)
+
+
+def write_xlsx(qs, columns):
+    """
+    Escribe el libro en modo write-only (filas directo a disco) y devuelve el
+    archivo temporal listo para enviarse; se borra al cerrarse.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Items")
+    ws.append(columns)
+    for row in iter_rows(qs, columns):
+        ws.append([float(v) if isinstance(v, Decimal) else v for v in row])
+    tmp = tempfile.TemporaryFile(suffix=".xlsx")
+    wb.save(tmp)
+    tmp.seek(0)
+    return tmp
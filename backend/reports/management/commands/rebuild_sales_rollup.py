@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reports.services import rebuild_daily_sales, rebuild_hourly_sales
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el resumen diario (DailySales) y los hechos por hora (HourlySales, HourlyProductSales)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="Día local inicial (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="date_to", help="Día local final, inclusive (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        bounds = []
+        for name in ("date_from", "date_to"):
+            raw = options.get(name)
+            value = parse_date(raw) if raw else None
+            if raw and value is None:
+                raise CommandError(f"Fecha inválida: {raw}")
+            bounds.append(value)
+        rows = rebuild_daily_sales(*bounds)
+        self.stdout.write(self.style.SUCCESS(f"Resumen diario reconstruido: {rows} filas."))
+        rows = rebuild_hourly_sales(*bounds)
+        self.stdout.write(self.style.SUCCESS(f"Hechos por hora reconstruidos: {rows} filas de ventas por vendedor."))
@@ -1,3 +1,56 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class DailySales(models.Model):
+    """
+    Resumen diario de ventas por día local de la tienda, medio de pago y vendedor.
+    Lo mantienen checkout_sale/void_sale dentro de su transacción; el comando
+    rebuild_sales_rollup lo reconstruye desde Sale.
+    """
+    day = models.DateField()
+    payment_method = models.CharField(max_length=20)
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="+")
+    sales_count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    void_count = models.IntegerField(default=0)
+    void_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "payment_method", "seller"], name="daily_sales_key"),
+        ]
+
+
+class HourlySales(models.Model):
+    """
+    Hechos por hora local de la tienda (0-23), día y vendedor para
+    /api/reports/analytics/. Los mantienen checkout_sale/void_sale igual que
+    DailySales; rebuild_sales_rollup los reconstruye.
+    """
+    day = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="+")
+    sales_count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    void_count = models.IntegerField(default=0)
+    void_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "hour", "seller"], name="hourly_sales_key"),
+        ]
+
+
+class HourlyProductSales(models.Model):
+    """Unidades y monto neto (precio - descuento) por hora local, día y producto; sin anuladas."""
+    day = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    product = models.ForeignKey("catalog.Product", on_delete=models.CASCADE, related_name="+")
+    qty = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "hour", "product"], name="hourly_product_key"),
+        ]
@@ -0,0 +1,209 @@
+# reports/services.py
+import datetime
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import ExtractHour, TruncDate
+
+from backend.respcache import ResponseCache
+from catalog.models import Product
+from sales.models import Sale, SaleItem
+from .models import DailySales, HourlyProductSales, HourlySales
+
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+
+def store_tz():
+    return ZoneInfo(getattr(settings, "STORE_TIME_ZONE", settings.TIME_ZONE))
+
+
+def local_day(dt):
+    """Día calendario de la tienda para un datetime aware."""
+    return dt.astimezone(store_tz()).date()
+
+
+def day_bounds(date_from=None, date_to=None):
+    """Convierte días locales [date_from, date_to] en datetimes aware [inicio, fin)."""
+    tz = store_tz()
+    start = datetime.datetime.combine(date_from, datetime.time.min, tzinfo=tz) if date_from else None
+    end = (
+        datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+        if date_to else None
+    )
+    return start, end
+
+
+def _key(sale):
+    return {"day": local_day(sale.created_at), "payment_method": sale.payment_method, "seller_id": sale.user_id}
+
+
+def _slot(sale):
+    """(día, hora) locales de la venta."""
+    local = sale.created_at.astimezone(store_tz())
+    return local.date(), local.hour
+
+
+def _hour_key(sale):
+    day, hour = _slot(sale)
+    return {"day": day, "hour": hour, "seller_id": sale.user_id}
+
+
+def _bump(sale, **deltas):
+    _bump_key(_key(sale), deltas)
+    _bump_key(_hour_key(sale), deltas, model=HourlySales)
+
+
+def _bump_key(key, deltas, model=DailySales):
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT.
+        model.objects.filter(**key).update(**updates)
+
+
+def _product_lines(sales_items, sign=1):
+    """[(venta, ítems)] -> {(día, hora): {product_id: (unidades, monto)}}."""
+    slots = {}
+    for sale, items in sales_items:
+        lines = slots.setdefault(_slot(sale), {})
+        for it in items:
+            qty, amount = lines.get(it.product_id, (0, Decimal("0")))
+            lines[it.product_id] = (qty + sign * it.qty, amount + sign * (it.unit_price - it.discount) * it.qty)
+    return slots
+
+
+def _bump_products(slots):
+    """Dos consultas por hora: INSERT de las filas que falten (se ignoran las existentes) y un UPDATE ... CASE."""
+    for (day, hour), lines in slots.items():
+        HourlyProductSales.objects.bulk_create(
+            [HourlyProductSales(day=day, hour=hour, product_id=pid) for pid in lines], ignore_conflicts=True,
+        )
+        HourlyProductSales.objects.filter(day=day, hour=hour, product_id__in=lines).update(
+            qty=F("qty") + Case(*[When(product_id=pid, then=Value(qty)) for pid, (qty, _) in lines.items()],
+                                output_field=IntegerField()),
+            amount=F("amount") + Case(*[When(product_id=pid, then=Value(amount)) for pid, (_, amount) in lines.items()],
+                                      output_field=AMOUNT_FIELD),
+        )
+
+
+def record_checkout(sale, items=None):
+    _bump(sale, sales_count=1, total=sale.total or Decimal("0"))
+    _bump_products(_product_lines([(sale, items if items is not None else list(sale.items.all()))]))
+
+
+def record_checkouts(sales, items=None):
+    """record_checkout para un lote: una actualización por (día, medio, vendedor) y por (día, hora, vendedor)."""
+    if items is None:
+        items = list(SaleItem.objects.filter(sale__in=sales))
+    by_sale = {}
+    for it in items:
+        by_sale.setdefault(it.sale_id, []).append(it)
+    for key_fn, model in ((_key, DailySales), (_hour_key, HourlySales)):
+        grouped = {}
+        for sale in sales:
+            key = tuple(key_fn(sale).items())
+            count, total = grouped.get(key, (0, Decimal("0")))
+            grouped[key] = (count + 1, total + (sale.total or Decimal("0")))
+        for key, (count, total) in grouped.items():
+            _bump_key(dict(key), {"sales_count": count, "total": total}, model=model)
+    _bump_products(_product_lines([(sale, by_sale.get(sale.id, ())) for sale in sales]))
+
+
+def record_void(sale, items=None):
+    amount = sale.total or Decimal("0")
+    _bump(sale, sales_count=-1, total=-amount, void_count=1, void_total=amount)
+    _bump_products(_product_lines([(sale, items if items is not None else list(sale.items.all()))], sign=-1))
+
+
+@transaction.atomic
+def rebuild_daily_sales(date_from=None, date_to=None):
+    """Recalcula el resumen para el rango de días locales dado (o todo el historial)."""
+    rollup = DailySales.objects.all()
+    sales = Sale.objects.all()
+    start, end = day_bounds(date_from, date_to)
+    if date_from:
+        rollup = rollup.filter(day__gte=date_from)
+        sales = sales.filter(created_at__gte=start)
+    if date_to:
+        rollup = rollup.filter(day__lte=date_to)
+        sales = sales.filter(created_at__lt=end)
+    rollup.delete()
+
+    rows = {}
+    grouped = (
+        sales.annotate(day=TruncDate("created_at", tzinfo=store_tz()))
+        .values("day", "payment_method", "user_id", "status")
+        .annotate(n=Count("id"), amount=Sum("total"))
+    )
+    for g in grouped:
+        key = (g["day"], g["payment_method"], g["user_id"])
+        row = rows.setdefault(key, DailySales(day=key[0], payment_method=key[1], seller_id=key[2]))
+        if g["status"] == Sale.VOID:
+            row.void_count += g["n"]
+            row.void_total += g["amount"] or 0
+        else:
+            row.sales_count += g["n"]
+            row.total += g["amount"] or 0
+    DailySales.objects.bulk_create(rows.values(), batch_size=500)
+    return len(rows)
+
+
+@transaction.atomic
+def rebuild_hourly_sales(date_from=None, date_to=None):
+    """Recalcula los hechos por hora (HourlySales y HourlyProductSales) del rango de días locales dado."""
+    tz = store_tz()
+    facts, product_facts = HourlySales.objects.all(), HourlyProductSales.objects.all()
+    sales, items = Sale.objects.all(), SaleItem.objects.filter(sale__status=Sale.OK)
+    start, end = day_bounds(date_from, date_to)
+    if date_from:
+        facts, product_facts = facts.filter(day__gte=date_from), product_facts.filter(day__gte=date_from)
+        sales, items = sales.filter(created_at__gte=start), items.filter(sale__created_at__gte=start)
+    if date_to:
+        facts, product_facts = facts.filter(day__lte=date_to), product_facts.filter(day__lte=date_to)
+        sales, items = sales.filter(created_at__lt=end), items.filter(sale__created_at__lt=end)
+    facts.delete()
+    product_facts.delete()
+
+    rows = {}
+    grouped = (
+        sales.annotate(day=TruncDate("created_at", tzinfo=tz), hour=ExtractHour("created_at", tzinfo=tz))
+        .values("day", "hour", "user_id", "status")
+        .annotate(n=Count("id"), amount=Sum("total"))
+    )
+    for g in grouped:
+        key = (g["day"], g["hour"], g["user_id"])
+        row = rows.setdefault(key, HourlySales(day=key[0], hour=key[1], seller_id=key[2]))
+        if g["status"] == Sale.VOID:
+            row.void_count += g["n"]
+            row.void_total += g["amount"] or 0
+        else:
+            row.sales_count += g["n"]
+            row.total += g["amount"] or 0
+    HourlySales.objects.bulk_create(rows.values(), batch_size=500)
+
+    lines = (
+        items.annotate(day=TruncDate("sale__created_at", tzinfo=tz), hour=ExtractHour("sale__created_at", tzinfo=tz))
+        .values("day", "hour", "product_id")
+        .annotate(units=Sum("qty"), amount=Sum((F("unit_price") - F("discount")) * F("qty"), output_field=AMOUNT_FIELD))
+    )
+    HourlyProductSales.objects.bulk_create(
+        (HourlyProductSales(day=g["day"], hour=g["hour"], product_id=g["product_id"], qty=g["units"], amount=g["amount"] or 0)
+         for g in lines.iterator(chunk_size=2000)),
+        batch_size=500,
+    )
+    return len(rows)
+
+
+def _inventory_report():
+    return {"stock_critico": Product.objects.filter(stock__lte=0).count()}
+
+
+# Payload de /api/reports/inventory/; se invalida con el contador de Product.
+inventory_report_cache = ResponseCache("inventory_report", (Product,), _inventory_report)
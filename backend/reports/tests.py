@@ -1,3 +1,170 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.management import call_command
 from django.test import TestCase
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from catalog.models import Product
+
+from . import analytics
+from .models import DailySales, HourlyProductSales, HourlySales
+
+NUMPY = analytics.np  # antes de que los tests fuercen el camino sin NumPy
+
+
+def _facts():
+    rows = {}
+    for model in (DailySales, HourlySales, HourlyProductSales):
+        fields = [f.attname for f in model._meta.concrete_fields if f.name != "id"]
+        rows[model.__name__] = sorted(model.objects.values_list(*fields))
+    return rows
+
+
+class RollupParityTests(TestCase):
+    """Lo que mantienen checkout/anulación/carga masiva es lo mismo que reconstruye el comando."""
+
+    def setUp(self):
+        self.users = [User.objects.create_user(f"caja{i}", password="x", role=User.OWNER) for i in range(2)]
+        self.products = [
+            Product.objects.create(code=f"R{i}", name=f"Producto {i}", price=Decimal("1500"), stock=100)
+            for i in range(3)
+        ]
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def items(self, *qtys):
+        return [{"product": p.id, "qty": q, "unit_price": "1500"} for p, q in zip(self.products, qtys) if q]
+
+    def test_incremental_facts_match_rebuild(self):
+        first, second = (self.client_for(u) for u in self.users)
+        sales = [
+            first.post("/api/sales/", {"payment_method": "CASH", "items": self.items(1, 2, 0)}, format="json"),
+            first.post("/api/sales/", {"payment_method": "CARD", "items": self.items(0, 1, 3)}, format="json"),
+            second.post("/api/sales/", {"payment_method": "CASH", "items": self.items(4, 0, 1)}, format="json"),
+        ]
+        # Ventas offline de otros días y horas (hora local de la tienda).
+        second.post("/api/sales/bulk/", {"sales": [
+            {"client_key": "a", "created_at": "2026-01-05T02:30:00Z", "payment_method": "CASH", "items": self.items(1, 1, 1)},
+            {"client_key": "b", "created_at": "2026-01-05T15:10:00Z", "payment_method": "CARD", "items": self.items(2, 0, 0)},
+        ]}, format="json")
+        first.post(f"/api/sales/{sales[1].data['id']}/void/", {"reason": "error"}, format="json")
+
+        incremental = _facts()
+        self.assertTrue(all(incremental.values()))
+        for model in (DailySales, HourlySales, HourlyProductSales):
+            model.objects.all().delete()
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+        self.assertEqual(_facts(), incremental)
+
+
+class AnalyticsTests(TestCase):
+    """Por el camino en Python puro (NumPy es opcional y no siempre está instalado)."""
+
+    def setUp(self):
+        self.users = [User.objects.create_user(f"caja{i}", password="x", role=User.OWNER) for i in range(2)]
+        self.products = [
+            Product.objects.create(code=f"H{i}", name=f"Producto {i}", price=Decimal("1500"), stock=100) for i in range(2)
+        ]
+        # 2026-01-05 es lunes; Santiago está en UTC-3 en enero.
+        self.ingest(self.users[0], [("a", "2026-01-05T15:10:00Z", (1, 2)), ("b", "2026-01-05T15:40:00Z", (0, 1))])
+        self.ingest(self.users[1], [("c", "2026-01-06T23:30:00Z", (2, 0))])
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+        patcher = mock.patch.object(analytics, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ingest(self, user, sales):
+        client = APIClient()
+        client.force_authenticate(user)
+        client.post("/api/sales/bulk/", {"sales": [{
+            "client_key": key, "created_at": created_at, "payment_method": "CASH",
+            "items": [{"product": p.id, "qty": q, "unit_price": "1500"} for p, q in zip(self.products, qtys) if q],
+        } for key, created_at, qtys in sales]}, format="json")
+
+    def get(self, **params):
+        r = self.client.get("/api/reports/analytics/", {"date_from": "2026-01-05", "date_to": "2026-01-18", **params})
+        self.assertEqual(r.status_code, 200)
+        return r.data
+
+    def test_heatmap_and_breakdowns(self):
+        data = self.get(top=1)
+        heatmap = data["heatmap"]
+        self.assertEqual((heatmap["ventas"][0][12], heatmap["total"][0][12]), (2, 6000.0))  # lunes 12:xx local
+        self.assertEqual((heatmap["ventas"][1][20], heatmap["total"][1][20]), (1, 3000.0))  # martes 20:30 local
+        self.assertEqual(heatmap["promedio_total"][0][12], 3000.0)  # dos lunes en el rango
+        self.assertEqual(sum(map(sum, heatmap["ventas"])), 3)
+        self.assertEqual([(s["seller_name"], s["ventas"], s["total"]) for s in data["por_vendedor"]],
+                         [("caja0", 2, Decimal("6000")), ("caja1", 1, Decimal("3000"))])
+        self.assertEqual([(p["product_name"], p["unidades"]) for p in data["por_producto"]], [("Producto 0", 3)])
+
+    def test_seller_filter_drops_product_breakdown(self):
+        data = self.get(seller=self.users[1].pk)
+        self.assertEqual(sum(map(sum, data["heatmap"]["ventas"])), 1)
+        self.assertEqual([s["seller_name"] for s in data["por_vendedor"]], ["caja1"])
+        self.assertEqual(data["por_producto"], [])
+
+    @unittest.skipIf(NUMPY is None, "NumPy no está instalado")
+    def test_numpy_pivot_matches_python(self):
+        rows = [(date(2026, 1, 5), 12, 2, Decimal("6000")), (date(2026, 1, 13), 20, 1, Decimal("3000.50"))]
+        occurrences = analytics.weekday_occurrences(date(2026, 1, 5), date(2026, 1, 18))
+        expected = analytics.pivot(rows, occurrences)
+        with mock.patch.object(analytics, "np", NUMPY):
+            self.assertEqual(analytics.pivot(rows, occurrences), expected)
+
+
+class ReportParamsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("duena", password="x", role=User.OWNER))
+
+    def test_bad_dates_and_seller_are_400(self):
+        for url in ("/api/reports/sales/", "/api/reports/analytics/"):
+            for params in ({"date_from": "2024-02-30"}, {"date_to": "2024-13-01"}, {"seller": "abc"}):
+                with self.subTest(url=url, **params):
+                    r = self.client.get(url, params)
+                    self.assertEqual(r.status_code, 400)
+                    self.assertIn("inválido", r.data["error"])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("duena", password="x", role=User.OWNER))
+        products = [Product.objects.create(code=f"E{i}", name=f"Producto {i}", price=Decimal("1500"), stock=10) for i in range(2)]
+        for qty in (1, 3):
+            self.client.post("/api/sales/", {
+                "payment_method": "CASH", "items": [{"product": p.id, "qty": qty, "unit_price": "1500"} for p in products],
+            }, format="json")
+
+    def test_csv_is_streamed_with_the_requested_columns(self):
+        r = self.client.get("/api/export/", {"format": "csv", "columns": "producto,qty,total_linea"})
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.streaming)
+        self.assertEqual(b"".join(r.streaming_content).decode().splitlines(), [
+            "producto,qty,total_linea",
+            "Producto 0,1,1500.00", "Producto 1,1,1500.00",
+            "Producto 0,3,4500.00", "Producto 1,3,4500.00",
+        ])
+
+    def test_xlsx_has_header_and_one_row_per_item(self):
+        r = self.client.get("/api/export/", {"format": "xlsx", "columns": "codigo,qty"})
+        self.assertEqual(r.status_code, 200)
+        sheet = load_workbook(BytesIO(b"".join(r.streaming_content)), read_only=True)["Items"]
+        self.assertEqual([list(row) for row in sheet.iter_rows(values_only=True)],
+                         [["codigo", "qty"], ["E0", 1], ["E1", 1], ["E0", 3], ["E1", 3]])
 
-# Create your tests here.
+    def test_unknown_column_or_bad_date_is_400(self):
+        r = self.client.get("/api/export/", {"columns": "producto,costo"})
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("costo", r.data["error"])
+        self.assertEqual(self.client.get("/api/export/", {"date_from": "ayer"}).status_code, 400)
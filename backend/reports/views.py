@@ -1,43 +1,123 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Sum, F
-from sales.models import Sale, SaleItem
-from catalog.models import Product
-from django.http import HttpResponse
-import csv, io
-from openpyxl import Workbook
+from django.db.models import Sum
+from datetime import timedelta
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .export import ExportError, export_queryset, parse_columns, stream_csv, write_xlsx
+from .models import DailySales
+from .analytics import analytics
+from .services import inventory_report_cache, local_day
+
+
+def _day(raw):
+    """Día YYYY-MM-DD o None si no es válido (mal formado o inexistente, como 2024-02-30)."""
+    try:
+        return parse_date(raw)
+    except ValueError:
+        return None
+
+
+def _seller(raw):
+    """Id del vendedor de ?seller=, None si no viene; ValueError si no es numérico."""
+    return int(raw) if raw else None
+
 
 class SalesReportView(APIView):
+    """
+    Lee del resumen diario (DailySales). Acepta ?date_from=&date_to= (días
+    locales YYYY-MM-DD, inclusive), ?payment_method= y ?seller=.
+    """
+    max_queries = 4
+    read_replica = True
     def get(self, request):
-        total = Sale.objects.filter(status="OK").aggregate(total=Sum("total"))["total"] or 0
-        by_day = (Sale.objects.filter(status="OK")
-                  .extra(select={"day":"date(created_at)"})
-                  .values("day").annotate(total=Sum("total")).order_by("day"))
-        return Response({"total_ventas": total, "por_dia": list(by_day)})
+        qs = DailySales.objects.all()
+        for param, lookup in (("date_from", "day__gte"), ("date_to", "day__lte")):
+            raw = request.query_params.get(param)
+            if raw:
+                day = _day(raw)
+                if day is None:
+                    return Response({"error": f"{param} inválido (YYYY-MM-DD)"}, status=400)
+                qs = qs.filter(**{lookup: day})
+        if request.query_params.get("payment_method"):
+            qs = qs.filter(payment_method=request.query_params["payment_method"])
+        try:
+            seller = _seller(request.query_params.get("seller"))
+        except ValueError:
+            return Response({"error": "seller inválido"}, status=400)
+        if seller is not None:
+            qs = qs.filter(seller_id=seller)
+
+        total = qs.aggregate(total=Sum("total"))["total"] or 0
+        by_day = qs.values("day").annotate(total=Sum("total"), ventas=Sum("sales_count")).order_by("day")
+        by_method = qs.values("payment_method").annotate(total=Sum("total")).order_by("payment_method")
+        return Response({
+            "total_ventas": total,
+            "por_dia": list(by_day),
+            "por_medio_pago": list(by_method),
+        })
+
+class AnalyticsView(APIView):
+    """
+    Cubo de ventas (ver reports/analytics.py): heatmap día de semana x hora y
+    totales por vendedor, categoría y producto. ?date_from=&date_to= (días
+    locales, por defecto los últimos 30), ?seller= y ?top= (productos, máx. 500).
+    """
+    max_queries = 5
+    read_replica = True
+    MAX_TOP = 500
+    def get(self, request):
+        bounds = {}
+        for param in ("date_from", "date_to"):
+            raw = request.query_params.get(param)
+            bounds[param] = _day(raw) if raw else None
+            if raw and bounds[param] is None:
+                return Response({"error": f"{param} inválido (YYYY-MM-DD)"}, status=400)
+        date_to = bounds["date_to"] or local_day(timezone.now())
+        date_from = bounds["date_from"] or date_to - timedelta(days=29)
+        if date_from > date_to:
+            return Response({"error": "date_from posterior a date_to"}, status=400)
+        try:
+            top = min(max(int(request.query_params.get("top", 50)), 1), self.MAX_TOP)
+        except ValueError:
+            return Response({"error": "top inválido"}, status=400)
+        try:
+            seller = _seller(request.query_params.get("seller"))
+        except ValueError:
+            return Response({"error": "seller inválido"}, status=400)
+        return Response(analytics(date_from, date_to, seller=seller, top=top))
 
 class InventoryReportView(APIView):
+    """Desde la caché de respuestas (ver backend/respcache.py), que lee del primario."""
+    max_queries = 2
     def get(self, request):
-        stock_critico = Product.objects.filter(stock__lte=0).count()
-        return Response({"stock_critico": stock_critico})
+        data, result = inventory_report_cache.get()
+        return Response(data, headers={"X-Response-Cache": result})
 
 class ExportView(APIView):
+    """
+    ?format=csv|xlsx, ?columns=venta_id,fecha,producto,... y filtros
+    date_from/date_to/session/product/status/seller. Se envía en streaming.
+    """
+    max_queries = 2
+    read_replica = True
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= es nuestro (csv/xlsx), no el sufijo de formato de DRF.
+        return super().perform_content_negotiation(request, force=True)
+
     def get(self, request):
         fmt = request.query_params.get("format","csv")
-        qs = SaleItem.objects.select_related("sale","product").all()
+        try:
+            columns = parse_columns(request.query_params.get("columns"))
+            qs = export_queryset(request.query_params)
+        except ExportError as e:
+            return Response({"error": str(e)}, status=400)
         if fmt == "xlsx":
-            wb = Workbook(); ws = wb.active; ws.title = "Items"
-            ws.append(["venta_id","producto","qty","unit_price","discount","total_linea"])
-            for it in qs:
-                ws.append([it.sale_id, it.product.name, it.qty, float(it.unit_price),
-                           float(it.discount), float((it.unit_price-it.discount)*it.qty)])
-            resp = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-            resp["Content-Disposition"] = 'attachment; filename="export.xlsx"'
-            wb.save(resp); return resp
-        buf = io.StringIO(); w = csv.writer(buf)
-        w.writerow(["venta_id","producto","qty","unit_price","discount","total_linea"])
-        for it in qs:
-            w.writerow([it.sale_id, it.product.name, it.qty, it.unit_price,
-                        it.discount, (it.unit_price-it.discount)*it.qty])
-        resp = HttpResponse(buf.getvalue(), content_type="text/csv")
+            return FileResponse(
+                write_xlsx(qs, columns), as_attachment=True, filename="export.xlsx",
+                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+        resp = StreamingHttpResponse(stream_csv(qs, columns), content_type="text/csv")
         resp["Content-Disposition"] = 'attachment; filename="export.csv"'
         return resp
@@ -3,6 +3,7 @@ from django.contrib import admin
 from django.contrib.admin.widgets import AdminSplitDateTime
 from django.utils import timezone
 
+from reports.services import local_day, rebuild_daily_sales
 from .models import Sale, SaleItem
 
 class SaleItemInline(admin.TabularInline):
@@ -38,9 +39,26 @@ class SaleAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
 
     def save_model(self, request, obj, form, change):
+        old_day = local_day(Sale.objects.get(pk=obj.pk).created_at) if change else None
         super().save_model(request, obj, form, change)
         manual_created_at = form.cleaned_data.get("manual_created_at")
         if manual_created_at:
             if timezone.is_naive(manual_created_at) and timezone.is_aware(timezone.now()):
                 manual_created_at = timezone.make_aware(manual_created_at)
             Sale.objects.filter(pk=obj.pk).update(created_at=manual_created_at)
+            obj.created_at = manual_created_at
+        # Las ventas cargadas/editadas desde el admin no pasan por checkout:
+        # recalculamos el resumen de los días afectados.
+        for day in {old_day, local_day(obj.created_at)} - {None}:
+            rebuild_daily_sales(day, day)
+
+    def delete_queryset(self, request, queryset):
+        days = {local_day(dt) for dt in queryset.values_list("created_at", flat=True)}
+        super().delete_queryset(request, queryset)
+        for day in days:
+            rebuild_daily_sales(day, day)
+
+    def delete_model(self, request, obj):
+        day = local_day(obj.created_at)
+        super().delete_model(request, obj)
+        rebuild_daily_sales(day, day)
@@ -0,0 +1,16 @@
+from django_filters import rest_framework as filters
+
+from backend.filters import DateRangeFilterSet
+from .models import Sale
+
+
+class SaleFilter(DateRangeFilterSet):
+    seller = filters.NumberFilter(field_name="user")
+    product = filters.NumberFilter(method="filter_product")
+
+    class Meta:
+        model = Sale
+        fields = ("status", "session", "payment_method", "seller", "product")
+
+    def filter_product(self, queryset, name, value):
+        return queryset.filter(items__product=value).distinct()
@@ -0,0 +1,72 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from backend import bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga un dataset sintético en una base temporal y mide los caminos calientes del POS "
+        "(p50/p95/p99 y consultas por operación). Opcionalmente compara contra un baseline."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in bench.DEFAULTS.items():
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int, default=default)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--only", help=f"Operaciones separadas por coma: {', '.join(bench.OPERATIONS)}.")
+        parser.add_argument("--output", help="Archivo donde guardar el resultado JSON (si no, stdout).")
+        parser.add_argument("--baseline", help="Resultado JSON previo contra el cual comparar.")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="Tolerancia de p50/p95 sobre el baseline (0.2 = +20%%).")
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):
+        only = [op.strip() for op in (options["only"] or "").split(",") if op.strip()]
+        unknown = set(only) - set(bench.OPERATIONS)
+        if unknown:
+            raise CommandError(f"Operaciones desconocidas: {', '.join(sorted(unknown))}")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations debe ser >= 1")
+        baseline = bench.load(options["baseline"]) if options["baseline"] else None
+
+        # Nunca toca la base real: crea una base de prueba (en SQLite, un archivo
+        # temporal para medir con E/S de disco) y la destruye al terminar.
+        old_name = connection.settings_dict["NAME"]
+        with tempfile.TemporaryDirectory() as tmp:
+            if connection.vendor == "sqlite":
+                connection.settings_dict.setdefault("TEST", {})["NAME"] = str(Path(tmp) / "bench.sqlite3")
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                params = bench.seed(**{name: options[name] for name in bench.DEFAULTS})
+                operations = bench.run(options["iterations"], options["warmup"], only, params["seed"])
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        result = {
+            "environment": bench.environment(),
+            "dataset": params,
+            "iterations": options["iterations"],
+            "operations": operations,
+        }
+        regressions = []
+        if baseline is not None:
+            result["comparison"] = bench.compare(result, baseline, options["threshold"])
+            regressions = [row["operation"] for row in result["comparison"] if row["status"] == "regression"]
+
+        payload = json.dumps(result, indent=2, ensure_ascii=False)
+        if options["output"]:
+            Path(options["output"]).write_text(payload + "\n", encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Resultado guardado en {options['output']}"))
+        else:
+            self.stdout.write(payload)
+        if regressions:
+            msg = f"Regresiones sobre el baseline: {', '.join(regressions)}"
+            if options["fail_on_regression"]:
+                raise CommandError(msg)
+            self.stderr.write(self.style.WARNING(msg))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='client_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -17,6 +17,16 @@ class Sale(models.Model):
     payment_method = models.CharField(max_length=20, default="CASH")  # RF-17
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     note = models.CharField(max_length=140, blank=True)  # motivo (RF-11)
+    # Clave de idempotencia generada por el terminal (carga offline, /api/sales/bulk/)
+    client_key = models.CharField(max_length=64, null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="sale_created_idx"),
+            models.Index(fields=["status", "created_at"], name="sale_status_created_idx"),
+            models.Index(fields=["user", "created_at"], name="sale_user_created_idx"),
+            models.Index(fields=["session", "created_at"], name="sale_session_created_idx"),
+        ]
 
 class SaleItem(models.Model):
     sale = models.ForeignKey(Sale, related_name="items", on_delete=models.CASCADE)
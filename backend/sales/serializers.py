@@ -1,13 +1,58 @@
 # sales/serializers.py
+from datetime import timedelta
 from decimal import Decimal, ROUND_HALF_UP
 
+from django.utils import timezone
 from rest_framework import serializers
 
+from catalog.models import Product
 from .models import Sale, SaleItem
-from promos.services import apply_promotions_to_sale
+from promos.services import price_sale_items
+
+
+class _CartProductField(serializers.PrimaryKeyRelatedField):
+    """Resuelve el producto desde el lote precargado por SaleItemListSerializer."""
+
+    def to_internal_value(self, data):
+        products = getattr(self.parent, "_products", None)
+        if products is None:
+            return super().to_internal_value(data)
+        try:
+            return products[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class SaleItemListSerializer(serializers.ListSerializer):
+    """Carga todos los productos del carrito con una sola consulta."""
+
+    def to_internal_value(self, data):
+        ids = set()
+        if isinstance(data, list):
+            for it in data:
+                try:
+                    ids.add(int(it.get("product")))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+        products = self.context.get("products")  # lote ya cargado (carga masiva)
+        if products is None:
+            products = Product.objects.select_related("category").in_bulk(ids)
+        self.child._products = products
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self.child._products = None
+
+    def get_attribute(self, instance):
+        # La venta recién creada responde con los ítems que ya tiene en memoria.
+        created = getattr(self.parent, "created_items", None)
+        if created is not None and instance is self.parent.instance:
+            return created
+        return super().get_attribute(instance)
 
 
 class SaleItemSerializer(serializers.ModelSerializer):
+    product = _CartProductField(queryset=Product.objects.all())
     product_name = serializers.CharField(source="product.name", read_only=True)
     product_code = serializers.CharField(source="product.code", read_only=True)
     discount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, default="0.00")
@@ -15,6 +60,7 @@ class SaleItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SaleItem
+        list_serializer_class = SaleItemListSerializer
         fields = (
             "product",
             "product_name",
@@ -39,14 +85,37 @@ class SaleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Sale
-        fields = ("id", "status", "created_at", "payment_method", "total", "note", "seller_name", "items")
-        read_only_fields = ("status", "total")
+        fields = ("id", "status", "created_at", "payment_method", "total", "note", "seller_name", "session", "items")
+        read_only_fields = ("status", "total", "session")
 
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
         sale = Sale.objects.create(**validated_data)
+        items = []
         for it in items_data:
             it.pop("discount", None)
-            SaleItem.objects.create(sale=sale, discount=Decimal("0"), **it)
-        apply_promotions_to_sale(sale)
+            items.append(SaleItem(sale=sale, discount=Decimal("0"), **it))
+        price_sale_items(items)
+        SaleItem.objects.bulk_create(items)
+        # checkout_sale y la respuesta usan esta lista en vez de volver a consultar
+        self.created_items = items
         return sale
+
+
+class BulkSaleSerializer(SaleSerializer):
+    """Una venta de la carga offline: clave de idempotencia y fecha original del terminal."""
+    client_key = serializers.CharField(max_length=64)
+    created_at = serializers.DateTimeField()
+
+    class Meta(SaleSerializer.Meta):
+        fields = ("client_key", "created_at", "payment_method", "note", "items")
+
+    def validate_created_at(self, value):
+        if value > timezone.now() + timedelta(minutes=5):
+            raise serializers.ValidationError("La fecha de la venta está en el futuro.")
+        return value
+
+    def validate_items(self, value):
+        if not value:
+            raise serializers.ValidationError("La venta no tiene ítems.")
+        return value
@@ -1,21 +1,134 @@
-from django.db import transaction
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from decimal import Decimal
-from inventory.services import register_movement
+from inventory.services import register_movements
+from reports.services import record_checkout, record_checkouts, record_void
+from cashdesk import services as cashdesk
+from dte import boleta_cache
+from dte.models import DTE
+from audit.writer import audit_log
+from backend.events import emit
+from backend.sqlite import immediate_atomic
+from promos.services import price_sale_items
+from .models import Sale, SaleItem
 
-@transaction.atomic
-def checkout_sale(sale):
+
+def _sale_event(sale, movements):
+    """Datos del evento en vivo; stock: saldo resultante de cada producto tocado."""
+    return {
+        "id": sale.id,
+        "session": sale.session_id,
+        "user": sale.user_id,
+        "payment_method": sale.payment_method,
+        "total": sale.total,
+        "created_at": sale.created_at,
+        "stock": {m.product_id: m.balance_after for m in movements},
+    }
+
+
+@immediate_atomic(label="checkout")
+def checkout_sale(sale, items=None):
+    """items: los SaleItem recién creados, si se tienen; si no, se leen de la venta."""
+    items = list(sale.items.all()) if items is None else list(items)
     total = Decimal("0")
-    for it in sale.items.select_related("product"):
+    for it in items:
         total += (it.unit_price - it.discount) * it.qty
     sale.total = total; sale.save(update_fields=["total"])
-    for it in sale.items.all():
-        register_movement(it.product, "OUT", it.qty, reason="SALE")
+    movements = register_movements([(it.product_id, it.qty) for it in items], "OUT", reason="SALE")
+    record_checkout(sale, items)
+    cashdesk.record_checkout(sale)
+    emit("sale.checkout", _sale_event(sale, movements))
     return sale
 
-@transaction.atomic
+@immediate_atomic(label="void")
 def void_sale(sale, reason=""):
     if sale.status == "VOID": return sale
     sale.status = "VOID"; sale.note = reason; sale.save(update_fields=["status","note"])
-    for it in sale.items.all():
-        register_movement(it.product, "IN", it.qty, reason="VOID")
+    items = list(sale.items.all())
+    movements = register_movements([(it.product_id, it.qty) for it in items], "IN", reason="VOID")
+    record_void(sale, items)
+    cashdesk.record_void(sale)
+    emit("sale.void", _sale_event(sale, movements))
+    transaction.on_commit(lambda: boleta_cache.invalidate(sale.id))
     return sale
+
+
+@immediate_atomic(label="bulk")
+def _ingest_chunk(entries, user, session_id):
+    """Crea un lote de ventas ya validadas con operaciones por lote (ver ingest_sales)."""
+    sales = Sale.objects.bulk_create([
+        Sale(user=user, session_id=session_id, client_key=data["client_key"],
+             payment_method=data.get("payment_method", "CASH"), note=data.get("note", ""))
+        for data in entries
+    ])
+    items = []
+    for sale, data in zip(sales, entries):
+        sale.created_at = data["created_at"]  # created_at es auto_now_add: se corrige abajo
+        sale._items = [
+            SaleItem(sale=sale, product=it["product"], qty=it["qty"], unit_price=it["unit_price"], discount=Decimal("0"))
+            for it in data["items"]
+        ]
+        items.extend(sale._items)
+    price_sale_items(items)
+    SaleItem.objects.bulk_create(items, batch_size=500)
+    for sale in sales:
+        sale.total = sum(((it.unit_price - it.discount) * it.qty for it in sale._items), Decimal("0"))
+    Sale.objects.bulk_update(sales, ["created_at", "total"], batch_size=500)
+    register_movements([(it.product_id, it.qty) for it in items], "OUT", reason="SALE")
+    record_checkouts(sales, items)
+    cashdesk.record_checkouts(sales)
+    DTE.objects.bulk_create([DTE(sale=sale, status="PENDING") for sale in sales])
+    for sale in sales:
+        audit_log(user, "SALE_CHECKOUT", "Sale", sale.id,
+                  {"total": str(sale.total), "client_key": sale.client_key, "bulk": True})
+    # Un solo evento por lote: el cliente recarga en vez de recibir cientos.
+    emit("sale.bulk", {"count": len(sales), "session": sales[0].session_id if sales else None})
+    return sales
+
+
+def _existing_keys(keys):
+    return dict(Sale.objects.filter(client_key__in=keys).values_list("client_key", "id"))
+
+
+def ingest_sales(entries, user, chunk_size=None):
+    """
+    Carga masiva de ventas offline (POST /api/sales/bulk/).
+
+    entries: validated_data de BulkSaleSerializer, sin claves repetidas.
+    Las claves ya ingresadas se omiten; el resto se crea en orden cronológico,
+    en transacciones de SALES_BULK_CHUNK ventas con inserts y updates por lote.
+    Devuelve {client_key: {"status": "created" | "duplicate", "id": sale_id}};
+    las ventas de un lote que no se pudo sumar a la caja (SessionClosed) vuelven
+    como {"status": "error", "errors": ...} para reenviarlas.
+    """
+    existing = _existing_keys([data["client_key"] for data in entries])
+    results = {key: {"status": "duplicate", "id": sale_id} for key, sale_id in existing.items()}
+    pending = sorted((d for d in entries if d["client_key"] not in existing), key=lambda d: d["created_at"])
+    size = chunk_size or getattr(settings, "SALES_BULK_CHUNK", 200)
+    for start in range(0, len(pending), size):
+        chunk = pending[start:start + size]
+        try:
+            sales = _ingest_retrying_duplicates(chunk, user, results)
+        except cashdesk.SessionClosed:
+            # La caja se cerró a mitad del lote y su transacción se deshizo:
+            # estas ventas no quedaron y el cliente puede reenviarlas.
+            results.update({
+                data["client_key"]: {"status": "error", "errors": {"session": ["La caja se cerró durante la carga; reenviar."]}}
+                for data in chunk if data["client_key"] not in results
+            })
+            continue
+        results.update({sale.client_key: {"status": "created", "id": sale.id} for sale in sales})
+    return results
+
+
+def _ingest_retrying_duplicates(chunk, user, results):
+    """_ingest_chunk; si otro request ingresó alguna clave entre la consulta y el INSERT, la marca y reintenta sin ella."""
+    try:
+        return _ingest_chunk(chunk, user, cashdesk.current_session.get())
+    except IntegrityError:
+        taken = _existing_keys([data["client_key"] for data in chunk])
+        if not taken:
+            raise
+        results.update({key: {"status": "duplicate", "id": sale_id} for key, sale_id in taken.items()})
+        chunk = [data for data in chunk if data["client_key"] not in taken]
+        return _ingest_chunk(chunk, user, cashdesk.current_session.get()) if chunk else []
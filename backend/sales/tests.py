@@ -1,3 +1,251 @@
-from django.test import TestCase
+import json
+import subprocess
+import sys
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from audit.models import AuditLog
+from backend.querybudget import QueryBudgetClient
+from cashdesk.models import CashSession
+from cashdesk import services as cashdesk_services
+from cashdesk.services import current_session
+from catalog.models import Category, Product
+from inventory.models import InventoryMovement
+from promos.models import Promotion
+from promos.services import promotion_index
+
+from .models import Sale
+from .views import SaleViewSet
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name="Cervezas")
+        self.products = [
+            Product.objects.create(code=f"P{i}", name=f"Producto {i}", category=category, price=Decimal("1000"), stock=50)
+            for i in range(3)
+        ]
+
+    def cart(self, qty=2):
+        return [{"product": p.id, "qty": qty, "unit_price": "1000"} for p in self.products]
+
+    def test_checkout_uses_set_based_writes(self):
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.post("/api/sales/", {"payment_method": "CASH", "items": self.cart()}, format="json")
+        self.assertEqual(r.status_code, 201, r.data)
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        # Los ítems de la respuesta salen de memoria, no de una nueva lectura.
+        self.assertFalse([s for s in sqls if s.startswith("SELECT") and '"sales_saleitem"' in s])
+        self.assertEqual(len([s for s in sqls if s.startswith('INSERT INTO "sales_saleitem"')]), 1)
+        self.assertEqual(len([s for s in sqls if s.startswith('INSERT INTO "inventory_inventorymovement"')]), 1)
+        self.assertEqual([it["product_name"] for it in r.data["items"]], [p.name for p in self.products])
+        self.assertEqual(Decimal(r.data["total"]), Decimal("6000"))
+        self.assertEqual(list(Product.objects.order_by("id").values_list("stock", flat=True)), [48, 48, 48])
+        self.assertEqual(InventoryMovement.objects.filter(reason="SALE").count(), 3)
+
+    def test_list_reads_items_from_prefetch(self):
+        self.client.post("/api/sales/", {"payment_method": "CASH", "items": self.cart()}, format="json")
+        r = self.client.get("/api/sales/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.data["results"][0]["items"]), 3)
+        self.assertEqual(Sale.objects.count(), 1)
+
+
+class SaleDateFilterTests(TestCase):
+    def test_date_only_bounds_follow_the_store_day(self):
+        user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        client = APIClient()
+        client.force_authenticate(user)
+        sale = Sale.objects.create(user=user, total=Decimal("1000"))
+        # 22:30 del 5 de enero en Santiago (UTC-3), ya 6 de enero en UTC
+        Sale.objects.filter(pk=sale.pk).update(created_at=datetime(2026, 1, 6, 1, 30, tzinfo=dt_timezone.utc))
+
+        def ids(**params):
+            return [s["id"] for s in client.get("/api/sales/", params).data["results"]]
+
+        self.assertEqual(ids(date_from="2026-01-05", date_to="2026-01-05"), [sale.pk])
+        self.assertEqual(ids(date_from="2026-01-06"), [])
+        self.assertEqual(ids(date_to="2026-01-04"), [])
+
+
+class BulkIngestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(code="B1", name="Cerveza", price=Decimal("1000"), stock=50)
+
+    def entry(self, key, created_at="2026-01-05T12:00:00Z"):
+        return {
+            "client_key": key, "created_at": created_at, "payment_method": "CASH",
+            "items": [{"product": self.product.id, "qty": 2, "unit_price": "1000"}],
+        }
+
+    def post(self, entries):
+        return self.client.post("/api/sales/bulk/", {"sales": entries}, format="json")
+
+    def test_replayed_batch_is_idempotent(self):
+        first = self.post([self.entry("a"), self.entry("b"), self.entry("a")])
+        self.assertEqual((first.data["created"], first.data["duplicate"]), (2, 0))
+        again = self.post([self.entry("a"), self.entry("b"), self.entry("c", "2026-01-05T13:00:00Z")])
+        self.assertEqual((again.data["created"], again.data["duplicate"]), (1, 2))
+        self.assertEqual(again.data["results"]["a"], {"status": "duplicate", "id": first.data["results"]["a"]["id"]})
+        self.assertEqual(Sale.objects.count(), 3)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 44)
+
+    def test_invalid_entries_are_reported_without_blocking_the_rest(self):
+        bad = {**self.entry("x"), "items": []}
+        r = self.post([bad, self.entry("ok")])
+        self.assertEqual((r.data["created"], r.data["error"]), (1, 1))
+        self.assertEqual(r.data["results"]["x"]["status"], "error")
+        self.assertEqual(list(Sale.objects.values_list("client_key", flat=True)), ["ok"])
+
+    @override_settings(SALES_BULK_CHUNK=1)
+    def test_session_closed_mid_batch_reports_the_lost_chunk(self):
+        session = CashSession.objects.create(opened_by=self.user)
+        current_session.invalidate()
+        real_open_session = cashdesk_services._open_session
+        calls = []
+
+        def close_before_second_chunk(session_id):
+            calls.append(session_id)
+            if len(calls) == 2:  # otra caja cierra entre la verificación y la suma
+                CashSession.objects.filter(pk=session.pk).update(status=CashSession.CLOSED)
+                return session_id
+            return real_open_session(session_id)
+
+        with mock.patch.object(cashdesk_services, "_open_session", side_effect=close_before_second_chunk):
+            r = self.post([self.entry("a"), self.entry("b", "2026-01-05T13:00:00Z")])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual((r.data["created"], r.data["error"]), (1, 1))
+        self.assertEqual(r.data["results"]["b"]["status"], "error")
+        self.assertEqual(list(Sale.objects.values_list("client_key", flat=True)), ["a"])
+
+        # Reenviar es seguro: "a" vuelve como duplicada y "b" se crea.
+        current_session.invalidate()
+        again = self.post([self.entry("a"), self.entry("b", "2026-01-05T13:00:00Z")])
+        self.assertEqual((again.data["created"], again.data["duplicate"]), (1, 1))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 46)
+
+
+class VoidTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(code="V1", name="Vino", price=Decimal("1000"), stock=10)
+        r = self.client.post("/api/sales/", {
+            "payment_method": "CASH", "items": [{"product": self.product.id, "qty": 3, "unit_price": "1000"}],
+        }, format="json")
+        self.sale_id = r.data["id"]
+
+    def void(self):
+        return self.client.post(f"/api/sales/{self.sale_id}/void/", {"reason": "error"}, format="json")
+
+    def test_void_restores_stock_once(self):
+        self.assertEqual(self.void().status_code, 200)
+        self.assertEqual(self.void().status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+        self.assertEqual(AuditLog.objects.filter(action="SALE_VOID").count(), 1)
+
+    def test_stale_instance_is_reread_inside_the_transaction(self):
+        # Otra caja anula entre get_object() y el BEGIN IMMEDIATE.
+        stale = Sale.objects.get(pk=self.sale_id)
+        self.void()
+        with mock.patch.object(SaleViewSet, "get_object", return_value=stale):
+            self.assertEqual(self.void().status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+        self.assertEqual(AuditLog.objects.filter(action="SALE_VOID").count(), 1)
+
+
+class QueryBudgetTests(TransactionTestCase):
+    """
+    Presupuestos de SaleViewSet medidos con commits reales y autenticación JWT
+    (el usuario se lee en cada request), como en producción.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("caja", password="x", role=User.OWNER)
+        CashSession.objects.create(opened_by=self.user)
+        category = Category.objects.create(name="Cervezas")
+        self.products = [
+            Product.objects.create(code=f"Q{i}", name=f"Producto {i}", category=category, price=Decimal("1000"), stock=50)
+            for i in range(3)
+        ]
+        Promotion.objects.create(name="10%", type="PCT", value=Decimal("10")).products.set(self.products[:1])
+        self.client = QueryBudgetClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def cold(self):
+        # Primera venta del día tras arrancar el proceso: índice de promociones
+        # y caché de caja vacíos, sin filas de resúmenes ni contadores de caja.
+        promotion_index.invalidate()
+        current_session.invalidate()
+
+    def checkout(self):
+        r = self.client.post("/api/sales/", {
+            "payment_method": "CASH",
+            "items": [{"product": p.id, "qty": 1, "unit_price": "1000"} for p in self.products],
+        }, format="json")
+        self.assertEqual(r.status_code, 201, r.data)
+        return r
+
+    def test_cold_checkout_uses_its_whole_budget(self):
+        self.cold()
+        self.assertEqual(self.checkout()["X-Query-Budget"], "36/36")
+
+    def actions(self, cold):
+        # QueryBudgetClient levanta QueryBudgetExceeded si alguna se pasa.
+        sale_id = self.checkout().data["id"]
+        self.assertEqual(self.client.get("/api/sales/").status_code, 200)
+        self.assertEqual(self.client.get(f"/api/sales/{sale_id}/").status_code, 200)
+        if cold:
+            self.cold()
+        r = self.client.post(f"/api/sales/{sale_id}/void/", {"reason": "error"}, format="json")
+        self.assertEqual(r.status_code, 200)
+
+    def test_actions_fit_their_budget_cold(self):
+        self.cold()
+        self.actions(cold=True)
+
+    def test_actions_fit_their_budget_warm(self):
+        self.checkout()
+        self.actions(cold=False)
+
+
+class BenchCommandTests(SimpleTestCase):
+    """El comando crea y destruye su propia base: se corre en otro proceso, como en CI."""
+
+    def test_smoke_run_on_a_tiny_dataset(self):
+        base_dir = Path(settings.BASE_DIR)
+        db = Path(settings.DATABASES["default"]["NAME"])
+        before = db.stat().st_mtime_ns if db.exists() else None
+        result = subprocess.run(
+            [sys.executable, "manage.py", "bench", "--products", "30", "--sales", "40", "--categories", "3",
+             "--promotions", "3", "--users", "2", "--days", "5", "--iterations", "2", "--warmup", "1",
+             "--only", "sale_create_checkout,void_sale"],
+            cwd=base_dir, capture_output=True, text=True, timeout=300,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        operations = json.loads(result.stdout)["operations"]
+        self.assertEqual(set(operations), {"sale_create_checkout", "void_sale"})
+        self.assertTrue(all(op["n"] == 2 and op["queries"] > 0 for op in operations.values()))
+        self.assertEqual(db.stat().st_mtime_ns if db.exists() else None, before)  # la base real no se toca
@@ -1,48 +1,96 @@
 # sales/views.py
+from django.conf import settings
+from django.db import transaction
 from rest_framework import viewsets, permissions, decorators, response, status
+from backend.pagination import CreatedAtPagination
+from backend.sqlite import immediate_atomic
+from .filters import SaleFilter
 from .models import Sale
-from .serializers import SaleSerializer
-from .services import checkout_sale, void_sale
+from .serializers import BulkSaleSerializer, SaleSerializer
+from .services import checkout_sale, ingest_sales, void_sale
 from rest_framework import views, permissions
 from rest_framework.response import Response
 from decimal import Decimal, ROUND_HALF_UP
 from catalog.models import Product
-from promos.services import best_unit_discount, get_active_promotions
+from promos.services import best_unit_discount
+from dte import boleta_cache
 from dte.models import DTE
-from audit.models import AuditLog
+from audit.writer import audit_log
+from cashdesk.services import current_session
 
 class SaleViewSet(viewsets.ModelViewSet):
-    queryset = Sale.objects.all().order_by("-id")
+    queryset = Sale.objects.select_related("user").prefetch_related("items__product").order_by("-created_at", "-id")
     serializer_class = SaleSerializer
     permission_classes = [permissions.IsAuthenticated]
-
+    pagination_class = CreatedAtPagination
+    filterset_class = SaleFilter
+    # Ver backend/querybudget.py; create/void cubren el caso en frío (índice de
+    # promociones, caché de caja y primera fila de los resúmenes), medido en
+    # sales/tests.py (QueryBudgetTests).
+    max_queries = {"list": 4, "retrieve": 4, "create": 36, "void": 25}
+
+    @immediate_atomic(label="checkout")
     def perform_create(self, serializer):
-        sale = serializer.save(user=self.request.user)
-        checkout_sale(sale)
+        sale = serializer.save(user=self.request.user, session_id=current_session.get())
+        checkout_sale(sale, serializer.created_items)
         DTE.objects.create(sale=sale, status="PENDING")
-        AuditLog.objects.create(
-            actor=self.request.user,
-            action="SALE_CHECKOUT",
-            model="Sale",
-            obj_id=str(sale.id),
-            changes={"total": str(sale.total)},
-        )
+        transaction.on_commit(lambda: boleta_cache.warm_async(sale.id))
+        audit_log(self.request.user, "SALE_CHECKOUT", "Sale", sale.id, {"total": str(sale.total)})
 
     @decorators.action(detail=True, methods=["post"])
     def void(self, request, pk=None):
         sale = self.get_object()
         reason = request.data.get("reason", "")
-        from .services import void_sale
-        void_sale(sale, reason)
-        AuditLog.objects.create(
-            actor=request.user,
-            action="SALE_VOID",
-            model="Sale",
-            obj_id=str(sale.id),
-            changes={"reason": reason},
-        )
+        with immediate_atomic(label="void"):
+            # Se relee con el candado de escritura tomado: otra caja pudo
+            # anularla entre get_object() y el BEGIN IMMEDIATE.
+            sale = Sale.objects.get(pk=sale.pk)
+            if sale.status != "VOID":
+                void_sale(sale, reason)
+                audit_log(request.user, "SALE_VOID", "Sale", sale.id, {"reason": reason})
         return response.Response({"status": "VOID"}, status=status.HTTP_200_OK)
 
+    @decorators.action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Carga de ventas encoladas offline: { sales: [{client_key, created_at,
+        payment_method, note, items}] }. Responde el resultado por client_key;
+        las claves ya ingresadas vuelven como "duplicate" con su id.
+        """
+        entries = request.data.get("sales")
+        limit = getattr(settings, "SALES_BULK_MAX", 1000)
+        if not isinstance(entries, list) or not entries:
+            return response.Response({"error": "sales debe ser una lista no vacía"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > limit:
+            return response.Response({"error": f"máximo {limit} ventas por request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = set()
+        for entry in entries:
+            for it in (entry.get("items") if isinstance(entry, dict) else None) or []:
+                try:
+                    ids.add(int(it.get("product")))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+        context = {"request": request, "products": Product.objects.select_related("category").in_bulk(ids)}
+
+        results, valid, seen = {}, [], set()
+        for i, entry in enumerate(entries):
+            serializer = BulkSaleSerializer(data=entry, context=context)
+            if not serializer.is_valid():
+                key = entry.get("client_key") if isinstance(entry, dict) else None
+                results[str(key or f"#{i}")] = {"status": "error", "errors": serializer.errors}
+                continue
+            key = serializer.validated_data["client_key"]
+            if key not in seen:  # misma clave = misma venta
+                seen.add(key)
+                valid.append(serializer.validated_data)
+        results.update(ingest_sales(valid, request.user))
+
+        counts = {"created": 0, "duplicate": 0, "error": 0}
+        for result in results.values():
+            counts[result["status"]] += 1
+        return response.Response({**counts, "results": results}, status=status.HTTP_200_OK)
+
 
 CLP_QUANT = Decimal("1")
 
@@ -58,6 +106,7 @@ class SalePreviewView(views.APIView):
     No persiste, solo calcula usando la misma lógica de promos.
     """
     permission_classes = [permissions.IsAuthenticated]
+    max_queries = 5  # incluye reconstruir el índice de promociones
 
     def post(self, request):
         items = request.data.get("items", [])
@@ -72,8 +121,6 @@ class SalePreviewView(views.APIView):
         total_desc = Decimal("0")
         total_neto = Decimal("0")
 
-        promos = get_active_promotions()
-
         for it in items:
             pid = it.get("product")
             qty = int(it.get("qty", 0) or 0)
@@ -85,7 +132,7 @@ class SalePreviewView(views.APIView):
             if not product:
                 continue
 
-            disc_unit = best_unit_discount(product, unit_price, promos)
+            disc_unit = best_unit_discount(product, unit_price)
 
             qty_dec = Decimal(qty)
             line_bruto = unit_price * qty_dec
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:24
+
+from django.db import migrations, models
+
+
+def seed_counter(apps, schema_editor):
+    # Las filas existentes quedan en version=1 (default de la columna).
+    apps.get_model("sync", "ChangeCounter").objects.get_or_create(name="sync", defaults={"value": 1})
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('name', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('obj_id', models.BigIntegerField()),
+                ('version', models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(seed_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class ChangeCounter(models.Model):
+    """Contador monotónico con nombre (ver sync/services.py)."""
+    name = models.CharField(max_length=40, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+
+class SyncTombstone(models.Model):
+    """Registro de un borrado, para que los terminales lo apliquen en su copia local."""
+    model = models.CharField(max_length=20)
+    obj_id = models.BigIntegerField()
+    version = models.BigIntegerField(db_index=True)
+
+
+class LiveEvent(models.Model):
+    """
+    Evento en vivo para los clientes SSE (ver backend/events.py). Se escribe en
+    la transacción que lo produce; el id es el Last-Event-ID del stream.
+    """
+    type = models.CharField(max_length=30)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
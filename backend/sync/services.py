@@ -0,0 +1,88 @@
+# sync/services.py
+"""
+Versión de cambios del catálogo para la sincronización incremental (/api/sync/).
+
+Cada escritura de Product, Category o Promotion toma un valor nuevo del
+contador "sync" y lo deja en la columna `version` de las filas tocadas; los
+borrados dejan un SyncTombstone con su versión. El contador se incrementa
+dentro de la transacción que escribe, así que en SQLite (un solo escritor a la
+vez) las versiones se hacen visibles en orden.
+
+Además cada tabla tiene su propio contador (nombre = label del modelo, p. ej.
+"catalog.product") que sube con cada escritura; de él salen los ETag y
+Last-Modified de backend/conditional.py.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ChangeCounter, SyncTombstone
+
+SYNC_COUNTER = "sync"
+
+
+def _increment(*names):
+    """Sube los contadores `names` con un UPDATE; los que faltan se crean primero."""
+    updates = {"value": F("value") + 1, "changed_at": timezone.now()}
+    if ChangeCounter.objects.filter(name__in=names).update(**updates) == len(names):
+        return
+    present = set(ChangeCounter.objects.filter(name__in=names).values_list("name", flat=True))
+    for name in names:
+        if name not in present:
+            ChangeCounter.objects.get_or_create(name=name)
+            ChangeCounter.objects.filter(name=name).update(**updates)
+
+
+@transaction.atomic(savepoint=False)
+def next_value(name, also=()):
+    """
+    Incrementa el contador `name` y devuelve el valor nuevo. `also`: otros
+    contadores que suben en el mismo UPDATE.
+    """
+    _increment(name, *also)
+    return ChangeCounter.objects.values_list("value", flat=True).get(name=name)
+
+
+def table_counter(model):
+    return model._meta.label_lower
+
+
+def mark_changed(model):
+    """Sube el contador de la tabla de `model` (invalida sus ETag)."""
+    _increment(table_counter(model))
+
+
+def table_state(models):
+    """{nombre: (valor, changed_at)} de los contadores de esas tablas, en una consulta."""
+    names = [table_counter(model) for model in models]
+    rows = ChangeCounter.objects.filter(name__in=names).values_list("name", "value", "changed_at")
+    return {name: (value, changed_at) for name, value, changed_at in rows}
+
+
+def current_value(name):
+    return ChangeCounter.objects.filter(name=name).values_list("value", flat=True).first() or 0
+
+
+def next_version(*models):
+    """Versión nueva; sube además los contadores de tabla de `models` (ver mark_changed)."""
+    return next_value(SYNC_COUNTER, also=[table_counter(model) for model in models])
+
+
+def current_version():
+    return current_value(SYNC_COUNTER)
+
+
+def touch(model, pks):
+    """Marca las filas `pks` de `model` con una versión nueva."""
+    pks = list(pks)
+    if not pks:
+        return None
+    version = next_version()
+    model.objects.filter(pk__in=pks).update(version=version)
+    mark_changed(model)
+    return version
+
+
+def tombstone(model, obj_id):
+    SyncTombstone.objects.create(model=model._meta.model_name, obj_id=obj_id, version=next_version())
+    mark_changed(model)
@@ -0,0 +1,46 @@
+# sync/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from catalog.models import Category, Product
+from promos.models import Promotion
+from .services import tombstone, touch
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Promotion)
+def stamp_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance.version = touch(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Promotion)
+def record_tombstone(sender, instance, **kwargs):
+    tombstone(sender, instance.pk)
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleting(sender, instance, **kwargs):
+    # on_delete=SET_NULL cambia las promociones sin emitir post_save.
+    touch(Promotion, Promotion.objects.filter(category=instance).values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Product)
+def product_deleting(sender, instance, **kwargs):
+    # El borrado en cascada de la tabla intermedia no emite m2m_changed.
+    touch(Promotion, instance.promotion_set.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Promotion.products.through)
+def promotion_products_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            touch(Promotion, [instance.pk])
+    elif action == "pre_clear":
+        touch(Promotion, instance.promotion_set.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        touch(Promotion, pk_set or ())
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from catalog.models import Category, Product
+from inventory.services import register_movements
+from promos.models import Promotion
+
+
+class SyncFeedTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("caja", password="x", role=User.OWNER))
+        self.category = Category.objects.create(name="Cervezas")
+        self.products = [
+            Product.objects.create(code=f"S{i}", name=f"Producto {i}", category=self.category, price=Decimal("1000"), stock=20)
+            for i in range(5)
+        ]
+
+    def pull(self, since=None):
+        r = self.client.get("/api/sync/", {} if since is None else {"since": since})
+        self.assertEqual(r.status_code, 200)
+        return r.data
+
+    def pull_all(self, since=None):
+        """Sigue has_more hasta quedar al día; devuelve (páginas, versión final)."""
+        pages = []
+        while True:
+            page = self.pull(since)
+            pages.append(page)
+            since = page["version"]
+            if not page["has_more"]:
+                return pages, since
+
+    def product_ids(self, page):
+        column = page["products"]["columns"].index("id")
+        return [row[column] for row in page["products"]["rows"]]
+
+    def test_delta_has_only_changes_and_tombstones(self):
+        full = self.pull()
+        self.assertFalse(full["has_more"])
+        self.assertEqual(sorted(self.product_ids(full)), sorted(p.id for p in self.products))
+        self.assertEqual(self.product_ids(self.pull(full["version"])), [])
+
+        changed, deleted_id = self.products[0], self.products[1].id
+        changed.price = Decimal("1200")
+        changed.save()
+        self.products[1].delete()
+        delta = self.pull(full["version"])
+        self.assertEqual(self.product_ids(delta), [changed.id])
+        self.assertEqual(delta["deleted"]["products"], [deleted_id])
+        self.assertEqual(delta["categories"]["rows"], [])
+
+    def test_product_delete_touches_its_promotions(self):
+        promo = Promotion.objects.create(name="2x1", type="PCT", value=Decimal("50"))
+        promo.products.set(self.products[:2])
+        since = self.pull()["version"]
+        self.products[0].delete()
+        delta = self.pull(since)
+        columns = delta["promotions"]["columns"]
+        [row] = delta["promotions"]["rows"]
+        self.assertEqual(row[columns.index("products")], [self.products[1].id])
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_pages_cover_everything_once_and_never_split_a_version(self):
+        pages, since = self.pull_all()
+        self.assertGreater(len(pages), 1)
+        ids = [pid for page in pages for pid in self.product_ids(page)]
+        self.assertEqual(sorted(ids), sorted(p.id for p in self.products))
+
+        # Una venta marca tres productos con la misma versión: van en una página aunque el tope sea 2.
+        register_movements([(p.id, 1) for p in self.products[:3]], "OUT", reason="SALE")
+        pages, _ = self.pull_all(since)
+        self.assertEqual([sorted(self.product_ids(page)) for page in pages], [sorted(p.id for p in self.products[:3])])
+
+    def test_rejects_bad_since(self):
+        self.assertEqual(self.client.get("/api/sync/", {"since": "x"}).status_code, 400)
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework import permissions, response, status, views
+
+from catalog.models import Category, Product
+from promos.models import Promotion
+from .models import SyncTombstone
+from .services import current_version
+
+PRODUCT_COLUMNS = ("id", "code", "name", "category", "price", "stock", "min_stock", "critical_stock", "active", "top_seller")
+CATEGORY_COLUMNS = ("id", "name")
+PROMOTION_COLUMNS = ("id", "name", "type", "value", "active", "category", "products")
+DELETED_KEYS = {"product": "products", "category": "categories", "promotion": "promotions"}
+
+
+def _column(name):
+    return f"{name}_id" if name == "category" else name
+
+
+def _cell(value):
+    # Decimal -> str, como en los serializers (precios sin pérdida).
+    return str(value) if hasattr(value, "as_tuple") else value
+
+
+class SyncView(views.APIView):
+    """
+    Sincronización incremental del catálogo: ?since=<version>.
+    Devuelve las filas de productos, categorías y promociones con version >
+    since (columnar: {"columns": [...], "rows": [[...]]}), los ids borrados y
+    la versión hasta la que quedó al día el cliente. Sin since, todo el catálogo.
+    Si has_more es true, se vuelve a pedir con since=version. El cliente aplica
+    primero `deleted` y después las filas (SQLite puede reutilizar el id mayor).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_queries = 12
+
+    def get(self, request):
+        raw = request.query_params.get("since")
+        try:
+            since = int(raw) if raw not in (None, "") else -1
+        except ValueError:
+            return response.Response({"error": "since debe ser un entero"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = getattr(settings, "SYNC_PAGE_SIZE", 2000)
+
+        with transaction.atomic():  # una sola foto de la base para todo el payload
+            head = current_version()
+            tables = {
+                "products": Product.objects.all(),
+                "categories": Category.objects.all(),
+                "promotions": Promotion.objects.all(),
+            }
+            # Corte de página: nunca parte una versión (un UPDATE de stock puede
+            # marcar muchas filas con la misma), así que se avanza al menos una.
+            cutoff = head
+            for qs in tables.values():
+                edge = list(
+                    qs.filter(version__gt=since, version__lte=head).order_by("version")
+                    .values_list("version", flat=True)[limit - 1:limit + 1]
+                )
+                if len(edge) == 2:
+                    cutoff = min(cutoff, edge[0])
+
+            changed = {name: qs.filter(version__gt=since, version__lte=cutoff).order_by("version", "id")
+                       for name, qs in tables.items()}
+            payload = {
+                "since": since,
+                "version": cutoff,
+                "has_more": cutoff < head,
+                "products": self._columnar(changed["products"], PRODUCT_COLUMNS),
+                "categories": self._columnar(changed["categories"], CATEGORY_COLUMNS),
+                "promotions": self._promotions(changed["promotions"]),
+                "deleted": {"products": [], "categories": [], "promotions": []},
+            }
+            tombstones = SyncTombstone.objects.filter(version__gt=since, version__lte=cutoff).values_list("model", "obj_id")
+            for model, obj_id in tombstones:
+                payload["deleted"][DELETED_KEYS[model]].append(obj_id)
+        return response.Response(payload)
+
+    def _columnar(self, qs, columns):
+        rows = qs.values_list(*map(_column, columns))
+        return {"columns": list(columns), "rows": [[_cell(v) for v in row] for row in rows]}
+
+    def _promotions(self, qs):
+        promos = list(qs.values_list(*map(_column, PROMOTION_COLUMNS[:-1])))
+        products = {}
+        through = Promotion.products.through.objects.filter(promotion_id__in=[p[0] for p in promos])
+        for promo_id, product_id in through.values_list("promotion_id", "product_id").order_by("product_id"):
+            products.setdefault(promo_id, []).append(product_id)
+        return {
+            "columns": list(PROMOTION_COLUMNS),
+            "rows": [[_cell(v) for v in promo] + [products.get(promo[0], [])] for promo in promos],
+        }
@@ -46,4 +46,22 @@ api.interceptors.response.use(
   }
 );
 
+// Los listados paginados por cursor responden { next, previous, results }.
+export const listOf = (data) =>
+  Array.isArray(data) ? data : Array.isArray(data?.results) ? data.results : [];
+
+// Recorre todas las páginas de un listado (para catálogos que se necesitan completos).
+export async function fetchAll(url, params = {}) {
+  const out = [];
+  let next = url;
+  let query = { page_size: 200, ...params };
+  while (next) {
+    const { data } = await api.get(next, { params: query });
+    out.push(...listOf(data));
+    next = Array.isArray(data) ? null : data?.next || null;
+    query = undefined; // el cursor "next" ya trae los parámetros
+  }
+  return out;
+}
+
 export default api;
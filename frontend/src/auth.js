@@ -23,6 +23,7 @@ export function getRefreshToken() {
 export function clearToken() {
   localStorage.removeItem("token");
   localStorage.removeItem("refresh_token");
+  localStorage.removeItem("catalog_sync");
 }
 
 export function isLoggedIn() {
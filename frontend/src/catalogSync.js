@@ -0,0 +1,61 @@
+import api from "./api";
+
+// Copia local del catálogo (productos, categorías, promociones) al día con
+// /api/sync/: solo se descargan los cambios desde la última versión.
+const KEY = "catalog_sync";
+
+const empty = () => ({ version: null, products: {}, categories: {}, promotions: {} });
+
+function load() {
+  try {
+    const raw = JSON.parse(localStorage.getItem(KEY) || "null");
+    return raw && raw.products ? raw : empty();
+  } catch {
+    return empty();
+  }
+}
+
+function save(state) {
+  try {
+    localStorage.setItem(KEY, JSON.stringify(state));
+  } catch {
+    // Sin espacio: se vuelve a sincronizar completo la próxima vez.
+    localStorage.removeItem(KEY);
+  }
+}
+
+const toObjects = ({ columns, rows }) =>
+  rows.map((row) => Object.fromEntries(columns.map((col, i) => [col, row[i]])));
+
+let inflight = null;
+
+async function pull() {
+  const state = load();
+  let more = true;
+  while (more) {
+    const params = state.version == null ? {} : { since: state.version };
+    const { data } = await api.get("/sync/", { params });
+    // Primero los borrados: un id borrado puede reaparecer en las filas.
+    for (const table of ["products", "categories", "promotions"]) {
+      for (const id of data.deleted[table]) delete state[table][id];
+      for (const obj of toObjects(data[table])) state[table][obj.id] = obj;
+    }
+    state.version = data.version;
+    more = data.has_more;
+  }
+  save(state);
+  return state;
+}
+
+// Devuelve { products, categories, promotions } como arreglos.
+export async function syncCatalog() {
+  if (!inflight) inflight = pull().finally(() => { inflight = null; });
+  const state = await inflight;
+  const categories = Object.values(state.categories).sort((a, b) => a.name.localeCompare(b.name));
+  const catName = new Map(categories.map((c) => [c.id, c.name]));
+  const products = Object.values(state.products)
+    .map((p) => ({ ...p, category_name: catName.get(p.category) || null }))
+    .sort((a, b) => b.id - a.id);
+  const promotions = Object.values(state.promotions).sort((a, b) => b.id - a.id);
+  return { products, categories, promotions };
+}
@@ -0,0 +1,99 @@
+import api from "./api";
+
+// Eventos en vivo del servidor (/api/events/, Server-Sent Events; ver
+// backend/events.py). handlers: { "sale.checkout": fn(data), ..., reset: fn }.
+// "reset" debe recargar los listados completos: llega cuando el servidor no
+// puede entregar lo perdido y, si no hay stream (servidor sin ASGI, navegador
+// sin EventSource), se llama cada fallbackMs como polling de respaldo.
+const BASE = import.meta.env.VITE_API_URL || "http://localhost:8000/api";
+
+const TYPES = ["sale.checkout", "sale.void", "sale.bulk", "stock.level", "cash.open", "cash.close"];
+
+export function subscribeEvents(handlers, { fallbackMs = 30000 } = {}) {
+  let source = null;
+  let lastId = "";
+  let closed = false;
+  let failures = 0;
+  let retryTimer = null;
+  let pollTimer = null;
+
+  const reset = () => handlers.reset && handlers.reset();
+
+  const startPolling = () => {
+    if (!pollTimer) pollTimer = setInterval(reset, fallbackMs);
+  };
+
+  const connected = (recovered) => {
+    failures = 0;
+    if (pollTimer) {
+      clearInterval(pollTimer);
+      pollTimer = null;
+    }
+    if (recovered) reset();
+  };
+
+  const retry = () => {
+    failures += 1;
+    if (failures >= 2) startPolling();
+    retryTimer = setTimeout(connect, Math.min(60000, 1000 * 2 ** Math.min(failures, 6)));
+  };
+
+  async function connect() {
+    if (closed) return;
+    if (typeof EventSource === "undefined") {
+      startPolling();
+      return;
+    }
+    let ticket = null;
+    try {
+      ({ data: { ticket } } = await api.post("/events/ticket/"));
+    } catch {
+      ticket = null;
+    }
+    if (closed) return;
+    if (!ticket) {
+      retry();
+      return;
+    }
+    // Después de un corte con polling los listados ya se recargaron: se parte
+    // de cero en vez de reanudar (así no se aplican dos veces los eventos).
+    const recovered = !!pollTimer;
+    const params = new URLSearchParams({ ticket });
+    if (lastId && !recovered) params.set("last_event_id", lastId);
+    source = new EventSource(`${BASE}/events/?${params}`);
+
+    source.addEventListener("ready", (e) => {
+      lastId = e.lastEventId || lastId;
+      connected(recovered);
+    });
+    source.addEventListener("reset", (e) => {
+      lastId = e.lastEventId || lastId;
+      connected(false);
+      reset();
+    });
+    for (const type of TYPES) {
+      source.addEventListener(type, (e) => {
+        lastId = e.lastEventId || lastId;
+        connected(false);
+        const handler = handlers[type];
+        if (handler) handler(JSON.parse(e.data || "{}"));
+      });
+    }
+    source.onerror = () => {
+      // Con la conexión caída el navegador reintenta solo (con Last-Event-ID);
+      // si el servidor la rechazó (ticket vencido, sin ASGI) queda cerrada.
+      if (source && source.readyState === EventSource.CLOSED) {
+        source = null;
+        retry();
+      }
+    };
+  }
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    clearInterval(pollTimer);
+    if (source) source.close();
+  };
+}
@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from "react";
-import api from "../api";
+import api, { listOf } from "../api";
 
 const ACTION_LABEL = {
   SALE_CHECKOUT: "Venta realizada",
@@ -31,20 +31,28 @@ export default function Bitacora() {
   const [action, setAction] = useState("");
   const [model, setModel] = useState("");
 
-  const load = async () => {
+  const [next, setNext] = useState(null);
+
+  // Acción y modelo se filtran en el servidor; la búsqueda de texto, sobre lo cargado.
+  const load = async (cursor = null) => {
     setLoading(true); setMsg("");
     try {
-      const { data } = await api.get("/audit/");
-      setRows(Array.isArray(data) ? data : []);
+      const params = {};
+      if (action) params.action = action;
+      if (model.trim()) params.model = model.trim();
+      const { data } = cursor ? await api.get(cursor) : await api.get("/audit/", { params });
+      const page = listOf(data);
+      setRows(prev => (cursor ? [...prev, ...page] : page));
+      setNext(Array.isArray(data) ? null : data?.next || null);
     } catch {
       setMsg("No se pudo cargar la bitácora.");
-      setRows([]);
+      if (!cursor) setRows([]);
     } finally {
       setLoading(false);
     }
   };
 
-  useEffect(() => { load(); }, []);
+  useEffect(() => { load(); }, [action, model]);
 
   const filtered = useMemo(() => {
     const text = q.toLowerCase();
@@ -91,7 +99,7 @@ export default function Bitacora() {
             style={{marginLeft:6}}
           />
         </label>
-        <button onClick={load} disabled={loading}>{loading ? "Actualizando…" : "Actualizar"}</button>
+        <button onClick={() => load()} disabled={loading}>{loading ? "Actualizando…" : "Actualizar"}</button>
       </div>
 
       {/* Tabla */}
@@ -129,6 +137,12 @@ export default function Bitacora() {
         </tbody>
       </table>
 
+      {next && (
+        <button onClick={() => load(next)} disabled={loading} style={{marginTop:8}}>
+          {loading ? "Cargando…" : "Cargar más"}
+        </button>
+      )}
+
       <p style={{marginTop:8, fontSize:12, color:"#666"}}>
         Nota: se registran eventos como <b>Venta realizada</b>, <b>Venta anulada</b> y <b>Cambio de precio</b>.
       </p>
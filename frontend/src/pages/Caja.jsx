@@ -1,5 +1,5 @@
 import { useEffect, useRef, useState } from "react";
-import api from "../api";
+import api, { listOf } from "../api";
 import { useMe } from "../useMe";
 
 export default function Caja() {
@@ -11,6 +11,7 @@ export default function Caja() {
   const [loading, setLoading] = useState(false);
   const [msg, setMsg] = useState("");
   const [toast, setToast] = useState(null);
+  const [totales, setTotales] = useState(null);
 
 
   const [opening, setOpening] = useState("");
@@ -22,7 +23,7 @@ export default function Caja() {
     setLoading(true); setMsg("");
     try {
       const { data } = await api.get("/cash/");
-      setSesiones(Array.isArray(data) ? data : []);
+      setSesiones(listOf(data));
     } catch {
       setMsg("No se pudo cargar el historial de caja.");
       setSesiones([]);
@@ -33,6 +34,13 @@ export default function Caja() {
 
   const abierta = sesiones.find(s => s.status === "OPEN"); 
 
+  useEffect(() => {
+    if (!abierta) { setTotales(null); return; }
+    api.get(`/cash/${abierta.id}/totals/`)
+      .then(({ data }) => setTotales(data))
+      .catch(() => setTotales(null));
+  }, [abierta?.id, sesiones]);
+
   const doAbrir = async () => {
     if (opening === "") { setMsg("Debes ingresar el monto de apertura."); return; }
     if (!/^\d+$/.test(String(opening))) { setMsg("El monto de apertura debe ser un entero ≥ 0."); return; }
@@ -127,6 +135,14 @@ export default function Caja() {
         ) : (
           <span style={{color:"crimson"}}>CERRADA</span>
         )}
+        {abierta && totales && (
+          <div style={{marginTop:8, display:"flex", gap:16, flexWrap:"wrap"}}>
+            <span>Ventas: {totales.sales_count}</span>
+            <span>Neto: {formatCLP(totales.net_total)}</span>
+            <span>Anuladas: {totales.void_count} ({formatCLP(totales.void_total)})</span>
+            <span><strong>Efectivo esperado: {formatCLP(totales.expected_cash)}</strong></span>
+          </div>
+        )}
       </div>
 
       {/* Form abrir/cerrar */}
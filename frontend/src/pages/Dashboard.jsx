@@ -12,161 +12,148 @@ import {
   Pie,
   Cell,
 } from "recharts";
-import api from "../api";
+import api, { listOf } from "../api";
+import { subscribeEvents } from "../liveEvents";
 import { formatMoney } from "../utils/money";
+import ymd from "../utils/ymd";
 
 const LOW_THRESHOLD = 10;
 
-function ymd(d) {
-  try {
-    return new Date(d).toISOString().slice(0, 10);
-  } catch {
-    return "";
-  }
-}
+const monthKey = (day) => day.slice(0, 7);
 
 export default function Dashboard() {
   const today = ymd(new Date());
-  const last7 = ymd(new Date(Date.now() - 6 * 24 * 3600 * 1000));
 
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
-  const [products, setProducts] = useState([]);
-  const [sales, setSales] = useState([]);
+  const [summary, setSummary] = useState(null);
+  const [monthly, setMonthly] = useState([]);
+  const [topCategory, setTopCategory] = useState(null);
+  const [recent, setRecent] = useState([]);
+  const [lowStock, setLowStock] = useState([]);
   const [cashSession, setCashSession] = useState(null);
-  const [dateFrom, setDateFrom] = useState(last7);
+  const [ventasDia, setVentasDia] = useState(0);
+  const [dateFrom, setDateFrom] = useState(today);
   const [dateTo, setDateTo] = useState(today);
 
-  const load = async () => {
-    setLoading(true);
+  // Todo sale de agregados del servidor y de páginas acotadas: nunca se
+  // descarga el catálogo ni el historial de ventas completo.
+  const load = async ({ quiet = false } = {}) => {
+    if (!quiet) setLoading(true);
     setError("");
     try {
-      const [p, s, c] = await Promise.all([api.get("/products/"), api.get("/sales/"), api.get("/cash/")]);
-      setProducts(Array.isArray(p.data) ? p.data : []);
-      setSales(Array.isArray(s.data) ? s.data : []);
-      const sessions = Array.isArray(c.data) ? c.data : [];
-      const abierta = sessions.find((x) => x.status === "OPEN") || null;
-      setCashSession(abierta);
+      const range = {};
+      if (dateFrom) range.date_from = dateFrom;
+      if (dateTo) range.date_to = dateTo;
+      const salesParams = { status: "OK", page_size: 5 };
+      if (dateFrom) salesParams.date_from = new Date(`${dateFrom}T00:00:00`).toISOString();
+      if (dateTo) salesParams.date_to = new Date(`${dateTo}T23:59:59`).toISOString();
+      const ref = new Date(`${dateTo || today}T00:00:00`);
+      const monthsFrom = ymd(new Date(ref.getFullYear(), ref.getMonth() - 5, 1));
+
+      const [r, m, a, s, p, c] = await Promise.all([
+        api.get("/reports/sales/", { params: range }),
+        api.get("/reports/sales/", { params: { date_from: monthsFrom, date_to: dateTo || today } }),
+        api.get("/reports/analytics/", { params: { ...range, top: 1 } }),
+        api.get("/sales/", { params: salesParams }),
+        api.get("/products/", { params: { stock_lte: LOW_THRESHOLD, active: true, page_size: 200 } }),
+        api.get("/cash/", { params: { status: "OPEN", page_size: 1 } }),
+      ]);
+      const session = listOf(c.data)[0] || null;
+      let netToday = 0;
+      if (session) {
+        const { data } = await api.get(`/cash/${session.id}/totals/`);
+        netToday = Number(data.net_total) || 0;
+      }
+      setSummary(r.data);
+      setMonthly(m.data.por_dia || []);
+      setTopCategory((a.data.por_categoria || [])[0] || null);
+      setRecent(listOf(s.data));
+      setLowStock(listOf(p.data));
+      setCashSession(session);
+      setVentasDia(netToday);
     } catch (e) {
       setError("No se pudieron cargar datos del dashboard.");
     } finally {
-      setLoading(false);
+      if (!quiet) setLoading(false);
     }
   };
 
   useEffect(() => {
     load();
-    const onFocus = () => load();
-    const t = setInterval(load, 10000);
-    window.addEventListener("focus", onFocus);
+    // Eventos en vivo: las ventas y cambios de caja recargan los agregados
+    // (agrupados en una sola recarga por ráfaga); el stock se corrige en el acto.
+    let timer = null;
+    const refresh = () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => load({ quiet: true }), 1500);
+    };
+    const patchStock = (stock) =>
+      setLowStock((prev) =>
+        prev.map((p) => (stock[p.id] === undefined ? p : { ...p, stock: stock[p.id] }))
+      );
+    const unsubscribe = subscribeEvents({
+      "sale.checkout": (ev) => {
+        patchStock(ev.stock || {});
+        refresh();
+      },
+      "sale.void": (ev) => {
+        patchStock(ev.stock || {});
+        refresh();
+      },
+      "stock.level": refresh,
+      "cash.open": refresh,
+      "cash.close": refresh,
+      "sale.bulk": refresh,
+      reset: () => load({ quiet: true }),
+    });
     return () => {
-      clearInterval(t);
-      window.removeEventListener("focus", onFocus);
+      clearTimeout(timer);
+      unsubscribe();
     };
-  }, []);
+  }, [dateFrom, dateTo]);
 
   const metrics = useMemo(() => {
-    const start = dateFrom ? new Date(`${dateFrom}T00:00:00`) : null;
-    const end = dateTo ? new Date(`${dateTo}T23:59:59`) : null;
-    const inRange = (iso) => {
-      const d = new Date(iso);
-      if (Number.isNaN(d.getTime())) return false;
-      if (start && d < start) return false;
-      if (end && d > end) return false;
-      return true;
-    };
-
-    const okSales = sales.filter((s) => s.status === "OK" && inRange(s.created_at));
-    const openedAt = cashSession?.opened_at ? new Date(cashSession.opened_at) : null;
-
-    let totalVentas = 0;
-    let totalUnidades = 0;
-    let ventasDia = 0;
-    let totalTickets = 0;
-
-    const byDay = {};
     const byMonth = {};
-    const byPayment = {};
-    const byCategory = {};
-    const productMap = new Map(products.map((p) => [p.id, p]));
-
-    for (const s of okSales) {
-      const total = Number(s.total) || 0;
-      totalVentas += total;
-      totalTickets += 1;
-      const day = ymd(s.created_at);
-      byDay[day] = (byDay[day] || 0) + total;
-      const monthKey = `${new Date(s.created_at).getFullYear()}-${String(new Date(s.created_at).getMonth() + 1).padStart(2, "0")}`;
-      byMonth[monthKey] = (byMonth[monthKey] || 0) + total;
-      const pm = s.payment_method || "OTRO";
-      byPayment[pm] = (byPayment[pm] || 0) + total;
-      if (Array.isArray(s.items)) {
-        for (const it of s.items) {
-          totalUnidades += Number(it.qty) || 0;
-          const prod = productMap.get(it.product);
-          const cat = prod?.category_name || "Sin categoría";
-          const lineTotal = ((Number(it.unit_price) || 0) - (Number(it.discount) || 0)) * (Number(it.qty) || 0);
-          byCategory[cat] = (byCategory[cat] || 0) + lineTotal;
-        }
-      }
-      if (openedAt && ymd(s.created_at) === ymd(openedAt) && new Date(s.created_at) >= openedAt) {
-        ventasDia += total;
-      }
-    }
-
-    // Construir serie diaria dentro del rango
-    const days = [];
-    const startDay = start || new Date(okSales[0]?.created_at || Date.now());
-    const endDay = end || new Date();
-    for (let d = new Date(startDay); d <= endDay; d.setDate(d.getDate() + 1)) {
-      const key = ymd(d);
-      days.push({ day: key, total: byDay[key] || 0 });
+    for (const row of monthly) {
+      const key = monthKey(String(row.day));
+      byMonth[key] = (byMonth[key] || 0) + (Number(row.total) || 0);
     }
-
-    const payData = Object.entries(byPayment).map(([method, value]) => ({ method, value }));
-
-    // Ultimos 6 meses (incluyendo el actual)
+    // Últimos 6 meses (incluyendo el del fin del rango)
     const months = [];
-    const ref = end || new Date();
+    const ref = new Date(`${dateTo || today}T00:00:00`);
     for (let i = 5; i >= 0; i--) {
-      const d = new Date(ref);
-      d.setMonth(d.getMonth() - i, 1);
-      const key = `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}`;
+      const d = new Date(ref.getFullYear(), ref.getMonth() - i, 1);
+      const key = ymd(d).slice(0, 7);
       months.push({
-        month: new Date(d).toLocaleString("es-CL", { month: "short" }),
+        month: d.toLocaleString("es-CL", { month: "short" }),
         year: d.getFullYear(),
         key,
         total: byMonth[key] || 0,
       });
     }
 
-    const lowStock = products
-      .filter((p) => (Number(p.stock) || 0) <= LOW_THRESHOLD)
-      .sort((a, b) => (a.stock || 0) - (b.stock || 0))
-      .slice(0, 8);
+    const payData = (summary?.por_medio_pago || []).map((row) => ({
+      method: row.payment_method || "OTRO",
+      value: Number(row.total) || 0,
+    }));
 
-    const topCategoryEntry = Object.entries(byCategory).sort((a, b) => b[1] - a[1])[0];
-    const topCategoryName = topCategoryEntry ? topCategoryEntry[0] : "-";
-    const topCategoryTotal = topCategoryEntry ? topCategoryEntry[1] : 0;
+    const low = lowStock
+      .filter((p) => (Number(p.stock) || 0) <= LOW_THRESHOLD)
+      .sort((a, b) => (a.stock || 0) - (b.stock || 0));
 
     return {
-      totalVentas,
-      totalUnidades,
+      totalVentas: Number(summary?.total_ventas) || 0,
       ventasDia,
-      totalTickets,
-      lowStock,
-      lowCount: lowStock.length,
-      daily: days,
+      lowStock: low.slice(0, 8),
+      lowCount: low.length,
       months,
       payData,
-      topCategoryName,
-      topCategoryTotal,
-      recent: okSales
-        .slice()
-        .sort((a, b) => new Date(b.created_at) - new Date(a.created_at))
-        .slice(0, 5),
+      topCategoryName: topCategory ? topCategory.category_name || "Sin categoría" : "-",
+      topCategoryTotal: Number(topCategory?.total) || 0,
+      recent,
     };
-  }, [sales, products, dateFrom, dateTo, cashSession]);
+  }, [summary, monthly, topCategory, recent, lowStock, ventasDia, dateTo, today]);
 
   return (
     <div className="container">
@@ -186,7 +173,7 @@ export default function Dashboard() {
           Hasta
           <input type="date" value={dateTo} onChange={(e) => setDateTo(e.target.value)} />
         </label>
-        <button onClick={load} disabled={loading}>{loading ? "Actualizando..." : "Refrescar"}</button>
+        <button onClick={() => load()} disabled={loading}>{loading ? "Actualizando..." : "Refrescar"}</button>
       </div>
 
       <div style={{ display: "grid", gridTemplateColumns: "repeat(auto-fit, minmax(200px, 1fr))", gap: 12, marginBottom: 16 }}>
@@ -1,5 +1,5 @@
 import { useCallback, useEffect, useMemo, useRef, useState } from "react";
-import api from "../api";
+import api, { listOf } from "../api";
 import ProductRow from "../components/ProductRow.jsx";
 
 export default function Pos() {
@@ -50,8 +50,8 @@ export default function Pos() {
       }
       setLoading(true);
       try {
-        const { data } = await api.get(`/products/?search=${encodeURIComponent(q)}`);
-        if (active) setFound(Array.isArray(data) ? data : []);
+        const { data } = await api.get("/products/", { params: { search: q } });
+        if (active) setFound(listOf(data));
       } catch {
         if (active) setFound([]);
       } finally {
@@ -70,10 +70,11 @@ export default function Pos() {
     let cancelled = false;
     const loadTop = async () => {
       try {
-        const { data } = await api.get(`/products/`);
+        const { data } = await api.get("/products/", {
+          params: { top_seller: true, active: true, page_size: 12 },
+        });
         if (cancelled) return;
-        const list = Array.isArray(data) ? data : [];
-        const tops = list.filter((p) => p.top_seller && p.active !== false).slice(0, 12);
+        const tops = listOf(data).slice(0, 12);
         setTop(tops);
       } catch {
         if (!cancelled) setTop([]);
@@ -95,11 +96,18 @@ export default function Pos() {
     const run = async () => {
       let addedToCart = false;
       try {
-        const { data } = await api.get(`/products/?search=${encodeURIComponent(scanPending)}`);
-        const list = Array.isArray(data) ? data : [];
-        const match = list.find(
-          (item) => (item.code || "").toString().toLowerCase() === scanPending.toLowerCase()
-        );
+        // Coincidencia exacta por código (caché del servidor); si no existe,
+        // mostramos sugerencias de la búsqueda general.
+        let match = null;
+        let list = [];
+        try {
+          const { data } = await api.get(`/products/by-code/${encodeURIComponent(scanPending)}/`);
+          match = data;
+        } catch (err) {
+          if (err?.response?.status !== 404) throw err;
+          const { data } = await api.get("/products/", { params: { search: scanPending } });
+          list = listOf(data);
+        }
         if (!active) return;
         if (match) {
           add(match);
@@ -1,5 +1,5 @@
 import { useEffect, useState, useRef } from "react";
-import api from "../api";
+import api, { listOf } from "../api";
 import BarcodeScanner from "/src/components/BarcodeScanner";
 
 // ⬇️ import dinámico dentro del modal, no hace falta aquí arriba
@@ -107,8 +107,8 @@ export default function ProductoNuevo() {
     if (!code || code === lastCodeCheck.current) return;
     lastCodeCheck.current = code;
     try {
-      const { data } = await api.get(`/products/?search=${encodeURIComponent(code)}`);
-      const list = Array.isArray(data) ? data : [];
+      const { data } = await api.get("/products/", { params: { search: code } });
+      const list = listOf(data);
       const match = list.find((item) => (item.code || "").toString().toLowerCase() === code.toLowerCase());
       if (match) {
         showToast(`El codigo ${code} ya existe (${match.name}).`, "warn", 3500);
@@ -1,5 +1,6 @@
 ﻿import { useEffect, useMemo, useState } from "react";
 import api from "../api";
+import { syncCatalog } from "../catalogSync";
 
 const TYPE_BADGE = {
   PCT: "%",
@@ -47,14 +48,10 @@ export default function Promos() {
     setLoading(true);
     setMessage(null);
     try {
-      const [promRes, catRes, prodRes] = await Promise.all([
-        api.get("/promotions/"),
-        api.get("/categories/"),
-        api.get("/products/"),
-      ]);
-      setPromos(Array.isArray(promRes.data) ? promRes.data : []);
-      setCategories(Array.isArray(catRes.data) ? catRes.data : []);
-      setProducts(Array.isArray(prodRes.data) ? prodRes.data : []);
+      const { promotions, categories, products } = await syncCatalog();
+      setPromos(promotions);
+      setCategories(categories);
+      setProducts(products);
     } catch (error) {
       console.error("Error al cargar datos de promociones", error);
       setMessage({ type: "error", text: "No se pudieron cargar las promociones." });
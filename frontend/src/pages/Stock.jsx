@@ -1,5 +1,6 @@
 import { useEffect, useMemo, useState } from "react";
 import api from "../api";
+import { syncCatalog } from "../catalogSync";
 import { useMe } from "../useMe";
 import { formatMoney } from "../utils/money";
 
@@ -24,8 +25,9 @@ export default function Stock() {
     setLoading(true);
     setMsg("");
     try {
-      const { data } = await api.get("/products/");
-      setRows(Array.isArray(data) ? data : []);
+      const { products, categories } = await syncCatalog();
+      setRows(products);
+      setCats(categories);
     } catch (e) {
       setMsg(e?.response?.status === 401 ? "No autenticado" : "Error cargando stock");
       setRows([]);
@@ -35,20 +37,9 @@ export default function Stock() {
   };
 
   useEffect(() => {
-    const loadCats = async () => {
-      try {
-        const { data } = await api.get("/categories/");
-        setCats(Array.isArray(data) ? data : []);
-      } catch {
-        setCats([]);
-      }
-    };
+    // Solo baja los cambios desde la última sincronización.
     load();
-    loadCats();
-    const onFocus = () => {
-      load();
-      loadCats();
-    };
+    const onFocus = () => load();
     window.addEventListener("focus", onFocus);
     return () => window.removeEventListener("focus", onFocus);
   }, []);
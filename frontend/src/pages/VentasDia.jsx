@@ -1,5 +1,6 @@
-import { useEffect, useMemo, useState } from "react";
-import api from "../api";
+import { useEffect, useMemo, useRef, useState } from "react";
+import api, { fetchAll, listOf } from "../api";
+import { subscribeEvents } from "../liveEvents";
 import ymd from "../utils/ymd";
 import { useMe } from "../useMe";
 
@@ -14,8 +15,9 @@ export default function VentasDia() {
   const [itemsBySale, setItemsBySale] = useState({});
   const [open, setOpen] = useState({});
   const [cashSession, setCashSession] = useState(null);
+  const sessionRef = useRef(null);
 
-  const hoy = new Date().toISOString().slice(0, 10);
+  const hoy = ymd(new Date());
 
   const load = async () => {
     setLoading(true);
@@ -28,25 +30,26 @@ export default function VentasDia() {
     let hadError = false;
 
     try {
-      const [salesResp, cashResp] = await Promise.all([
-        api.get("/sales/"),
-        api.get("/cash/"),
-      ]);
-
-      const salesData = Array.isArray(salesResp.data) ? salesResp.data : [];
-      setVentas(salesData);
-
-      const sessions = Array.isArray(cashResp.data) ? cashResp.data : [];
-      const abierta = sessions.find((s) => s.status === "OPEN") || null;
+      const cashResp = await api.get("/cash/", { params: { status: "OPEN", page_size: 1 } });
+      const abierta = listOf(cashResp.data)[0] || null;
       setCashSession(abierta);
+      sessionRef.current = abierta;
       if (!abierta) {
         infoMsg = "La caja está cerrada. Las ventas del día se han reiniciado.";
+        setVentas([]);
+      } else {
+        // Las ventas quedan ligadas a la sesión de caja; el servidor filtra por ella
+        // (y desde la medianoche local de hoy), sin descargar el historial completo.
+        const inicioHoy = new Date(`${hoy}T00:00:00`);
+        const salesData = await fetchAll("/sales/", { session: abierta.id, date_from: inicioHoy.toISOString() });
+        setVentas(salesData);
       }
     } catch (err) {
       hadError = true;
       setMsg("No se pudieron cargar las ventas ni el estado de caja.");
       setVentas([]);
       setCashSession(null);
+      sessionRef.current = null;
     } finally {
       setLoading(false);
       if (!hadError && infoMsg) {
@@ -57,6 +60,25 @@ export default function VentasDia() {
 
   useEffect(() => {
     load();
+    // Ventas nuevas y anuladas de la sesión abierta llegan en vivo; apertura y
+    // cierre de caja (o un corte del stream) recargan todo.
+    return subscribeEvents({
+      "sale.checkout": async (ev) => {
+        if (!sessionRef.current || ev.session !== sessionRef.current.id) return;
+        try {
+          const { data } = await api.get(`/sales/${ev.id}/`);
+          setVentas((prev) => (prev.some((v) => v.id === data.id) ? prev : [data, ...prev]));
+        } catch {
+          // se corrige en la próxima recarga
+        }
+      },
+      "sale.void": (ev) =>
+        setVentas((prev) => prev.map((v) => (v.id === ev.id ? { ...v, status: "VOID" } : v))),
+      "sale.bulk": load,
+      "cash.open": load,
+      "cash.close": load,
+      reset: load,
+    });
   }, []);
 
   const ventasHoy = useMemo(() => {
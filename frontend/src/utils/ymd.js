@@ -1,6 +1,9 @@
 // frontend/src/utils/ymd.js
 
+// Día local YYYY-MM-DD (el de la tienda, no el de UTC); "" si la fecha no es válida.
 export default function ymd(dateString) {
   const d = new Date(dateString);
-  return d.toISOString().slice(0, 10);
+  if (Number.isNaN(d.getTime())) return "";
+  const pad = (n) => String(n).padStart(2, "0");
+  return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
 }